@@ -0,0 +1,286 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from prediksi import ABSENSI_DATA_PATH
+
+# Urutan hari sama dengan day_map metadata model absensi (Senin = 0)
+HARI = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Jendela rolling (hari) yang dilaporkan; JENDELA_MAKS = panjang ring buffer per karyawan
+JENDELA = (30, 90)
+JENDELA_MAKS = max(JENDELA)
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+def _hari_ke(tanggal):
+    """Tanggal (str / datetime, skalar atau array) -> nomor hari sejak 1970-01-01"""
+    hari = pd.to_datetime(tanggal).to_numpy().astype('datetime64[D]')
+    return (hari - _EPOCH).astype(np.int64)
+
+class AnalitikAbsensi:
+    """
+    Agregat absensi per karyawan dalam array berukuran (n_karyawan, ...):
+    total check-in dan terlambat, rincian per hari (7 kolom) dan per cuaca, serta
+    ring buffer harian JENDELA_MAKS hari untuk jendela rolling 30/90 hari.
+    Mencatat satu check-in adalah O(1); query per karyawan atau seluruh tim hanya
+    membaca array agregat, tidak memindai ulang log.
+
+    Check-in yang lebih tua dari JENDELA_MAKS hari dibanding hari terbaru pada slot
+    ring buffer yang sama hanya masuk ke total, bukan ke jendela rolling.
+    """
+
+    def __init__(self, kapasitas=64, jendela_maks=JENDELA_MAKS):
+        self.jendela_maks = jendela_maks
+        self.indeks = {}
+        self.nama = []
+        self.cuaca = {}
+        self.hari_terakhir = None
+        self._kunci = threading.Lock()
+
+        self.hadir = np.zeros(kapasitas, dtype=np.int64)
+        self.terlambat = np.zeros(kapasitas, dtype=np.int64)
+        self.hadir_hari = np.zeros((kapasitas, 7), dtype=np.int64)
+        self.terlambat_hari = np.zeros((kapasitas, 7), dtype=np.int64)
+        self.hadir_cuaca = np.zeros((kapasitas, 0), dtype=np.int64)
+        self.terlambat_cuaca = np.zeros((kapasitas, 0), dtype=np.int64)
+        # Slot ring buffer = hari % jendela_maks; hari_slot menyimpan hari yang sedang mengisi slot
+        self.hari_slot = np.full((kapasitas, jendela_maks), -1, dtype=np.int64)
+        self.hadir_slot = np.zeros((kapasitas, jendela_maks), dtype=np.int64)
+        self.terlambat_slot = np.zeros((kapasitas, jendela_maks), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.indeks)
+
+    def __contains__(self, id_karyawan):
+        return id_karyawan in self.indeks
+
+    @classmethod
+    def from_frame(cls, df):
+        """Mengisi agregat dari log absensi (kolom tanggal, id_karyawan, terlambat, cuaca; opsional nama_karyawan)"""
+        analitik = cls(kapasitas=max(64, df['id_karyawan'].nunique()))
+        analitik.catat_batch(df)
+        return analitik
+
+    @classmethod
+    def from_csv(cls, path=ABSENSI_DATA_PATH):
+        return cls.from_frame(pd.read_csv(path, usecols=['tanggal', 'id_karyawan', 'nama_karyawan', 'terlambat',
+                                                         'cuaca']))
+
+    def _perbesar(self, baris):
+        # Kapasitas baris digandakan jika penuh
+        while baris > len(self.hadir):
+            for nama in ('hadir', 'terlambat', 'hadir_hari', 'terlambat_hari', 'hadir_cuaca', 'terlambat_cuaca',
+                         'hadir_slot', 'terlambat_slot', 'hari_slot'):
+                lama = getattr(self, nama)
+                tambahan = np.full_like(lama, -1 if nama == 'hari_slot' else 0)
+                setattr(self, nama, np.concatenate([lama, tambahan]))
+
+    def _baris(self, id_karyawan, nama=None):
+        # Menambah baris untuk karyawan baru
+        if id_karyawan not in self.indeks:
+            self._perbesar(len(self.indeks) + 1)
+            self.indeks[id_karyawan] = len(self.indeks)
+            self.nama.append(nama if nama is not None else str(id_karyawan))
+        return self.indeks[id_karyawan]
+
+    def _kolom_cuaca(self, cuaca):
+        # Kategori cuaca baru menambah satu kolom
+        if cuaca not in self.cuaca:
+            self.cuaca[cuaca] = len(self.cuaca)
+            kosong = np.zeros((len(self.hadir_cuaca), 1), dtype=np.int64)
+            self.hadir_cuaca = np.hstack([self.hadir_cuaca, kosong])
+            self.terlambat_cuaca = np.hstack([self.terlambat_cuaca, kosong.copy()])
+        return self.cuaca[cuaca]
+
+    def catat(self, id_karyawan, tanggal, terlambat, cuaca, nama=None):
+        """Mencatat satu check-in (O(1))"""
+        # np.datetime64 jauh lebih murah daripada pd.to_datetime untuk satu tanggal
+        hari = int((np.datetime64(tanggal, 'D') - _EPOCH).astype(np.int64))
+        terlambat = int(bool(terlambat))
+        with self._kunci:
+            i = self._baris(id_karyawan, nama)
+            c = self._kolom_cuaca(cuaca)
+            h = (hari + 3) % 7  # 1970-01-01 adalah Kamis
+
+            self.hadir[i] += 1
+            self.terlambat[i] += terlambat
+            self.hadir_hari[i, h] += 1
+            self.terlambat_hari[i, h] += terlambat
+            self.hadir_cuaca[i, c] += 1
+            self.terlambat_cuaca[i, c] += terlambat
+
+            slot = hari % self.jendela_maks
+            if self.hari_slot[i, slot] < hari:
+                # Slot masih berisi hari yang sudah keluar dari jendela
+                self.hari_slot[i, slot] = hari
+                self.hadir_slot[i, slot] = self.terlambat_slot[i, slot] = 0
+            if self.hari_slot[i, slot] == hari:
+                self.hadir_slot[i, slot] += 1
+                self.terlambat_slot[i, slot] += terlambat
+            self.hari_terakhir = hari if self.hari_terakhir is None else max(self.hari_terakhir, hari)
+
+    def catat_batch(self, df):
+        """
+        Mencatat banyak check-in sekaligus secara vektor. Urutan baris bebas; hasilnya
+        sama dengan memanggil catat() untuk setiap baris.
+        """
+        if len(df) == 0:
+            return
+        hari = _hari_ke(df['tanggal'])
+        terlambat = df['terlambat'].to_numpy().astype(bool).astype(np.int64)
+        ids = df['id_karyawan'].to_numpy()
+        nama = df['nama_karyawan'].to_numpy() if 'nama_karyawan' in df else np.full(len(df), None)
+
+        with self._kunci:
+            pertama = ~pd.Series(ids).duplicated().to_numpy()
+            for id_karyawan, nama_karyawan in zip(ids[pertama], nama[pertama]):
+                self._baris(id_karyawan, nama_karyawan)
+            for cuaca in pd.unique(df['cuaca'].to_numpy()):
+                self._kolom_cuaca(cuaca)
+
+            i = pd.Series(ids).map(self.indeks).to_numpy(dtype=np.int64)
+            c = pd.Series(df['cuaca'].to_numpy()).map(self.cuaca).to_numpy(dtype=np.int64)
+            h = (hari + 3) % 7
+
+            np.add.at(self.hadir, i, 1)
+            np.add.at(self.terlambat, i, terlambat)
+            np.add.at(self.hadir_hari, (i, h), 1)
+            np.add.at(self.terlambat_hari, (i, h), terlambat)
+            np.add.at(self.hadir_cuaca, (i, c), 1)
+            np.add.at(self.terlambat_cuaca, (i, c), terlambat)
+
+            # Ring buffer: setiap slot diisi hari terbaru yang jatuh ke slot itu
+            slot = hari % self.jendela_maks
+            hari_baru = self.hari_slot.copy()
+            np.maximum.at(hari_baru, (i, slot), hari)
+            direset = hari_baru > self.hari_slot
+            self.hadir_slot[direset] = 0
+            self.terlambat_slot[direset] = 0
+            self.hari_slot = hari_baru
+
+            masuk = hari == hari_baru[i, slot]
+            np.add.at(self.hadir_slot, (i[masuk], slot[masuk]), 1)
+            np.add.at(self.terlambat_slot, (i[masuk], slot[masuk]), terlambat[masuk])
+
+            terbaru = int(hari.max())
+            self.hari_terakhir = terbaru if self.hari_terakhir is None else max(self.hari_terakhir, terbaru)
+
+    def _jendela(self, jendela, sampai):
+        # Check-in dan terlambat per karyawan dalam (sampai - jendela, sampai]
+        if jendela > self.jendela_maks:
+            raise ValueError(f"Jendela {jendela} hari melebihi ring buffer {self.jendela_maks} hari")
+        # Slot ring buffer hanya menyimpan hari terbaru, hari sebelum (hari_terakhir - jendela_maks) sudah tertimpa
+        if self.hari_terakhir is not None and sampai - jendela < self.hari_terakhir - self.jendela_maks:
+            paling_awal = _EPOCH + (self.hari_terakhir - self.jendela_maks + jendela)
+            raise ValueError(f"Jendela {jendela} hari hanya tersedia untuk tanggal {paling_awal} atau sesudahnya")
+        n = len(self.indeks)
+        dalam = (self.hari_slot[:n] > sampai - jendela) & (self.hari_slot[:n] <= sampai)
+        return (np.where(dalam, self.hadir_slot[:n], 0).sum(axis=1),
+                np.where(dalam, self.terlambat_slot[:n], 0).sum(axis=1))
+
+    def tanggal_terakhir(self):
+        """Tanggal check-in terbaru (np.datetime64) atau None"""
+        return None if self.hari_terakhir is None else _EPOCH + self.hari_terakhir
+
+    def _sampai(self, tanggal):
+        if tanggal is not None:
+            return int(_hari_ke(tanggal))
+        return self.hari_terakhir if self.hari_terakhir is not None else 0
+
+    # Ringkasan semua karyawan: tingkat terlambat total dan ketepatan waktu rolling
+    def ringkasan(self, tanggal=None, jendela=JENDELA):
+        """
+        Args:
+            tanggal (str, optional): Akhir jendela rolling (default: tanggal check-in terbaru). Tidak boleh
+                                     lebih awal dari (check-in terbaru - JENDELA_MAKS + jendela)
+            jendela (tuple): Panjang jendela rolling dalam hari (maksimum JENDELA_MAKS)
+
+        Returns:
+            pd.DataFrame: Satu baris per karyawan: id_karyawan, nama_karyawan, hadir, terlambat,
+                          tingkat_terlambat, lalu hadir_{w}h dan tepat_waktu_{w}h (NaN jika tidak
+                          ada check-in dalam jendela) untuk setiap w
+        """
+        with self._kunci:
+            n = len(self.indeks)
+            sampai = self._sampai(tanggal)
+            hasil = pd.DataFrame({
+                'id_karyawan': list(self.indeks),
+                'nama_karyawan': self.nama[:n],
+                'hadir': self.hadir[:n].copy(),
+                'terlambat': self.terlambat[:n].copy()
+            })
+            hasil['tingkat_terlambat'] = _rasio(hasil['terlambat'].to_numpy(), hasil['hadir'].to_numpy())
+            for w in jendela:
+                hadir, terlambat = self._jendela(w, sampai)
+                hasil[f'hadir_{w}h'] = hadir
+                hasil[f'tepat_waktu_{w}h'] = 1 - _rasio(terlambat, hadir)
+        return hasil
+
+    def _rincian(self, hadir, terlambat, label, id_karyawan):
+        # Rincian satu karyawan atau seluruh tim (jumlah semua baris)
+        with self._kunci:
+            n = len(self.indeks)
+            if id_karyawan is None:
+                hadir, terlambat = hadir[:n].sum(axis=0), terlambat[:n].sum(axis=0)
+            else:
+                i = self.indeks[id_karyawan]
+                hadir, terlambat = hadir[i].copy(), terlambat[i].copy()
+        return pd.DataFrame({'hadir': hadir, 'terlambat': terlambat,
+                             'tingkat_terlambat': _rasio(terlambat, hadir)}, index=pd.Index(label))
+
+    def per_hari(self, id_karyawan=None):
+        """Rincian per hari (Monday..Sunday) untuk satu karyawan atau seluruh tim (id_karyawan=None)"""
+        return self._rincian(self.hadir_hari, self.terlambat_hari, pd.Index(HARI, name='hari'), id_karyawan)
+
+    def per_cuaca(self, id_karyawan=None):
+        """Rincian per kondisi cuaca untuk satu karyawan atau seluruh tim (id_karyawan=None)"""
+        return self._rincian(self.hadir_cuaca, self.terlambat_cuaca, pd.Index(list(self.cuaca), name='cuaca'),
+                             id_karyawan)
+
+    def tim(self, tanggal=None, jendela=JENDELA):
+        """
+        Returns:
+            dict: karyawan, hadir, terlambat, tingkat_terlambat dan tepat_waktu_{w}h seluruh tim
+        """
+        with self._kunci:
+            n = len(self.indeks)
+            hadir, terlambat = int(self.hadir[:n].sum()), int(self.terlambat[:n].sum())
+            hasil = {'karyawan': n, 'hadir': hadir, 'terlambat': terlambat,
+                     'tingkat_terlambat': float(_rasio(terlambat, hadir))}
+            sampai = self._sampai(tanggal)
+            for w in jendela:
+                hadir_w, terlambat_w = (x.sum() for x in self._jendela(w, sampai))
+                hasil[f'hadir_{w}h'] = int(hadir_w)
+                hasil[f'tepat_waktu_{w}h'] = float(1 - _rasio(terlambat_w, hadir_w))
+        return hasil
+
+def _rasio(pembilang, penyebut):
+    """pembilang / penyebut, NaN jika penyebut 0"""
+    pembilang = np.asarray(pembilang, dtype=np.float64)
+    penyebut = np.asarray(penyebut, dtype=np.float64)
+    return np.divide(pembilang, penyebut, out=np.full(np.broadcast(pembilang, penyebut).shape, np.nan),
+                     where=penyebut > 0)
+
+if __name__ == "__main__":
+    # Ringkasan per karyawan dari log: python absensi_analitik.py
+    # Rincian satu karyawan:           python absensi_analitik.py --karyawan 9
+    parser = argparse.ArgumentParser(description="Analitik keterlambatan per karyawan dari log absensi")
+    parser.add_argument('--karyawan', type=int, help="id_karyawan untuk rincian per hari dan cuaca")
+    parser.add_argument('--tanggal', help="akhir jendela rolling (default: check-in terbaru)")
+    args = parser.parse_args()
+
+    mulai = time.perf_counter()
+    analitik = AnalitikAbsensi.from_csv()
+    waktu_bangun = time.perf_counter() - mulai
+
+    with pd.option_context('display.width', 200, 'display.max_rows', None):
+        print(analitik.ringkasan(args.tanggal).round(3).to_string(index=False))
+        print()
+        print(analitik.per_hari(args.karyawan).round(3).to_string())
+        print()
+        print(analitik.per_cuaca(args.karyawan).round(3).to_string())
+    print(f"\n{int(analitik.hadir.sum())} check-in, {len(analitik)} karyawan, dibangun dalam {waktu_bangun:.3f} s")
@@ -0,0 +1,251 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from numpy_model import FoldedScaler
+from prediksi import (ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, BACKEND_MODEL,
+                      BASE_DIR, artefak_aktif, load_model, prediksi_probabilitas)
+
+ABSENSI_LUT_PATH = BASE_DIR / 'absensi' / 'model' / 'absensi_lut.npy'
+ABSENSI_LUT_INFO_PATH = BASE_DIR / 'absensi' / 'model' / 'absensi_lut.json'
+
+# Grid default: jadwal 06:00-10:00 dan kedatangan -60..+180 menit dari jadwal, per menit
+JADWAL_AWAL, JADWAL_AKHIR = 6 * 60, 10 * 60
+OFFSET_AWAL, OFFSET_AKHIR = -60, 180
+
+# Ukuran LRU cache untuk input di luar grid
+UKURAN_CACHE = 4096
+
+def _checksum_model():
+    # Model dan scaler versi aktif; tabel dari versi lain otomatis diabaikan
+    model_path, scaler_path, _ = artefak_aktif(ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH)
+    return _checksum(model_path, scaler_path)
+
+def _checksum(*paths):
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+# Membangun tabel probabilitas untuk seluruh grid (jadwal, offset, hari, cuaca)
+def bangun_tabel(model, scaler, metadata, jadwal=(JADWAL_AWAL, JADWAL_AKHIR),
+                 offset=(OFFSET_AWAL, OFFSET_AKHIR), dtype=np.float32):
+    """
+    Menghitung probabilitas untuk setiap kombinasi grid dalam satu batch besar
+
+    Returns:
+        tuple: (tabel (n_jadwal, n_offset, 7, n_cuaca), daftar vektor cuaca)
+    """
+    # Rain dan Thunderstorm memakai vektor yang sama, cukup dihitung sekali
+    vektor_cuaca = sorted({tuple(v) for v in metadata['weather_map'].values()}, reverse=True)
+
+    j, o, h, c = np.meshgrid(np.arange(jadwal[0], jadwal[1] + 1), np.arange(offset[0], offset[1] + 1),
+                             np.arange(7), np.arange(len(vektor_cuaca)), indexing='ij')
+    j, o, h, c = j.ravel(), o.ravel(), h.ravel(), c.ravel()
+    fitur = np.column_stack([j, j + o, h, h == 0, h == 4, np.array(vektor_cuaca)[c]]).astype(np.float64)
+
+    tabel = prediksi_probabilitas(model, scaler, fitur).astype(dtype)
+    return tabel.reshape(jadwal[1] - jadwal[0] + 1, offset[1] - offset[0] + 1, 7, len(vektor_cuaca)), vektor_cuaca
+
+def simpan_tabel(tabel, vektor_cuaca, jadwal=(JADWAL_AWAL, JADWAL_AKHIR), offset=(OFFSET_AWAL, OFFSET_AKHIR),
+                 path=ABSENSI_LUT_PATH, info_path=ABSENSI_LUT_INFO_PATH):
+    # File baru lalu rename: tabel lama yang sedang di-memory-map proses lain tidak ikut berubah
+    _tulis_atomik(path, 'wb', lambda f: np.save(f, tabel))
+    info = {
+        'jadwal': list(jadwal),
+        'offset': list(offset),
+        'cuaca': [list(v) for v in vektor_cuaca],
+        'checksum_model': _checksum_model()
+    }
+    _tulis_atomik(info_path, 'w', lambda f: json.dump(info, f, indent=2))
+
+def _tulis_atomik(path, mode, tulis):
+    # File sementara unik per penulis, sehingga dua build bersamaan tidak saling menimpa
+    fd, sementara = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, mode) as f:
+            tulis(f)
+        os.chmod(sementara, 0o644)
+        os.replace(sementara, path)
+    except BaseException:
+        os.unlink(sementara)
+        raise
+
+class ModelTabelAbsensi:
+    """
+    Model absensi dengan tabel probabilitas yang di-memory-map. Input di dalam grid
+    dijawab dengan indeks array; input di luar grid melalui LRU cache, dan hanya
+    cache miss yang dikirim ke model (satu pemanggilan per batch).
+    Dipakai bersama FoldedScaler, karena predict menerima fitur mentah.
+
+    Args:
+        model, scaler: Model dan scaler asli untuk input di luar grid
+        path, info_path: Lokasi tabel (.npy) dan info grid (.json); jika tidak ada
+                         atau model sudah berubah, hanya LRU cache yang dipakai
+        ukuran_cache (int): Jumlah entri maksimum LRU cache
+    """
+
+    def __init__(self, model, scaler, path=ABSENSI_LUT_PATH, info_path=ABSENSI_LUT_INFO_PATH,
+                 ukuran_cache=UKURAN_CACHE):
+        self.model = model
+        self.scaler = scaler
+        self.ukuran_cache = ukuran_cache
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.lut_hits = 0
+        self.cache_hits = 0
+        self.misses = 0
+
+        self.path = path
+        self.info_path = info_path
+        # Model dari backend bundle dimuat ulang tanpa restart; tabel dan cache hanya berlaku untuk satu versi
+        self.versi_model = getattr(model, 'versi', None)
+        self.grid = self._muat_tabel()
+
+    def _muat_tabel(self):
+        # (tabel, jadwal_awal, offset_awal, vektor_cuaca), atau None jika tabel tidak ada atau model sudah berubah
+        if not (self.path.exists() and self.info_path.exists()):
+            return None
+        with open(self.info_path, 'r') as f:
+            info = json.load(f)
+        try:
+            checksum = _checksum_model()
+        except FileNotFoundError:
+            # Deployment yang hanya membawa file bundle: tabel tidak bisa dicocokkan dengan model
+            return None
+        if info['checksum_model'] != checksum:
+            return None
+        return (np.load(self.path, mmap_mode='r'), info['jadwal'][0], info['offset'][0],
+                np.array(info['cuaca'], dtype=np.float64))
+
+    @property
+    def tabel(self):
+        return None if self.grid is None else self.grid[0]
+
+    @property
+    def versi(self):
+        # Ikut kunci cache hasil di app.py, seperti versi ModelBundle
+        return getattr(self.model, 'versi', '')
+
+    def _cek_versi_model(self):
+        # Versi bundle baru: tabel dicocokkan ulang dan cache dari versi lama dibuang
+        if not hasattr(self.model, 'cek_berkala'):
+            return
+        self.model.cek_berkala()
+        if self.model.versi == self.versi_model:
+            return
+        grid = self._muat_tabel()
+        with self.lock:
+            self.versi_model = self.model.versi
+            self.grid = grid
+            self.cache.clear()
+
+    def _indeks_tabel(self, X, grid):
+        # Indeks grid per baris, -1 jika baris di luar grid
+        n = len(X)
+        if grid is None:
+            return None, np.zeros(n, dtype=bool)
+
+        tabel, jadwal_awal, offset_awal, vektor_cuaca = grid
+        i = X[:, 0] - jadwal_awal
+        o = X[:, 1] - X[:, 0] - offset_awal
+        h = X[:, 2]
+        c = np.full(n, -1)
+        for k, vektor in enumerate(vektor_cuaca):
+            c[np.all(X[:, 5:8] == vektor, axis=1)] = k
+
+        bulat = (i == np.round(i)) & (o == np.round(o)) & (h == np.round(h))
+        di_grid = (bulat & (i >= 0) & (i < tabel.shape[0]) & (o >= 0) & (o < tabel.shape[1])
+                   & (h >= 0) & (h < 7) & (c >= 0)
+                   & (X[:, 3] == (h == 0)) & (X[:, 4] == (h == 4)))
+        indeks = np.zeros((n, 4), dtype=np.int64)
+        indeks[di_grid] = np.column_stack([i, o, h, c])[di_grid].astype(np.int64)
+        return indeks, di_grid
+
+    def predict(self, X, batch_size=None, verbose=0):
+        """Menghitung probabilitas (n, 1) dari fitur mentah"""
+        X = np.asarray(X, dtype=np.float64)
+        hasil = np.empty(len(X), dtype=np.float64)
+
+        self._cek_versi_model()
+        # Satu referensi grid untuk seluruh batch, meski tabel diganti di tengah jalan
+        grid = self.grid
+        indeks, di_grid = self._indeks_tabel(X, grid)
+        if di_grid.any():
+            i, o, h, c = indeks[di_grid].T
+            hasil[di_grid] = grid[0][i, o, h, c]
+
+        luar = np.flatnonzero(~di_grid)
+        kunci = [tuple(baris) for baris in X[luar]]
+        miss = {}
+        with self.lock:
+            self.lut_hits += int(di_grid.sum())
+            for posisi, k in zip(luar, kunci):
+                if k in self.cache:
+                    self.cache.move_to_end(k)
+                    hasil[posisi] = self.cache[k]
+                    self.cache_hits += 1
+                else:
+                    miss.setdefault(k, []).append(posisi)
+            self.misses += sum(len(p) for p in miss.values())
+
+        if miss:
+            fitur_miss = np.array(list(miss), dtype=np.float64)
+            probabilitas = prediksi_probabilitas(self.model, self.scaler, fitur_miss)
+            with self.lock:
+                for k, p, posisi in zip(miss, probabilitas, miss.values()):
+                    hasil[posisi] = p
+                    self.cache[k] = p
+                    self.cache.move_to_end(k)
+                while len(self.cache) > self.ukuran_cache:
+                    self.cache.popitem(last=False)
+
+        return hasil[:, None]
+
+    def stats(self):
+        """Counter hit/miss tabel dan cache"""
+        with self.lock:
+            total = self.lut_hits + self.cache_hits + self.misses
+            return {
+                'lut_aktif': self.tabel is not None,
+                'lut_hits': self.lut_hits,
+                'cache_hits': self.cache_hits,
+                'misses': self.misses,
+                'hit_rate': (self.lut_hits + self.cache_hits) / total if total else 0.0,
+                'cache_size': len(self.cache)
+            }
+
+# Membungkus model absensi dengan tabel dan cache
+def pasang_tabel(model, scaler, ukuran_cache=UKURAN_CACHE):
+    """
+    Returns:
+        tuple: (ModelTabelAbsensi, FoldedScaler), pengganti (model, scaler)
+    """
+    model_tabel = ModelTabelAbsensi(model, scaler, ukuran_cache=ukuran_cache)
+    return model_tabel, FoldedScaler(scaler.n_features_in_)
+
+if __name__ == "__main__":
+    # Membangun tabel: python absensi_lut.py --backend numpy
+    parser = argparse.ArgumentParser(description="Membangun lookup table prediksi absensi")
+    parser.add_argument('--backend', default='numpy', choices=BACKEND_MODEL)
+    parser.add_argument('--jadwal', nargs=2, type=int, default=[JADWAL_AWAL, JADWAL_AKHIR],
+                        metavar=('AWAL', 'AKHIR'), help="rentang jadwal (menit sejak tengah malam)")
+    parser.add_argument('--offset', nargs=2, type=int, default=[OFFSET_AWAL, OFFSET_AKHIR],
+                        metavar=('AWAL', 'AKHIR'), help="rentang selisih kedatangan (menit)")
+    parser.add_argument('--float16', action='store_true',
+                        help="simpan float16 (separuh ukuran, beberapa sel di sekitar 0.5 berganti label)")
+    args = parser.parse_args()
+
+    model, scaler, metadata = load_model(ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH,
+                                         backend=args.backend)
+    tabel, vektor_cuaca = bangun_tabel(model, scaler, metadata, tuple(args.jadwal), tuple(args.offset),
+                                       dtype=np.float16 if args.float16 else np.float32)
+    simpan_tabel(tabel, vektor_cuaca, tuple(args.jadwal), tuple(args.offset))
+    print(f"Tabel {tabel.shape} ({tabel.nbytes / 1e6:.1f} MB) disimpan di {ABSENSI_LUT_PATH}")
@@ -1,13 +1,17 @@
+import time
+
+# Awal script run ini; laporan startup hanya memakai nilai dari run pertama proses (waktu_mulai_proses)
+_T_RUN = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import tensorflow as tf
-from tensorflow.keras import models
-import joblib
-import json
 import datetime
-from pathlib import Path
 import os
+import threading
+
+import metrik
+
+# Modul berat (prediksi, tensorflow, joblib) dan model hanya diimpor/dimuat
+# saat halaman Absensi atau Stok pertama kali membutuhkannya
 
 # Set page config
 st.set_page_config(
@@ -17,175 +21,237 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Paths to model files
-ABSENSI_MODEL_PATH = Path('absensi/model/absensi_model.h5')
-ABSENSI_SCALER_PATH = Path('absensi/model/scaler.joblib')
-ABSENSI_METADATA_PATH = Path('absensi/model/model_metadata.json')
+# Backend inferensi: 'keras' (default) atau 'numpy' (tanpa TensorFlow saat prediksi)
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'keras')
 
-STOK_MODEL_PATH = Path('stok/model/stok_model.h5')
-STOK_SCALER_PATH = Path('stok/model/scaler.joblib')
-STOK_METADATA_PATH = Path('stok/model/model_metadata.json')
+# APP_WARMUP=1 memuat kedua model di thread latar belakang setelah render pertama
+APP_WARMUP = os.environ.get('APP_WARMUP', '0') == '1'
 
-# Function to load absensi model and related files
+# ABSENSI_LUT=1 menjawab prediksi absensi dari lookup table (absensi_lut.py) + LRU cache
+ABSENSI_LUT = os.environ.get('ABSENSI_LUT', '0') == '1'
+
+# MODEL_PRESISI=float16|int8 memakai bobot presisi rendah (kuantisasi.py) jika lolos batas flip rate
+MODEL_PRESISI = os.environ.get('MODEL_PRESISI')
+MODEL_BATAS_FLIP = float(os.environ.get('MODEL_BATAS_FLIP', '0.005'))
+
+# METRIK_FILE=<path> menulis metrik per tahap ke file secara berkala (.json atau teks Prometheus)
+METRIK_FILE = os.environ.get('METRIK_FILE')
+
+# Laporan waktu startup yang dibagi oleh semua sesi dalam satu proses
 @st.cache_resource
-def load_absensi_model():
-    model = models.load_model(ABSENSI_MODEL_PATH)
-    scaler = joblib.load(ABSENSI_SCALER_PATH)
-    
-    with open(ABSENSI_METADATA_PATH, 'r') as f:
-        metadata = json.load(f)
-        
+def startup_report():
+    return {}
+
+# Awal script run pertama dalam proses ini. Script dijalankan ulang setiap rerun,
+# sehingga _T_RUN sendiri berubah; nilai pertama disimpan sekali per proses
+@st.cache_resource
+def waktu_mulai_proses():
+    return _T_RUN
+
+waktu_mulai_proses()
+
+# Memuat model sambil mencatat waktu impor, load dan prediksi pertama
+def _load_model_dengan_laporan(nama, backend):
+    # Waktu impor mencakup prediksi (pandas, metrik) dan backend model
+    waktu = {}
+    mulai = time.perf_counter()
+    import numpy as np
+    import prediksi
+    waktu['import (s)'] = time.perf_counter() - mulai
+
+    paths = {
+        'absensi': (prediksi.ABSENSI_MODEL_PATH, prediksi.ABSENSI_SCALER_PATH, prediksi.ABSENSI_METADATA_PATH),
+        'stok': (prediksi.STOK_MODEL_PATH, prediksi.STOK_SCALER_PATH, prediksi.STOK_METADATA_PATH)
+    }[nama]
+
+    model, presisi = None, 'penuh'
+    if MODEL_PRESISI:
+        # Bobot presisi rendah dibaca langsung dari .h5 dengan NumPy; model presisi penuh
+        # di MODEL_BACKEND hanya dimuat jika kalibrasi menolaknya
+        from kuantisasi import muat_kuantisasi
+        mulai = time.perf_counter()
+        try:
+            model, scaler, metadata, laporan = muat_kuantisasi(nama, MODEL_PRESISI, MODEL_BATAS_FLIP)
+            presisi = f"{MODEL_PRESISI} (flip {laporan['flip_rate']:.2%})"
+            backend = 'numpy'
+        except ValueError as e:
+            # Ditolak oleh kalibrasi: tetap memakai model presisi penuh
+            presisi = f"penuh ({e})"
+        waktu['kalibrasi (s)'] = time.perf_counter() - mulai
+
+    if model is None:
+        mulai = time.perf_counter()
+        prediksi.import_backend(backend)
+        waktu['import (s)'] += time.perf_counter() - mulai
+        mulai = time.perf_counter()
+        model, scaler, metadata = prediksi.load_model(*paths, backend=backend)
+        waktu['load model (s)'] = time.perf_counter() - mulai
+
+    # Prediksi pertama (tracing graph TensorFlow) dilakukan di sini, bukan saat user klik
+    mulai = time.perf_counter()
+    prediksi.prediksi_probabilitas(model, scaler, np.zeros((1, len(metadata['features']))))
+    waktu['prediksi pertama (s)'] = time.perf_counter() - mulai
+
+    if nama == 'absensi' and ABSENSI_LUT:
+        from absensi_lut import pasang_tabel
+        model, scaler = pasang_tabel(model, scaler)
+
+    startup_report()[nama] = {
+        'backend': backend,
+        'presisi': presisi,
+        **{k: round(v, 3) for k, v in waktu.items()}
+    }
     return model, scaler, metadata
 
+# Function to load absensi model and related files
+@st.cache_resource
+def load_absensi_model(backend=MODEL_BACKEND):
+    return _load_model_dengan_laporan('absensi', backend)
+
 # Function to load stok model and related files
 @st.cache_resource
-def load_stok_model():
-    model = models.load_model(STOK_MODEL_PATH)
-    scaler = joblib.load(STOK_SCALER_PATH)
-    
-    with open(STOK_METADATA_PATH, 'r') as f:
-        metadata = json.load(f)
-        
-    return model, scaler, metadata
+def load_stok_model(backend=MODEL_BACKEND):
+    return _load_model_dengan_laporan('stok', backend)
 
-# Helper function for absensi prediction
-def prediksi_kehadiran(model, scaler, metadata, hari_string, jam_jadwal, kondisi_cuaca, jam_masuk=None):
-    """
-    Memprediksi kehadiran menggunakan data cuaca dari database
-
-    Args:
-        hari_string (str): Nama hari dalam bahasa Inggris (e.g., 'Monday', 'Tuesday', etc.)
-        jam_jadwal (str): Waktu jadwal dalam format "HH:MM"
-        kondisi_cuaca (str): Kondisi cuaca ('Clear', 'Clouds', 'Rain', 'Thunderstorm')
-        jam_masuk (str, optional): Waktu kedatangan dalam format "HH:MM". 
-                                 Jika None, akan menggunakan jam_jadwal untuk simulasi
-    """
-    # Konversi nama hari ke angka (0-6)
-    day_map = metadata['day_map']
-    hari = day_map.get(hari_string, 0)  # Default ke Senin jika tidak dikenal
-
-    # Konversi waktu jadwal dari string "HH:MM" ke menit
-    if ":" in jam_jadwal:
-        parts = jam_jadwal.split(":")
-        if len(parts) >= 2:
-            jam, menit = int(parts[0]), int(parts[1])
-            waktu_jadwal = jam * 60 + menit
-        else:
-            waktu_jadwal = 0
-    else:
-        waktu_jadwal = 0
-
-    # Konversi waktu kedatangan
-    if jam_masuk and ":" in jam_masuk:
-        parts = jam_masuk.split(":")
-        if len(parts) >= 2:
-            jam, menit = int(parts[0]), int(parts[1])
-            waktu_kedatangan = jam * 60 + menit
-        else:
-            waktu_kedatangan = waktu_jadwal
-    else:
-        # Jika tidak ada jam_masuk yang valid, gunakan jam_jadwal untuk simulasi
-        waktu_kedatangan = waktu_jadwal
-
-    # Menghitung selisih waktu (dalam menit)
-    selisih_waktu = waktu_kedatangan - waktu_jadwal
-
-    # Memetakan kondisi cuaca ke kategori yang digunakan saat training
-    weather_map = metadata['weather_map']
-    cuaca_vector = weather_map.get(kondisi_cuaca, [1, 0, 0])  # Default to Clear if unknown
-
-    # Menyiapkan fitur-fitur dalam urutan yang sama dengan training
-    fitur = [
-        waktu_jadwal,                    # scheduled_time
-        waktu_kedatangan,                # arrival_time 
-        hari,                            # day_of_week
-        1 if hari == 0 else 0,           # is_monday
-        1 if hari == 4 else 0,           # is_friday
-        cuaca_vector[0],                 # weather_0
-        cuaca_vector[1],                 # weather_1
-        cuaca_vector[2]                  # weather_2
-    ]
-
-    # Mengubah ke numpy array dan melakukan scaling
-    fitur_array = np.array([fitur])
-    fitur_scaled = scaler.transform(fitur_array)
-
-    # Mendapatkan probabilitas prediksi menggunakan model
-    prediksi = float(model.predict(fitur_scaled, verbose=0)[0][0])
-
-    # Menentukan toleransi berdasarkan cuaca
-    toleransi = metadata['tolerances'].get(kondisi_cuaca, 1)
-
-    # Menentukan keterlambatan berdasarkan selisih waktu dan toleransi
-    is_terlambat = selisih_waktu > toleransi  # Terlambat jika selisih waktu lebih dari toleransi
-
-    return {
-        'probabilitas_prediksi': prediksi,
-        'kondisi_cuaca': kondisi_cuaca,
-        'toleransi_menit': toleransi,
-        'kemungkinan_terlambat': is_terlambat,
-        'waktu_jadwal': jam_jadwal,
-        'waktu_kedatangan': jam_masuk if jam_masuk else f"{(waktu_kedatangan // 60):02d}:{(waktu_kedatangan % 60):02d}",
-        'selisih_menit': selisih_waktu
-    }
+# Store kolumnar riwayat stok (dibangun dari ledger CSV hanya jika belum ada)
+@st.cache_resource
+def load_stok_store():
+    from stok_store import StokStore
+
+    with metrik.ukur('load_stok_store'):
+        return StokStore.buka()
+
+# Riwayat masuk/keluar per item untuk moving average 3 periode, diisi sekali dari store
+@st.cache_resource
+def load_riwayat_stok():
+    store = load_stok_store()
+    with metrik.ukur('load_riwayat_stok'):
+        return store.riwayat()
+
+# Agregat absensi per karyawan, dibangun sekali dari log lalu diperbarui per check-in baru (dibagi semua sesi)
+@st.cache_resource
+def load_analitik_absensi():
+    from absensi_analitik import AnalitikAbsensi
+
+    with metrik.ukur('load_analitik_absensi'):
+        return AnalitikAbsensi.from_csv()
+
+# Kunci cache hasil untuk model yang sedang dipakai (model sendiri tidak di-hash)
+def _kunci_model(model):
+    return f"{MODEL_BACKEND}/{MODEL_PRESISI or 'penuh'}/{getattr(model, 'versi', '')}/{id(model)}"
+
+# Hasil prediksi per sesi, dikunci pada input: submit ulang dengan input yang sama tidak menghitung ulang.
+# Parameter berawalan _ (model, scaler, metadata, riwayat) tidak ikut di-hash oleh st.cache_data
+@st.cache_data(scope='session', max_entries=64, show_spinner=False)
+def cache_prediksi_kehadiran(_model, _scaler, _metadata, kunci_model, hari, jam_jadwal, cuaca, jam_masuk):
+    from prediksi import prediksi_kehadiran
 
-# Helper function for stok prediction
-def prediksi_stok(model, scaler, metadata, nama_barang, stok_awal, masuk, keluar, satuan, bulan):
+    return prediksi_kehadiran(_model, _scaler, _metadata, hari_string=hari, jam_jadwal=jam_jadwal,
+                              kondisi_cuaca=cuaca, jam_masuk=jam_masuk)
+
+@st.cache_data(scope='session', max_entries=8, show_spinner=False)
+def cache_prediksi_kehadiran_batch(_model, _scaler, _metadata, kunci_model, isi_csv):
     """
-    Memprediksi risiko kehabisan stok untuk suatu barang
-    
-    Args:
-        nama_barang (str): Nama barang yang akan diprediksi
-        stok_awal (int): Jumlah stok awal
-        masuk (int): Jumlah barang masuk
-        keluar (int): Jumlah barang keluar
-        satuan (str): Satuan barang (Ekor/Sachet/Kg/dll)
-        bulan (int): Bulan (1-12)
+    Returns:
+        tuple: (kolom wajib yang tidak ada, DataFrame hasil atau None)
     """
-    # Clean up satuan input
-    satuan = satuan.strip().capitalize()
-    
-    # Prepare features
-    features = [
-        stok_awal,
-        masuk,
-        keluar,
-        masuk - keluar,  # stock_movement
-        keluar,  # keluar_ma3 (simplifikasi, seharusnya rata-rata 3 bulan terakhir)
-        masuk,   # masuk_ma3 (simplifikasi, seharusnya rata-rata 3 bulan terakhir)
-        keluar / stok_awal if stok_awal > 0 else 1.0,  # depletion_rate (set to 1.0 if no stock)
-        bulan
-    ]
-    
-    # Scale features
-    features_scaled = scaler.transform([features])
-    
-    # Make prediction
-    prediction = float(model.predict(features_scaled, verbose=0)[0][0])
-    
-    # Calculate estimated days until depletion
-    if keluar > 0:
-        days_until_depletion = max(1, int(np.ceil(stok_awal / keluar)))
-    else:
-        days_until_depletion = float('inf')
-    
-    # Adjusted thresholds based on domain knowledge
-    if stok_awal == 0 or prediction > 0.7:
-        status = "Berisiko"
-    elif prediction > 0.4 or (days_until_depletion != float('inf') and days_until_depletion < 14):
-        status = "Stabil"
-    else:
-        status = "Aman"
-    
-    # Format output
-    return {
-        'nama_barang': nama_barang,
-        'stok_tersedia': int(stok_awal),
-        'satuan': satuan,
-        'estimasi_habis': f"{days_until_depletion} Hari" if days_until_depletion != float('inf') else "Stabil",
-        'probabilitas': prediction,
-        'status': status
-    }
+    import io
+
+    import pandas as pd
+    from prediksi import prediksi_kehadiran_batch
+
+    data_absensi = pd.read_csv(io.BytesIO(isi_csv), dtype={'jam_masuk': str, 'jam_jadwal': str})
+    kolom_kurang = sorted({'hari', 'jam_jadwal', 'cuaca'} - set(data_absensi.columns))
+    if kolom_kurang:
+        return kolom_kurang, None
+
+    hasil_batch = prediksi_kehadiran_batch(_model, _scaler, _metadata, data_absensi)
+    return [], pd.concat([data_absensi.drop(columns=hasil_batch.columns, errors='ignore'), hasil_batch], axis=1)
+
+@st.cache_data(scope='session', max_entries=64, show_spinner=False)
+def cache_prediksi_stok(_model, _scaler, _metadata, _riwayat, kunci_model, nama_barang, stok_awal, masuk, keluar,
+                        satuan, bulan):
+    from prediksi import prediksi_stok
+
+    return prediksi_stok(_model, _scaler, _metadata, nama_barang=nama_barang, stok_awal=stok_awal, masuk=masuk,
+                         keluar=keluar, satuan=satuan, bulan=bulan, riwayat=_riwayat)
+
+# baris_store (jumlah baris ledger) membuat cache tidak berlaku lagi setelah store ditambah
+@st.cache_data(scope='session', max_entries=4, show_spinner=False)
+def cache_tabel_whatif(_model, _scaler, _metadata, _riwayat, kunci_model, baris_store, dengan_masuk):
+    from stok_whatif import periode_berikutnya, tabel_whatif
+
+    return tabel_whatif(_model, _scaler, _metadata, periode_berikutnya(load_stok_store()), _riwayat,
+                        dengan_masuk=dengan_masuk)
+
+@st.cache_data(scope='session', max_entries=4, show_spinner=False)
+def cache_proyeksi_stok(_model, _scaler, _metadata, _riwayat, kunci_model, baris_store, horizon):
+    from stok_proyeksi import proyeksi_stok
+    from stok_whatif import periode_berikutnya
+
+    return proyeksi_stok(_model, _scaler, _metadata, periode_berikutnya(load_stok_store()), _riwayat, horizon)
+
+# Tabel skor ledger tersimpan di disk: hanya baris yang berubah sejak run/proses sebelumnya yang dinilai ulang
+@st.cache_data(scope='session', max_entries=2, show_spinner=False)
+def cache_dashboard_stok(_model, _scaler, _metadata, kunci_model, baris_store, versi_store):
+    from stok_skor import TabelSkor, dashboard, versi_model_default
+
+    ledger = load_stok_store().ke_frame()
+    # Versi model tidak memakai id(model), supaya tabel tetap berlaku setelah aplikasi dijalankan ulang
+    versi_model = f"{versi_model_default()}/{MODEL_BACKEND}/{getattr(_model, 'presisi', 'penuh')}"
+    with metrik.ukur('stok_skor.perbarui'):
+        skor, statistik = TabelSkor().perbarui(_model, _scaler, _metadata, ledger, versi_model=versi_model)
+    metrik.tambah('stok_skor.dihitung', statistik['dihitung'])
+    metrik.tambah('stok_skor.dipakai_ulang', statistik['dipakai_ulang'])
+    return (*dashboard(ledger, skor), statistik)
+
+# Ekspor metrik ke file, hanya sekali per proses
+@st.cache_resource
+def start_ekspor_metrik(path):
+    return metrik.mulai_ekspor(path)
+
+# Warm-up model di latar belakang, hanya sekali per proses
+@st.cache_resource
+def start_warmup():
+    def warmup():
+        load_absensi_model()
+        load_stok_model()
+        load_riwayat_stok()
+
+    thread = threading.Thread(target=warmup, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# Menampilkan laporan waktu startup di sidebar
+def show_startup_report():
+    laporan = startup_report()
+    with st.sidebar.expander("⏱️ Waktu Startup"):
+        st.text(f"Impor app + render pertama: {laporan.get('render pertama (s)', '-')} s")
+        for nama in ('absensi', 'stok'):
+            if nama in laporan:
+                st.markdown(f"**Model {nama}** ({laporan[nama]['backend']})")
+                st.text("\n".join(f"{k}: {v}" for k, v in laporan[nama].items() if k != 'backend'))
+            else:
+                st.text(f"Model {nama}: belum dimuat")
+
+# Panel debug: ringkasan dan histogram latensi per tahap
+def show_metrik():
+    if not metrik.REGISTRI.aktif or not st.sidebar.checkbox("📈 Tampilkan metrik performa"):
+        return
+
+    ringkasan = metrik.ringkasan()
+    with st.sidebar.expander("Metrik Performa", expanded=True):
+        if not ringkasan:
+            st.text("Belum ada tahap yang tercatat")
+            return
+
+        st.dataframe([{'tahap': nama, **nilai} for nama, nilai in ringkasan.items()], use_container_width=True)
+        st.caption(" · ".join(f"{nama}: {n}" for nama, n in sorted(metrik.salinan_counter().items())))
+        tahap = st.selectbox("Histogram tahap", list(ringkasan))
+        st.caption(f"{min(ringkasan[tahap]['count'], metrik.UKURAN_SAMPEL)} sampel terakhir")
+        st.bar_chart(metrik.histogram(tahap))
+        st.download_button("Download (Prometheus)", metrik.ke_prometheus().encode('utf-8'),
+                           file_name="metrik.prom", mime="text/plain")
 
 # Fungsi untuk halaman About
 def show_about():
@@ -243,6 +309,7 @@ def show_about():
        - Bulan (periode) yang relevan
        - Pergerakan stok (masuk - keluar)
        - Tingkat penipisan (depletion rate)
+       - Rata-rata barang masuk/keluar 3 periode terakhir per barang
     
     2. **Kriteria Status:**
        - **Berisiko** 🚨: 
@@ -284,103 +351,248 @@ def show_absensi():
         with st.spinner('Memuat model dan data pendukung...'):
             model, scaler, metadata = load_absensi_model()
         
-        # Input fields
-        col1, col2 = st.columns(2)
+        # Input dalam form: perubahan input tidak menjalankan ulang script sampai tombol ditekan
+        with st.form("form_absensi"):
+            # Input fields
+            col1, col2 = st.columns(2)
         
-        with col1:
-            st.subheader("Data Karyawan")
-            nama_karyawan = st.text_input("Nama Karyawan", "Karyawan A")
+            with col1:
+                st.subheader("Data Karyawan")
+                nama_karyawan = st.text_input("Nama Karyawan", "Karyawan A")
             
-            hari_options = list(metadata['day_map'].keys())
-            hari = st.selectbox("Hari", hari_options, index=0)
+                hari_options = list(metadata['day_map'].keys())
+                hari = st.selectbox("Hari", hari_options, index=0)
             
-            jam_jadwal = st.time_input("Jadwal Masuk", datetime.time(9, 0))
-            jam_jadwal_str = jam_jadwal.strftime("%H:%M")
+                jam_jadwal = st.time_input("Jadwal Masuk", datetime.time(9, 0))
+                jam_jadwal_str = jam_jadwal.strftime("%H:%M")
             
-            # Menggunakan text_input untuk waktu kedatangan agar lebih presisi
-            jam_masuk_str = st.text_input("Waktu Kedatangan (HH:MM)", "09:00")
+                # Menggunakan text_input untuk waktu kedatangan agar lebih presisi
+                jam_masuk_str = st.text_input("Waktu Kedatangan (HH:MM)", "09:00")
             
-            # Validasi format waktu
-            try:
-                datetime.datetime.strptime(jam_masuk_str, "%H:%M")
-                waktu_valid = True
-            except ValueError:
-                st.error("Format waktu harus HH:MM (contoh: 09:05)")
-                waktu_valid = False
+                # Validasi format waktu
+                try:
+                    datetime.datetime.strptime(jam_masuk_str, "%H:%M")
+                    waktu_valid = True
+                except ValueError:
+                    st.error("Format waktu harus HH:MM (contoh: 09:05)")
+                    waktu_valid = False
         
-        with col2:
-            st.subheader("Kondisi Cuaca")
-            cuaca_options = list(metadata['weather_map'].keys())
-            cuaca = st.selectbox("Kondisi Cuaca", cuaca_options, index=0)
+            with col2:
+                st.subheader("Kondisi Cuaca")
+                cuaca_options = list(metadata['weather_map'].keys())
+                cuaca = st.selectbox("Kondisi Cuaca", cuaca_options, index=0)
             
-            # Display weather tolerance
-            toleransi = metadata['tolerances'].get(cuaca, 1)
-            st.info(f"Toleransi keterlambatan untuk cuaca {cuaca}: {toleransi} menit")
+                # Display weather tolerance
+                toleransi = metadata['tolerances'].get(cuaca, 1)
+                st.info(f"Toleransi keterlambatan untuk cuaca {cuaca}: {toleransi} menit")
             
-            # Calculate time difference
-            try:
-                jam_jadwal_dt = datetime.datetime.strptime(jam_jadwal_str, "%H:%M")
-                jam_masuk_dt = datetime.datetime.strptime(jam_masuk_str, "%H:%M")
-                selisih = (jam_masuk_dt - jam_jadwal_dt).total_seconds() / 60
-                
-                st.metric("Selisih Waktu", f"{int(selisih)} menit", 
-                         delta=f"{int(selisih)}" if selisih != 0 else "0",
-                         delta_color="inverse")
-            except ValueError:
-                # Jika format waktu tidak valid, tampilkan pesan error dan set selisih ke 0
-                st.metric("Selisih Waktu", "Error format waktu", delta="0", delta_color="inverse")
-        
-        # Add prediction button
-        if st.button("Prediksi Keterlambatan"):
-            # Periksa validitas format waktu sebelum memprediksi
-            try:
-                datetime.datetime.strptime(jam_masuk_str, "%H:%M")
-                with st.spinner('Memproses...'):
-                    hasil_prediksi = prediksi_kehadiran(
-                        model, scaler, metadata,
-                        hari_string=hari,
-                        jam_jadwal=jam_jadwal_str,
-                        kondisi_cuaca=cuaca,
-                        jam_masuk=jam_masuk_str
-                    )
+                # Calculate time difference
+                try:
+                    jam_jadwal_dt = datetime.datetime.strptime(jam_jadwal_str, "%H:%M")
+                    jam_masuk_dt = datetime.datetime.strptime(jam_masuk_str, "%H:%M")
+                    selisih = (jam_masuk_dt - jam_jadwal_dt).total_seconds() / 60
                 
-                # Display results
-                st.subheader("Hasil Prediksi")
-                
-                # Create three columns for the result
-                col1, col2, col3 = st.columns([1, 1, 1])
+                    st.metric("Selisih Waktu", f"{int(selisih)} menit", 
+                             delta=f"{int(selisih)}" if selisih != 0 else "0",
+                             delta_color="inverse")
+                except ValueError:
+                    # Jika format waktu tidak valid, tampilkan pesan error dan set selisih ke 0
+                    st.metric("Selisih Waktu", "Error format waktu", delta="0", delta_color="inverse")
+
+            submit = st.form_submit_button("Prediksi Keterlambatan")
+
+        # Input yang di-submit disimpan, sehingga hasil tetap tampil saat bagian lain halaman berubah
+        if submit:
+            if waktu_valid:
+                st.session_state.input_absensi = (hari, jam_jadwal_str, cuaca, jam_masuk_str)
+            else:
+                st.error("Format waktu kedatangan tidak valid. Gunakan format HH:MM (contoh: 09:05)")
+
+        if 'input_absensi' in st.session_state:
+            with st.spinner('Memproses...'):
+                hasil_prediksi = cache_prediksi_kehadiran(model, scaler, metadata, _kunci_model(model),
+                                                          *st.session_state.input_absensi)
+
+            # Display results
+            st.subheader("Hasil Prediksi")
+            
+            # Create three columns for the result
+            col1, col2, col3 = st.columns([1, 1, 1])
+            
+            # Display status with color
+            with col1:
+                status = "TERLAMBAT" if hasil_prediksi['kemungkinan_terlambat'] else "TEPAT WAKTU"
+                status_color = "red" if hasil_prediksi['kemungkinan_terlambat'] else "green"
+                st.markdown(f"<h1 style='text-align: center; color: {status_color};'>{status}</h1>", unsafe_allow_html=True)
                 
-                # Display status with color
-                with col1:
-                    status = "TERLAMBAT" if hasil_prediksi['kemungkinan_terlambat'] else "TEPAT WAKTU"
-                    status_color = "red" if hasil_prediksi['kemungkinan_terlambat'] else "green"
-                    st.markdown(f"<h1 style='text-align: center; color: {status_color};'>{status}</h1>", unsafe_allow_html=True)
-                    
-                    # Display confidence percentage
-                    confidence = hasil_prediksi['probabilitas_prediksi'] * 100
-                    st.progress(min(confidence, 100) / 100)
-                    st.text(f"Confidence: {confidence:.1f}%")
+                # Display confidence percentage
+                confidence = hasil_prediksi['probabilitas_prediksi'] * 100
+                st.progress(min(confidence, 100) / 100)
+                st.text(f"Confidence: {confidence:.1f}%")
+            
+            # Weather info
+            with col2:
+                st.markdown("### Detail Cuaca")
+                st.markdown(f"**Kondisi:** {hasil_prediksi['kondisi_cuaca']}")
+                st.markdown(f"**Toleransi:** {hasil_prediksi['toleransi_menit']} menit")
                 
-                # Weather info
-                with col2:
-                    st.markdown("### Detail Cuaca")
-                    st.markdown(f"**Kondisi:** {hasil_prediksi['kondisi_cuaca']}")
-                    st.markdown(f"**Toleransi:** {hasil_prediksi['toleransi_menit']} menit")
-                    
-                # Time details
-                with col3:
-                    st.markdown("### Detail Waktu")
-                    st.markdown(f"**Jadwal Masuk:** {hasil_prediksi['waktu_jadwal']}")
-                    st.markdown(f"**Waktu Kedatangan:** {hasil_prediksi['waktu_kedatangan']}")
-                    st.markdown(f"**Selisih:** {hasil_prediksi['selisih_menit']} menit")
-                    
-            except ValueError:
-                st.error("Format waktu kedatangan tidak valid. Gunakan format HH:MM (contoh: 09:05)")
+            # Time details
+            with col3:
+                st.markdown("### Detail Waktu")
+                st.markdown(f"**Jadwal Masuk:** {hasil_prediksi['waktu_jadwal']}")
+                st.markdown(f"**Waktu Kedatangan:** {hasil_prediksi['waktu_kedatangan']}")
+                st.markdown(f"**Selisih:** {hasil_prediksi['selisih_menit']} menit")
+
+        # Statistik lookup table dan cache (jika ABSENSI_LUT=1)
+        if hasattr(model, 'stats'):
+            with st.expander("Statistik Lookup Table & Cache"):
+                st.json(model.stats())
+
+        # Prediksi batch dari file CSV (roster harian atau log absensi)
+        st.markdown("---")
+        st.subheader("Prediksi Batch (CSV)")
+        st.caption("Kolom wajib: hari, jam_jadwal, cuaca. Kolom jam_masuk opsional (format HH:MM).")
+
+        file_csv = st.file_uploader("Upload file absensi", type="csv")
+        if file_csv is not None:
+            # Dikunci pada isi file: upload ulang file yang sama atau interaksi lain tidak memproses ulang
+            with st.spinner('Memproses file...'):
+                kolom_kurang, hasil_batch = cache_prediksi_kehadiran_batch(model, scaler, metadata,
+                                                                           _kunci_model(model), file_csv.getvalue())
+
+            if kolom_kurang:
+                st.error(f"Kolom tidak ditemukan: {', '.join(kolom_kurang)}")
+            else:
+                jumlah_terlambat = int(hasil_batch['kemungkinan_terlambat'].sum())
+                col1, col2 = st.columns(2)
+                col1.metric("✅ Tepat Waktu", len(hasil_batch) - jumlah_terlambat)
+                col2.metric("⚠️ Terlambat", jumlah_terlambat)
+
+                st.dataframe(hasil_batch, use_container_width=True)
+                st.download_button(
+                    "Download Hasil Prediksi",
+                    hasil_batch.to_csv(index=False).encode('utf-8'),
+                    file_name="hasil_prediksi_absensi.csv",
+                    mime="text/csv"
+                )
+
+        show_analitik_absensi(metadata)
 
     except Exception as e:
         st.error(f"Terjadi kesalahan saat memuat model: {str(e)}")
         st.error("Pastikan lokasi file model benar dan model tersedia.")
 
+# Grafik tingkat keterlambatan per kategori (hari / cuaca), urutan kategori mengikuti data
+SPEC_GRAFIK_TERLAMBAT = {
+    'mark': 'bar',
+    'encoding': {
+        'x': {'field': 'kategori', 'type': 'nominal', 'sort': None, 'title': None},
+        'y': {'field': 'tingkat_terlambat', 'type': 'quantitative', 'title': 'Tingkat terlambat',
+              'axis': {'format': '%'}}
+    }
+}
+
+# Dashboard keterlambatan per karyawan dan seluruh tim (fragment, seperti show_whatif_stok)
+@st.fragment
+def show_analitik_absensi(metadata):
+    analitik = load_analitik_absensi()
+
+    st.markdown("---")
+    st.subheader("Analitik Keterlambatan Karyawan")
+
+    tim = analitik.tim()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("👥 Karyawan", tim['karyawan'])
+    col2.metric("⏰ Tingkat Terlambat", f"{tim['tingkat_terlambat']:.1%}")
+    col3.metric("✅ Tepat Waktu 30 Hari", f"{tim['tepat_waktu_30h']:.1%}" if tim['hadir_30h'] else "-")
+    col4.metric("✅ Tepat Waktu 90 Hari", f"{tim['tepat_waktu_90h']:.1%}" if tim['hadir_90h'] else "-")
+    st.caption(f"{tim['hadir']} check-in. Jendela 30/90 hari berakhir pada check-in terbaru "
+               f"({analitik.tanggal_terakhir()}).")
+
+    ringkasan = analitik.ringkasan().sort_values('tingkat_terlambat', ascending=False)
+    st.dataframe(
+        ringkasan.drop(columns='id_karyawan').rename(columns={
+            'nama_karyawan': 'Nama Karyawan', 'hadir': 'Check-in', 'terlambat': 'Terlambat',
+            'tingkat_terlambat': 'Tingkat Terlambat', 'hadir_30h': 'Check-in 30 Hari',
+            'tepat_waktu_30h': 'Tepat Waktu 30 Hari', 'hadir_90h': 'Check-in 90 Hari',
+            'tepat_waktu_90h': 'Tepat Waktu 90 Hari'
+        }).style.format({'Tingkat Terlambat': '{:.1%}', 'Tepat Waktu 30 Hari': '{:.1%}',
+                         'Tepat Waktu 90 Hari': '{:.1%}'}, na_rep='-'),
+        use_container_width=True, hide_index=True
+    )
+
+    pilihan = dict(zip(ringkasan['nama_karyawan'], ringkasan['id_karyawan']))
+    nama = st.selectbox("Rincian per hari dan cuaca", ["Seluruh tim", *sorted(pilihan)])
+    id_karyawan = pilihan.get(nama)
+    col1, col2 = st.columns(2)
+    for kolom, judul, rincian in ((col1, "Per Hari", analitik.per_hari(id_karyawan)),
+                                  (col2, "Per Cuaca", analitik.per_cuaca(id_karyawan))):
+        with kolom:
+            st.markdown(f"**{judul}**")
+            st.vega_lite_chart(rincian.rename_axis('kategori').reset_index(), SPEC_GRAFIK_TERLAMBAT,
+                               use_container_width=True)
+
+    # Check-in baru langsung masuk ke agregat (O(1)), tanpa membaca ulang log
+    with st.expander("Catat Check-in Baru"):
+        with st.form("form_checkin"):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.number_input("ID Karyawan", min_value=1, value=1, step=1, key='checkin_id')
+                st.text_input("Nama Karyawan", "", key='checkin_nama')
+                default, batas = _rentang_tanggal_checkin(analitik)
+                st.date_input("Tanggal", default, max_value=batas, key='checkin_tanggal')
+            with col2:
+                st.time_input("Jadwal Masuk", datetime.time(8, 0), key='checkin_jadwal')
+                st.text_input("Waktu Kedatangan (HH:MM)", "08:00", key='checkin_masuk')
+                st.selectbox("Kondisi Cuaca", list(analitik.cuaca), key='checkin_cuaca')
+            st.form_submit_button("Catat", on_click=_catat_checkin, args=(metadata,))
+
+        if 'pesan_checkin' in st.session_state:
+            berhasil, pesan = st.session_state.pop('pesan_checkin')
+            (st.success if berhasil else st.error)(pesan)
+
+# Tanggal default dan paling lambat untuk form check-in
+def _rentang_tanggal_checkin(analitik):
+    """
+    Jendela rolling berakhir pada check-in terbaru, jadi tanggal yang jauh di depan data
+    akan menggeser jendela 30/90 hari seluruh tim. Form hanya menerima sampai satu hari
+    setelah check-in terbaru dan tidak melewati hari ini.
+
+    Returns:
+        tuple: (tanggal default (check-in terbaru), tanggal paling lambat) sebagai datetime.date
+    """
+    hari_ini = datetime.date.today()
+    terakhir = analitik.tanggal_terakhir()
+    if terakhir is None:
+        return hari_ini, hari_ini
+    batas = min(terakhir.astype(datetime.date) + datetime.timedelta(days=1), hari_ini)
+    return min(terakhir.astype(datetime.date), batas), batas
+
+# Callback form check-in: dijalankan sebelum fragment digambar ulang, sehingga metrik di atas sudah memuat check-in baru
+def _catat_checkin(metadata):
+    import numpy as np
+    from prediksi import ALIAS_CUACA, parse_menit
+
+    state = st.session_state
+    analitik = load_analitik_absensi()
+    _, batas = _rentang_tanggal_checkin(analitik)
+    if state.checkin_tanggal > batas:
+        state.pesan_checkin = (False, f"Tanggal paling lambat {batas} (satu hari setelah check-in terbaru "
+                                      f"dan tidak melewati hari ini)")
+        return
+
+    selisih = (parse_menit([state.checkin_masuk]) - parse_menit([state.checkin_jadwal.strftime("%H:%M")]))[0]
+    if np.isnan(selisih):
+        state.pesan_checkin = (False, "Format waktu harus HH:MM (contoh: 09:05)")
+        return
+
+    # Aturan yang sama dengan prediksi_kehadiran: terlambat jika selisih melebihi toleransi cuaca
+    cuaca = state.checkin_cuaca
+    terlambat = bool(selisih > metadata['tolerances'].get(ALIAS_CUACA.get(cuaca, cuaca), 1))
+    analitik.catat(int(state.checkin_id), state.checkin_tanggal, terlambat, cuaca,
+                   nama=state.checkin_nama or None)
+    state.pesan_checkin = (True, f"Check-in dicatat ({'terlambat' if terlambat else 'tepat waktu'}).")
+
 # Fungsi untuk halaman Stok
 def show_stok():
     st.title("📦 Prediksi Stok Bahan")
@@ -389,35 +601,37 @@ def show_stok():
         # Load model and dependencies
         with st.spinner('Memuat model dan data pendukung...'):
             model, scaler, metadata = load_stok_model()
+            riwayat = load_riwayat_stok()
         
-        # Input fields
+        show_dashboard_stok(model, scaler, metadata)
+
+        # Input fields (dalam form, script baru berjalan saat tombol ditekan)
         st.subheader("Data Stok")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            nama_barang = st.text_input("Nama Barang", "Ikan Nila")
-            stok_awal = st.number_input("Stok Awal", min_value=0, value=100)
-            masuk = st.number_input("Barang Masuk", min_value=0, value=50)
-            
-        with col2:
-            keluar = st.number_input("Barang Keluar", min_value=0, value=30)
-            satuan = st.text_input("Satuan", "Ekor")
-            bulan = st.slider("Bulan", min_value=1, max_value=12, value=datetime.datetime.now().month)
-        
-        # Add prediction button
-        if st.button("Prediksi Status Stok"):
+
+        with st.form("form_stok"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                nama_barang = st.text_input("Nama Barang", "Ikan Nila")
+                stok_awal = st.number_input("Stok Awal", min_value=0, value=100)
+                masuk = st.number_input("Barang Masuk", min_value=0, value=50)
+
+            with col2:
+                keluar = st.number_input("Barang Keluar", min_value=0, value=30)
+                satuan = st.text_input("Satuan", "Ekor")
+                bulan = st.slider("Bulan", min_value=1, max_value=12, value=datetime.datetime.now().month)
+
+            submit = st.form_submit_button("Prediksi Status Stok")
+
+        if submit:
+            st.session_state.input_stok = (nama_barang, stok_awal, masuk, keluar, satuan, bulan)
+
+        if 'input_stok' in st.session_state:
+            nama_barang, stok_awal, masuk, keluar, satuan, bulan = st.session_state.input_stok
             with st.spinner('Memproses...'):
-                hasil_prediksi = prediksi_stok(
-                    model, scaler, metadata,
-                    nama_barang=nama_barang,
-                    stok_awal=stok_awal,
-                    masuk=masuk,
-                    keluar=keluar,
-                    satuan=satuan,
-                    bulan=bulan
-                )
-            
+                hasil_prediksi = cache_prediksi_stok(model, scaler, metadata, riwayat, _kunci_model(model),
+                                                     *st.session_state.input_stok)
+
             # Display results
             st.subheader("Hasil Prediksi")
             
@@ -458,39 +672,179 @@ def show_stok():
                 st.markdown(f"**Estimasi Habis:** {hasil_prediksi['estimasi_habis']}")
                 st.markdown(f"**Pergerakan:** +{masuk} / -{keluar} {hasil_prediksi['satuan']}")
                 st.markdown(f"**Sisa Akhir:** {stok_awal + masuk - keluar} {hasil_prediksi['satuan']}")
-    
+                st.caption(f"Moving average memakai {riwayat.jumlah_periode(nama_barang)} periode riwayat "
+                           f"{nama_barang} ditambah input bulan ini")
+
+            # Periode terakhir barang ini, diambil dari store tanpa membaca ulang CSV
+            store = load_stok_store()
+            if nama_barang in store.items:
+                with st.expander(f"Riwayat {nama_barang} (6 periode terakhir)"):
+                    st.dataframe(store.terakhir(nama_barang, 6, kolom=['tanggal', 'stok_awal', 'masuk', 'keluar',
+                                                                        'stok_akhir']).drop(columns='urutan'),
+                                 use_container_width=True)
+
+        show_whatif_stok(model, scaler, metadata, riwayat)
+        show_proyeksi_stok(model, scaler, metadata, riwayat)
+
     except Exception as e:
         st.error(f"Terjadi kesalahan saat memuat model: {str(e)}")
         st.error("Pastikan lokasi file model benar dan model tersedia.")
 
+# Warna sel status pada tabel dashboard
+WARNA_STATUS = {"Aman": "#d4edda", "Stabil": "#fff3cd", "Berisiko": "#f8d7da"}
+
+def _warna_status(nilai):
+    return f"background-color: {WARNA_STATUS[nilai]}" if nilai in WARNA_STATUS else ""
+
+# Status risiko terkini semua barang di ledger (fragment, seperti show_whatif_stok)
+@st.fragment
+def show_dashboard_stok(model, scaler, metadata):
+    st.subheader("Status Risiko Semua Barang")
+
+    store = load_stok_store()
+    with st.spinner('Menilai ledger...'):
+        terkini, per_bulan, statistik = cache_dashboard_stok(model, scaler, metadata, _kunci_model(model),
+                                                             len(store), store.meta['versi'])
+
+    jumlah = terkini['status'].value_counts()
+    for kolom, (status, emoji) in zip(st.columns(3), (("Berisiko", "🚨"), ("Stabil", "⚠️"), ("Aman", "✅"))):
+        kolom.metric(f"{emoji} {status}", int(jumlah.get(status, 0)))
+
+    # hari_habis -1 (tidak ada barang keluar) ditampilkan kosong
+    terkini = terkini.assign(hari_habis=terkini['hari_habis'].where(terkini['hari_habis'] >= 0).astype('Int64'))
+    st.dataframe(
+        terkini[['nama_barang', 'tanggal', 'stok_akhir', 'satuan', 'status', 'probabilitas', 'hari_habis']].rename(
+            columns={'nama_barang': 'Nama Barang', 'tanggal': 'Periode Terakhir', 'stok_akhir': 'Stok Akhir',
+                     'satuan': 'Satuan', 'status': 'Status', 'probabilitas': 'Probabilitas',
+                     'hari_habis': 'Estimasi Habis (Hari)'}
+        ).style.map(_warna_status, subset=['Status']).format({'Probabilitas': '{:.2f}'}),
+        use_container_width=True, hide_index=True
+    )
+    with st.expander("Status per bulan (periode terakhir setiap bulan)"):
+        st.dataframe(per_bulan.style.map(_warna_status), use_container_width=True)
+    st.caption(f"{statistik['baris']} baris ledger: {statistik['dihitung']} dinilai ulang, "
+               f"{statistik['dipakai_ulang']} diambil dari tabel skor tersimpan ({statistik['detik'] * 1000:.0f} ms).")
+    st.markdown("---")
+
+# Ambang keluar/masuk semua barang untuk bulan setelah periode terakhir di ledger.
+# Fragment: submit form di bagian ini hanya menjalankan ulang bagian ini, bukan seluruh halaman
+@st.fragment
+def show_whatif_stok(model, scaler, metadata, riwayat):
+    st.markdown("---")
+    st.subheader("Analisis What-If Semua Barang")
+    st.caption("Berapa banyak barang boleh keluar bulan depan sebelum status berubah dari Aman ke Stabil atau "
+               "Berisiko. Stok awal = stok akhir periode terakhir; masuk/keluar lain memakai nilai periode terakhir.")
+
+    with st.form("form_whatif"):
+        dengan_masuk = st.checkbox("Cari juga minimum barang masuk", value=False)
+        if st.form_submit_button("Hitung Ambang Semua Barang"):
+            st.session_state.whatif_masuk = dengan_masuk
+
+    if 'whatif_masuk' not in st.session_state:
+        return
+
+    with st.spinner('Menghitung ambang...'):
+        tabel = cache_tabel_whatif(model, scaler, metadata, riwayat, _kunci_model(model), len(load_stok_store()),
+                                   st.session_state.whatif_masuk)
+    st.dataframe(
+        tabel.drop(columns='probabilitas').rename(columns={
+            'nama_barang': 'Nama Barang', 'satuan': 'Satuan', 'stok_awal': 'Stok Awal', 'masuk': 'Masuk',
+            'keluar': 'Keluar', 'bulan': 'Bulan', 'status': 'Status',
+            'keluar_maks_aman': 'Keluar Maks (Aman)', 'keluar_maks_stabil': 'Keluar Maks (Belum Berisiko)',
+            'masuk_min_stabil': 'Masuk Min (Tidak Berisiko)', 'masuk_min_aman': 'Masuk Min (Aman)'
+        }),
+        use_container_width=True, hide_index=True
+    )
+    st.caption("Kosong: status sudah berubah pada nilai 0 (keluar) atau tidak tercapai (masuk), misalnya "
+               "karena estimasi habis < 14 hari hanya bergantung pada stok awal dan keluar.")
+
+# Spesifikasi Vega-Lite konstan; st.line_chart menyusun dan memvalidasi spesifikasi Altair di setiap run (~0.3 s)
+SPEC_GRAFIK_PROYEKSI = {
+    'mark': {'type': 'line', 'point': True},
+    'encoding': {
+        'x': {'field': 'bulan_ke', 'type': 'quantitative', 'title': 'Bulan ke'},
+        'y': {'field': 'stok_akhir', 'type': 'quantitative', 'title': 'Stok akhir'},
+        'color': {'field': 'nama_barang', 'type': 'nominal', 'title': 'Barang'}
+    }
+}
+
+# Proyeksi stok semua barang beberapa bulan ke depan (fragment, seperti show_whatif_stok)
+@st.fragment
+def show_proyeksi_stok(model, scaler, metadata, riwayat):
+    from stok_proyeksi import ringkasan_proyeksi
+
+    st.markdown("---")
+    st.subheader("Proyeksi Stok Beberapa Bulan")
+    st.caption("Stok akhir setiap bulan menjadi stok awal bulan berikutnya; masuk dan keluar diasumsikan sama "
+               "dengan rata-rata 3 periode terakhir (termasuk bulan hasil proyeksi).")
+
+    with st.form("form_proyeksi"):
+        horizon = st.slider("Horizon (bulan)", min_value=1, max_value=24, value=12)
+        if st.form_submit_button("Proyeksikan Semua Barang"):
+            st.session_state.horizon_proyeksi = horizon
+
+    # Horizon yang di-submit disimpan; hasilnya dari cache saat pilihan grafik diubah
+    if 'horizon_proyeksi' not in st.session_state:
+        return
+
+    with st.spinner('Memproyeksikan stok...'):
+        hasil = cache_proyeksi_stok(model, scaler, metadata, riwayat, _kunci_model(model), len(load_stok_store()),
+                                    st.session_state.horizon_proyeksi)
+
+    ringkasan = ringkasan_proyeksi(hasil).sort_values(['bulan_berisiko_pertama', 'bulan_habis'], na_position='last')
+    st.dataframe(ringkasan.rename(columns={
+        'nama_barang': 'Nama Barang', 'status_bulan_1': 'Status Bulan 1',
+        'bulan_berisiko_pertama': 'Berisiko Mulai Bulan Ke', 'bulan_habis': 'Habis Bulan Ke',
+        'stok_akhir': f"Stok Akhir Bulan Ke-{hasil['bulan_ke'].max()}"
+    }).round(1), use_container_width=True, hide_index=True)
+
+    pilihan = st.multiselect("Grafik stok akhir", options=ringkasan['nama_barang'].tolist(),
+                             default=ringkasan['nama_barang'].head(5).tolist())
+    if pilihan:
+        st.vega_lite_chart(hasil.loc[hasil['nama_barang'].isin(pilihan), ['bulan_ke', 'nama_barang', 'stok_akhir']],
+                           SPEC_GRAFIK_PROYEKSI, use_container_width=True)
+
+# CSS navigasi sidebar. Streamlit perlu elemen ini di setiap run; karena teksnya konstan,
+# delta yang dikirim sama dan browser tidak menggambar ulang
+CSS_SIDEBAR = """
+<style>
+/* Styling the sidebar navigation */
+section[data-testid="stSidebar"] div.stButton > button {
+    width: 100%;
+    border: none;
+    border-radius: 5px;
+    margin-bottom: 10px;
+    padding: 10px 15px;
+    text-align: left;
+    font-size: 16px;
+    transition: all 0.3s ease;
+}
+
+/* Hover effect for buttons */
+section[data-testid="stSidebar"] div.stButton > button:hover {
+    background-color: #e1e5f2;
+    color: #1e3c72;
+}
+</style>
+"""
+
+# Halaman dan label tombol navigasi
+HALAMAN = (("About", "📚 About"), ("Absensi", "🕒 Absensi"), ("Stok", "📦 Stok"))
+
+# Callback tombol navigasi: dijalankan sebelum run berikutnya, sehingga satu klik = satu script run
+def _pindah_halaman(halaman):
+    st.session_state.current_page = halaman
+
 # Main function
 def main():
+    # Jumlah script run dan waktu CPU per run (thread script ini), tampil di panel metrik
+    cpu_mulai = time.thread_time()
+    metrik.tambah('app.script_run')
+
     # Add sidebar styling
-    st.markdown(
-        """
-        <style>
-        /* Styling the sidebar navigation */
-        section[data-testid="stSidebar"] div.stButton > button {
-            width: 100%;
-            border: none;
-            border-radius: 5px;
-            margin-bottom: 10px;
-            padding: 10px 15px;
-            text-align: left;
-            font-size: 16px;
-            transition: all 0.3s ease;
-        }
-        
-        /* Hover effect for buttons */
-        section[data-testid="stSidebar"] div.stButton > button:hover {
-            background-color: #e1e5f2;
-            color: #1e3c72;
-        }
-        </style>
-        """, 
-        unsafe_allow_html=True
-    )
-      # Add a sidebar title
+    st.markdown(CSS_SIDEBAR, unsafe_allow_html=True)
+
+    # Add a sidebar title
     st.sidebar.title("Navigasi")
     
     # Use session_state to manage the current page
@@ -498,34 +852,21 @@ def main():
         st.session_state.current_page = "About"
     
     # Create sidebar navigation with icons
-    if st.sidebar.button("📚 About", 
-                       type="primary" if st.session_state.current_page == "About" else "secondary",
-                       use_container_width=True):
-        st.session_state.current_page = "About"
-        st.experimental_rerun()
-    
-    if st.sidebar.button("🕒 Absensi", 
-                       type="primary" if st.session_state.current_page == "Absensi" else "secondary",
-                       use_container_width=True):
-        st.session_state.current_page = "Absensi"
-        st.experimental_rerun()
-    
-    if st.sidebar.button("📦 Stok", 
-                       type="primary" if st.session_state.current_page == "Stok" else "secondary",
-                       use_container_width=True):
-        st.session_state.current_page = "Stok"
-        st.experimental_rerun()
+    for halaman, label in HALAMAN:
+        st.sidebar.button(label, type="primary" if st.session_state.current_page == halaman else "secondary",
+                          use_container_width=True, on_click=_pindah_halaman, args=(halaman,))
     
     # Get current page from session state
     current_page = st.session_state.current_page
     
     # Display the selected page
-    if current_page == "About":
-        show_about()
-    elif current_page == "Absensi":
-        show_absensi()
-    elif current_page == "Stok":
-        show_stok()
+    with metrik.ukur(f"render.{current_page.lower()}"):
+        if current_page == "About":
+            show_about()
+        elif current_page == "Absensi":
+            show_absensi()
+        elif current_page == "Stok":
+            show_stok()
           # Footer
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Tim Machine Learning Flowlyhub")
@@ -535,5 +876,20 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.info("© 2025 DICODING - DBS CAPSTONE")
 
+    # Catat waktu dari awal script run pertama proses sampai render pertama selesai
+    laporan = startup_report()
+    if 'render pertama (s)' not in laporan:
+        laporan['render pertama (s)'] = round(time.perf_counter() - waktu_mulai_proses(), 3)
+    show_startup_report()
+    show_metrik()
+
+    if METRIK_FILE:
+        start_ekspor_metrik(METRIK_FILE)
+
+    if APP_WARMUP:
+        start_warmup()
+
+    metrik.observasi('app.script_cpu', time.thread_time() - cpu_mulai)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,241 @@
+# Benchmark latensi, throughput, cold start dan memori prediksi:
+#   python -m benchmarks.bench                              # tulis benchmarks/hasil/<commit>.json
+#   python -m benchmarks.bench --baseline benchmarks/hasil/<commit lama>.json --threshold 0.2
+# Dengan --baseline, proses keluar dengan kode 1 jika ada metrik yang memburuk lebih dari threshold.
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediksi import (ABSENSI_DATA_PATH, ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH,
+                      BACKEND_MODEL, BASE_DIR, STOK_DATA_PATH, STOK_METADATA_PATH, STOK_MODEL_PATH,
+                      STOK_SCALER_PATH, import_backend, load_model, prediksi_kehadiran, prediksi_kehadiran_batch,
+                      prediksi_stok, prediksi_stok_batch)
+
+HASIL_DIR = BASE_DIR / 'benchmarks' / 'hasil'
+
+UKURAN_BATCH = (1, 32, 256, 2048, 16384)
+
+# Arah tiap metrik: True jika makin kecil makin baik
+METRIK = {
+    'cold_start_s': True,
+    'load_s': True,
+    'single_p50_ms': True,
+    'single_p99_ms': True,
+    'peak_mem_mb': True,
+    'max_rss_mb': True,
+    **{f'throughput_b{b}_rps': False for b in UKURAN_BATCH}
+}
+
+PATHS = {
+    'absensi': (ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH),
+    'stok': (STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH)
+}
+
+# Script cold start: proses baru, impor + load model + prediksi pertama
+SCRIPT_COLD_START = """
+import json, sys, time
+t0 = time.perf_counter()
+import numpy as np
+import prediksi
+model, scaler, metadata = prediksi.load_model(*{paths!r}, backend={backend!r})
+prediksi.prediksi_probabilitas(model, scaler, np.zeros((1, len(metadata['features']))))
+print(json.dumps(time.perf_counter() - t0))
+"""
+
+# Script memori: proses baru, load model + batch terbesar, lalu RSS puncak proses.
+# RSS mencakup buffer native (TensorFlow, BLAS) yang tidak terlihat oleh tracemalloc
+SCRIPT_MEMORI = """
+import json
+import numpy as np
+from benchmarks.bench import PATHS, UKURAN_BATCH, _prediksi_batch, muat_data, rss_puncak_mb
+from prediksi import load_model
+data = muat_data()[{nama!r}]
+model, scaler, metadata = load_model(*PATHS[{nama!r}], backend={backend!r})
+batch = data.iloc[np.arange(UKURAN_BATCH[-1]) % len(data)].reset_index(drop=True)
+_prediksi_batch({nama!r}, model, scaler, metadata, batch)
+print(json.dumps(rss_puncak_mb()))
+"""
+
+def rss_puncak_mb():
+    """
+    RSS puncak proses ini (MB). Di Linux dibaca dari VmHWM: ru_maxrss ikut terbawa dari
+    proses induk lewat fork/exec, sehingga subprocess dari benchmark yang sudah besar
+    akan melaporkan RSS induknya
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for baris in f:
+                if baris.startswith('VmHWM:'):
+                    return int(baris.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def muat_data():
+    absensi = pd.read_csv(ABSENSI_DATA_PATH, dtype={'jam_masuk': str, 'jam_jadwal': str})
+    stok = pd.read_csv(STOK_DATA_PATH)
+    return {'absensi': absensi, 'stok': stok}
+
+def _prediksi_satu(nama, model, scaler, metadata, baris):
+    if nama == 'absensi':
+        return prediksi_kehadiran(model, scaler, metadata, baris['hari'], baris['jam_jadwal'],
+                                  baris['cuaca'], baris['jam_masuk'])
+    return prediksi_stok(model, scaler, metadata, baris['nama_barang'], baris['stok_awal'], baris['masuk'],
+                         baris['keluar'], baris['satuan'], baris['bulan'])
+
+def _prediksi_batch(nama, model, scaler, metadata, data):
+    if nama == 'absensi':
+        return prediksi_kehadiran_batch(model, scaler, metadata, data)
+    return prediksi_stok_batch(model, scaler, metadata, data)
+
+def ukur_cold_start(nama, backend, ulang=3):
+    """Median waktu impor + load + prediksi pertama di proses Python baru"""
+    script = SCRIPT_COLD_START.format(paths=tuple(str(p) for p in PATHS[nama]), backend=backend)
+    waktu = []
+    for _ in range(ulang):
+        keluaran = subprocess.run([sys.executable, '-c', script], cwd=BASE_DIR, capture_output=True,
+                                  text=True, check=True)
+        waktu.append(json.loads(keluaran.stdout.strip().splitlines()[-1]))
+    return float(np.median(waktu))
+
+def ukur_rss(nama, backend):
+    """RSS puncak (MB) proses Python baru yang memuat satu model dan menjalankan batch terbesar"""
+    script = SCRIPT_MEMORI.format(nama=nama, backend=backend)
+    keluaran = subprocess.run([sys.executable, '-c', script], cwd=BASE_DIR, capture_output=True, text=True,
+                              check=True)
+    return float(json.loads(keluaran.stdout.strip().splitlines()[-1]))
+
+def ukur_model(nama, backend, data, iterasi=200, ulang=3, cold_start=True):
+    """Mengukur satu kombinasi model dan backend"""
+    hasil = {}
+    if cold_start:
+        hasil['cold_start_s'] = ukur_cold_start(nama, backend)
+
+    # Waktu load tanpa impor library (impor sudah tercakup di cold start)
+    import_backend(backend)
+    mulai = time.perf_counter()
+    model, scaler, metadata = load_model(*PATHS[nama], backend=backend)
+    hasil['load_s'] = time.perf_counter() - mulai
+
+    # Latensi satu panggilan, baris diambil bergiliran dari data yang dibundel
+    baris = data.to_dict('records')
+    _prediksi_satu(nama, model, scaler, metadata, baris[0])
+    latensi = []
+    for i in range(iterasi):
+        mulai = time.perf_counter()
+        _prediksi_satu(nama, model, scaler, metadata, baris[i % len(baris)])
+        latensi.append(time.perf_counter() - mulai)
+    hasil['single_p50_ms'] = float(np.percentile(latensi, 50) * 1000)
+    hasil['single_p99_ms'] = float(np.percentile(latensi, 99) * 1000)
+
+    # Throughput batch (baris/detik), terbaik dari beberapa ulangan
+    for ukuran in UKURAN_BATCH:
+        batch = data.iloc[np.arange(ukuran) % len(data)].reset_index(drop=True)
+        terbaik = min(_waktu(lambda: _prediksi_batch(nama, model, scaler, metadata, batch)) for _ in range(ulang))
+        hasil[f'throughput_b{ukuran}_rps'] = ukuran / terbaik
+
+    # Puncak alokasi Python/NumPy saat batch terbesar
+    batch = data.iloc[np.arange(UKURAN_BATCH[-1]) % len(data)].reset_index(drop=True)
+    tracemalloc.start()
+    _prediksi_batch(nama, model, scaler, metadata, batch)
+    hasil['peak_mem_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    hasil['max_rss_mb'] = ukur_rss(nama, backend)
+
+    return hasil
+
+def _waktu(fungsi):
+    mulai = time.perf_counter()
+    fungsi()
+    return time.perf_counter() - mulai
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def bandingkan(hasil, baseline, threshold):
+    """
+    Membandingkan hasil dengan baseline
+
+    Returns:
+        list: Daftar (kunci, metrik, nilai baseline, nilai sekarang, perubahan relatif) yang memburuk
+    """
+    regresi = []
+    for kunci, metrik in hasil['hasil'].items():
+        for nama, nilai in metrik.items():
+            lama = baseline['hasil'].get(kunci, {}).get(nama)
+            if lama is None or lama == 0 or nama not in METRIK:
+                continue
+            perubahan = (nilai - lama) / lama if METRIK[nama] else (lama - nilai) / lama
+            if perubahan > threshold:
+                regresi.append((kunci, nama, lama, nilai, perubahan))
+    return regresi
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prediksi absensi dan stok")
+    parser.add_argument('--backend', nargs='+', default=['keras', 'numpy'], choices=BACKEND_MODEL)
+    parser.add_argument('--model', nargs='+', default=['absensi', 'stok'], choices=['absensi', 'stok'])
+    parser.add_argument('--iterasi', type=int, default=200, help="jumlah panggilan untuk latensi tunggal")
+    parser.add_argument('--tanpa-cold-start', action='store_true')
+    parser.add_argument('--output', type=Path, help="default: benchmarks/hasil/<commit>.json")
+    parser.add_argument('--baseline', type=Path, help="file hasil lama untuk perbandingan")
+    parser.add_argument('--threshold', type=float, default=0.2, help="batas memburuk relatif (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    data = muat_data()
+    hasil = {
+        'meta': {
+            'commit': _commit(),
+            'waktu': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform()
+        },
+        'hasil': {}
+    }
+
+    for backend in args.backend:
+        for nama in args.model:
+            kunci = f"{nama}/{backend}"
+            print(f"Mengukur {kunci}...", flush=True)
+            hasil['hasil'][kunci] = ukur_model(nama, backend, data[nama], args.iterasi,
+                                               cold_start=not args.tanpa_cold_start)
+            for metrik, nilai in hasil['hasil'][kunci].items():
+                print(f"  {metrik:<24} {nilai:>14.3f}")
+
+    if 'keras' in args.backend:
+        import tensorflow as tf
+        hasil['meta']['tensorflow'] = tf.__version__
+    hasil['meta']['max_rss_proses_mb'] = rss_puncak_mb()
+
+    output = args.output or HASIL_DIR / f"{hasil['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(hasil, f, indent=2)
+    print(f"Hasil disimpan di {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regresi = bandingkan(hasil, baseline, args.threshold)
+        for kunci, nama, lama, nilai, perubahan in regresi:
+            print(f"REGRESI {kunci} {nama}: {lama:.3f} -> {nilai:.3f} ({perubahan:+.0%})")
+        if regresi:
+            sys.exit(1)
+        print(f"Tidak ada regresi di atas {args.threshold:.0%} dibanding {args.baseline}")
+
+if __name__ == "__main__":
+    main()
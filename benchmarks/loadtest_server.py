@@ -0,0 +1,123 @@
+# Load test untuk server.py:
+#   python -m benchmarks.loadtest_server --url http://127.0.0.1:8000
+#   python -m benchmarks.loadtest_server --bandingkan
+# --bandingkan menjalankan server lokal dua kali (max_batch=1 dan default) lalu
+# membandingkan throughput dan latensinya.
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+CONTOH_PAYLOAD = {
+    'absensi': {'hari': 'Monday', 'jam_jadwal': '08:00', 'kondisi_cuaca': 'Rain', 'jam_masuk': '08:07'},
+    'stok': {'nama_barang': 'Beras', 'stok_awal': 80, 'masuk': 20, 'keluar': 35, 'satuan': 'kg', 'bulan': 6}
+}
+
+def jalankan_beban(url, model='stok', klien=64, durasi=10.0):
+    """
+    Mengirim permintaan dari banyak klien paralel selama durasi detik
+
+    Returns:
+        dict: Jumlah permintaan, throughput (req/s) dan latensi p50/p99 (ms)
+    """
+    body = json.dumps(CONTOH_PAYLOAD[model]).encode('utf-8')
+    latensi = [[] for _ in range(klien)]
+    gagal = [0] * klien
+    selesai = time.perf_counter() + durasi
+
+    def kerja(i):
+        while time.perf_counter() < selesai:
+            permintaan = urllib.request.Request(f"{url}/predict/{model}", data=body,
+                                                headers={'Content-Type': 'application/json'})
+            mulai = time.perf_counter()
+            try:
+                with urllib.request.urlopen(permintaan, timeout=30) as respons:
+                    respons.read()
+                latensi[i].append(time.perf_counter() - mulai)
+            except OSError:
+                gagal[i] += 1
+
+    mulai = time.perf_counter()
+    threads = [threading.Thread(target=kerja, args=(i,)) for i in range(klien)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lama = time.perf_counter() - mulai
+
+    semua = np.concatenate([np.asarray(l) for l in latensi]) * 1000
+    with urllib.request.urlopen(f"{url}/stats") as respons:
+        stats = json.load(respons)[model]
+
+    return {
+        'requests': int(len(semua)),
+        'errors': sum(gagal),
+        'throughput_rps': len(semua) / lama,
+        'p50_ms': float(np.percentile(semua, 50)) if len(semua) else float('nan'),
+        'p99_ms': float(np.percentile(semua, 99)) if len(semua) else float('nan'),
+        'mean_batch_size': stats['mean_batch_size']
+    }
+
+def _port_bebas():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def jalankan_server(argumen_server, timeout=180):
+    """Menjalankan server.py di subprocess dan menunggu /health siap"""
+    port = _port_bebas()
+    proses = subprocess.Popen([sys.executable, str(BASE_DIR / 'server.py'), '--port', str(port), *argumen_server],
+                              cwd=BASE_DIR, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    batas = time.perf_counter() + timeout
+    while time.perf_counter() < batas:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1):
+                return proses, url
+        except OSError:
+            if proses.poll() is not None:
+                raise RuntimeError("server.py berhenti sebelum siap")
+            time.sleep(0.5)
+    proses.kill()
+    raise RuntimeError("server.py tidak siap dalam batas waktu")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server prediksi")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--model', default='stok', choices=sorted(CONTOH_PAYLOAD))
+    parser.add_argument('--klien', type=int, default=64)
+    parser.add_argument('--durasi', type=float, default=10.0)
+    parser.add_argument('--bandingkan', action='store_true', help="bandingkan max_batch=1 dengan micro-batching")
+    parser.add_argument('--backend', default='keras', choices=['keras', 'numpy', 'bundle'])
+    args = parser.parse_args()
+
+    if not args.bandingkan:
+        print(json.dumps(jalankan_beban(args.url, args.model, args.klien, args.durasi), indent=2))
+        return
+
+    hasil = {}
+    for nama, argumen in [('tanpa batching', ['--max-batch', '1']), ('micro-batching', [])]:
+        proses, url = jalankan_server(['--backend', args.backend, *argumen])
+        try:
+            hasil[nama] = jalankan_beban(url, args.model, args.klien, args.durasi)
+        finally:
+            proses.terminate()
+            proses.wait()
+
+    print(f"{'Mode':<16} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'batch':>8}")
+    for nama, h in hasil.items():
+        print(f"{nama:<16} {h['throughput_rps']:>10.1f} {h['p50_ms']:>10.1f} {h['p99_ms']:>10.1f} {h['mean_batch_size']:>8.1f}")
+    dasar = hasil['tanpa batching']['throughput_rps']
+    print(f"Peningkatan throughput: {hasil['micro-batching']['throughput_rps'] / dasar:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from numpy_model import AKTIVASI, NumpyMLP
+from prediksi import (ABSENSI_DATA_PATH, ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH,
+                      STOK_DATA_PATH, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, artefak_aktif,
+                      fitur_kehadiran, prediksi_probabilitas, status_stok)
+from riwayat_stok import KUNCI_ITEM, RiwayatStok
+
+# Presisi yang didukung: bobot float16, atau int8 per lapisan dengan satu skala simetris
+PRESISI = ('float16', 'int8')
+
+# Batas default bagian label yang boleh berubah dibanding model presisi penuh
+BATAS_FLIP = 0.005
+
+PATHS = {
+    'absensi': (ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH, ABSENSI_DATA_PATH),
+    'stok': (STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, STOK_DATA_PATH)
+}
+
+class MLPKuantisasi:
+    """
+    MLP dengan bobot presisi rendah. Bobot disimpan sebagai float16 atau int8
+    (skala per lapisan = max|W| / 127); aktivasi dihitung dalam float32.
+    Scaler tidak dilipat ke bobot, karena fitur menit (~480) yang dilipat membuat
+    presisi rendah kehilangan akurasi; dipakai bersama StandardScaler asli.
+
+    Args:
+        model (NumpyMLP): Model presisi penuh tanpa scaler terlipat
+        presisi (str): 'float16' atau 'int8'
+    """
+
+    def __init__(self, model, presisi='int8'):
+        if presisi not in PRESISI:
+            raise ValueError(f"Presisi tidak dikenal: {presisi} (pilihan: {', '.join(PRESISI)})")
+        self.presisi = presisi
+        self.lapisan = []
+        for W, b, aktivasi in model.lapisan:
+            if presisi == 'int8':
+                skala = float(np.max(np.abs(W))) / 127 or 1.0
+                W_q = np.clip(np.round(W / skala), -127, 127).astype(np.int8)
+            else:
+                skala = 1.0
+                W_q = W.astype(np.float16)
+            self.lapisan.append((W_q, np.float32(skala), b.astype(np.float32), aktivasi))
+
+    @property
+    def n_features(self):
+        return self.lapisan[0][0].shape[0]
+
+    @property
+    def nbytes(self):
+        return sum(W.nbytes + b.nbytes for W, _, b, _ in self.lapisan)
+
+    def predict(self, X, batch_size=None, verbose=0):
+        """Menghitung output model (n, 1) dari fitur yang sudah di-scale"""
+        h = np.asarray(X, dtype=np.float32)
+        with np.errstate(over='ignore'):
+            for W, skala, b, aktivasi in self.lapisan:
+                # Bobot kecil (paling besar 64x32), konversi ke float32 per pemanggilan murah
+                h = AKTIVASI[aktivasi]((h @ W.astype(np.float32)) * skala + b)
+        return h
+
+def data_kalibrasi(nama, metadata):
+    """Fitur mentah dan kolom pendukung dari CSV yang dibundel"""
+    if nama == 'absensi':
+        df = pd.read_csv(ABSENSI_DATA_PATH, dtype={'jam_masuk': str, 'jam_jadwal': str})
+        return fitur_kehadiran(metadata, df), df
+
+    from prediksi import fitur_stok
+
+    df = pd.read_csv(STOK_DATA_PATH)
+    keluar_ma3, masuk_ma3 = RiwayatStok().moving_average_batch(df[KUNCI_ITEM].to_numpy(), df['masuk'].to_numpy(),
+                                                               df['keluar'].to_numpy())
+    return fitur_stok(df['stok_awal'], df['masuk'], df['keluar'], df['bulan'], keluar_ma3, masuk_ma3), df
+
+def label(nama, probabilitas, df):
+    """Label keputusan: status stok (Aman/Stabil/Berisiko) atau probabilitas > 0.5 untuk absensi"""
+    if nama == 'stok':
+        return status_stok(df['stok_awal'].to_numpy(), df['keluar'].to_numpy(), probabilitas)[0]
+    # Status terlambat absensi hanya bergantung pada selisih dan toleransi, jadi yang dibandingkan label model
+    return probabilitas > 0.5
+
+# Membandingkan model presisi rendah dengan model presisi penuh pada data kalibrasi
+def kalibrasi(nama, presisi='int8'):
+    """
+    Returns:
+        tuple: (MLPKuantisasi, scaler, metadata, laporan (dict))
+    """
+    import joblib
+
+    model_path, scaler_path, metadata_path = artefak_aktif(*PATHS[nama][:3])
+    scaler = joblib.load(scaler_path)
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    penuh = NumpyMLP.from_h5(model_path, scaler=scaler)
+    model = MLPKuantisasi(NumpyMLP.from_h5(model_path), presisi)
+
+    fitur, df = data_kalibrasi(nama, metadata)
+    prob_penuh = prediksi_probabilitas(penuh, _Identitas(), fitur)
+    prob_q = prediksi_probabilitas(model, scaler, fitur)
+    berubah = label(nama, prob_penuh, df) != label(nama, prob_q, df)
+
+    laporan = {
+        'model': nama,
+        'presisi': presisi,
+        'baris': len(fitur),
+        'label_berubah': int(berubah.sum()),
+        'flip_rate': float(berubah.mean()),
+        'selisih_prob_maks': float(np.max(np.abs(prob_penuh - prob_q))),
+        'ukuran_bobot_byte': model.nbytes,
+        'ukuran_bobot_penuh_byte': sum(W.nbytes + b.nbytes for W, b, _ in penuh.lapisan)
+    }
+    return model, scaler, metadata, laporan
+
+class _Identitas:
+    def transform(self, X):
+        return X
+
+# Mengaktifkan model presisi rendah hanya jika lolos batas flip rate
+def muat_kuantisasi(nama, presisi='int8', batas=BATAS_FLIP):
+    """
+    Raises:
+        ValueError: Jika flip rate pada data kalibrasi melebihi batas
+
+    Returns:
+        tuple: (model, scaler, metadata, laporan)
+    """
+    model, scaler, metadata, laporan = kalibrasi(nama, presisi)
+    laporan['batas'] = batas
+    if laporan['flip_rate'] > batas:
+        raise ValueError(f"Model {nama} {presisi} ditolak: {laporan['label_berubah']}/{laporan['baris']} label "
+                         f"berubah ({laporan['flip_rate']:.2%} > batas {batas:.2%})")
+    return model, scaler, metadata, laporan
+
+def _waktu_per_juta(model, scaler, fitur):
+    besar = np.tile(fitur, (max(1, 200_000 // len(fitur)), 1))
+    mulai = time.perf_counter()
+    prediksi_probabilitas(model, scaler, besar)
+    return (time.perf_counter() - mulai) * 1_000_000 / len(besar)
+
+if __name__ == "__main__":
+    # Kalibrasi dan laporan: python kuantisasi.py --presisi int8 --batas 0.005
+    parser = argparse.ArgumentParser(description="Kalibrasi model presisi rendah (float16/int8)")
+    parser.add_argument('--model', nargs='+', default=['absensi', 'stok'], choices=sorted(PATHS))
+    parser.add_argument('--presisi', nargs='+', default=list(PRESISI), choices=PRESISI)
+    parser.add_argument('--batas', type=float, default=BATAS_FLIP, help="flip rate maksimum (0.005 = 0.5%%)")
+    args = parser.parse_args()
+
+    import joblib
+
+    ditolak = False
+    for nama in args.model:
+        model_path, scaler_path, metadata_path = artefak_aktif(*PATHS[nama][:3])
+        penuh = NumpyMLP.from_h5(model_path, scaler=joblib.load(scaler_path))
+        with open(metadata_path, 'r') as f:
+            fitur, _ = data_kalibrasi(nama, json.load(f))
+        print(f"{nama}: float64 {_waktu_per_juta(penuh, _Identitas(), fitur):.2f} s/juta baris")
+
+        for presisi in args.presisi:
+            model, scaler, _, laporan = kalibrasi(nama, presisi)
+            lolos = laporan['flip_rate'] <= args.batas
+            ditolak |= not lolos
+            print(f"  {presisi:<8} {laporan['label_berubah']:>4}/{laporan['baris']} label berubah "
+                  f"({laporan['flip_rate']:.2%}), selisih prob maks {laporan['selisih_prob_maks']:.2e}, "
+                  f"bobot {laporan['ukuran_bobot_byte']} / {laporan['ukuran_bobot_penuh_byte']} byte, "
+                  f"{_waktu_per_juta(model, scaler, fitur):.2f} s/juta baris -> {'OK' if lolos else 'DITOLAK'}")
+
+    sys.exit(1 if ditolak else 0)
@@ -0,0 +1,209 @@
+import bisect
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import warnings
+from collections import deque
+from contextlib import nullcontext
+
+# METRIK=0 mematikan semua pencatatan (ukur/diukur menjadi no-op)
+METRIK_AKTIF = os.environ.get('METRIK', '1') != '0'
+
+# Jumlah sampel terakhir per tahap untuk persentil dan histogram di UI
+UKURAN_SAMPEL = 1024
+
+# Batas atas bucket histogram (detik), sama untuk semua tahap
+BUCKET = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_TANPA_UKUR = nullcontext()
+
+class _Tahap:
+    __slots__ = ('jumlah', 'total', 'bucket', 'sampel')
+
+    def __init__(self):
+        self.jumlah = 0
+        self.total = 0.0
+        self.bucket = [0] * (len(BUCKET) + 1)
+        self.sampel = deque(maxlen=UKURAN_SAMPEL)
+
+class _Timer:
+    __slots__ = ('registri', 'nama', 'mulai')
+
+    def __init__(self, registri, nama):
+        self.registri = registri
+        self.nama = nama
+
+    def __enter__(self):
+        self.mulai = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registri.observasi(self.nama, time.perf_counter() - self.mulai)
+
+class Registri:
+    """
+    Kumpulan timer per tahap dan counter. Setiap observasi hanya menambah
+    beberapa angka di bawah lock, sehingga aman dipanggil dari banyak thread
+    (sesi Streamlit, worker server) dengan overhead beberapa mikrodetik.
+
+    Args:
+        aktif (bool): False membuat semua pencatatan menjadi no-op
+    """
+
+    def __init__(self, aktif=METRIK_AKTIF):
+        self.aktif = aktif
+        self.lock = threading.Lock()
+        self.tahap = {}
+        self.counter = {}
+
+    def observasi(self, nama, detik):
+        """Mencatat satu durasi (detik) untuk tahap nama"""
+        if not self.aktif:
+            return
+        with self.lock:
+            tahap = self.tahap.get(nama)
+            if tahap is None:
+                tahap = self.tahap[nama] = _Tahap()
+            tahap.jumlah += 1
+            tahap.total += detik
+            tahap.bucket[bisect.bisect_left(BUCKET, detik)] += 1
+            tahap.sampel.append(detik)
+
+    def ukur(self, nama):
+        """Context manager yang mencatat durasi blok: with metrik.ukur('model.predict'): ..."""
+        return _Timer(self, nama) if self.aktif else _TANPA_UKUR
+
+    def tambah(self, nama, n=1):
+        """Menambah counter nama sebesar n"""
+        if not self.aktif:
+            return
+        with self.lock:
+            self.counter[nama] = self.counter.get(nama, 0) + n
+
+    def salinan_counter(self):
+        with self.lock:
+            return dict(self.counter)
+
+    def reset(self):
+        with self.lock:
+            self.tahap.clear()
+            self.counter.clear()
+
+    def ringkasan(self):
+        """
+        Returns:
+            dict: Per tahap: count, total_s, mean_ms dan p50/p99 (ms) dari sampel terakhir
+        """
+        with self.lock:
+            salinan = {nama: (t.jumlah, t.total, sorted(t.sampel)) for nama, t in self.tahap.items()}
+
+        hasil = {}
+        for nama, (jumlah, total, sampel) in sorted(salinan.items()):
+            hasil[nama] = {
+                'count': jumlah,
+                'total_s': round(total, 6),
+                'mean_ms': round(1000 * total / jumlah, 4),
+                'p50_ms': round(1000 * sampel[int(0.50 * (len(sampel) - 1))], 4),
+                'p99_ms': round(1000 * sampel[int(0.99 * (len(sampel) - 1))], 4)
+            }
+        return hasil
+
+    def histogram(self, nama):
+        """Jumlah sampel terakhir per bucket untuk satu tahap, label dalam ms"""
+        with self.lock:
+            sampel = list(self.tahap[nama].sampel) if nama in self.tahap else []
+
+        jumlah = [0] * (len(BUCKET) + 1)
+        for detik in sampel:
+            jumlah[bisect.bisect_left(BUCKET, detik)] += 1
+        label = [f"<={batas * 1000:g}ms" for batas in BUCKET] + [f">{BUCKET[-1] * 1000:g}ms"]
+        return dict(zip(label, jumlah))
+
+    def ke_prometheus(self, prefix='flowlyhub'):
+        """Semua metrik dalam format teks Prometheus (histogram per tahap + counter)"""
+        with self.lock:
+            tahap = {nama: (t.jumlah, t.total, list(t.bucket)) for nama, t in self.tahap.items()}
+            counter = dict(self.counter)
+
+        baris = [
+            f"# HELP {prefix}_tahap_detik Durasi per tahap prediksi",
+            f"# TYPE {prefix}_tahap_detik histogram"
+        ]
+        for nama, (jumlah, total, bucket) in sorted(tahap.items()):
+            kumulatif = 0
+            for batas, n in zip(BUCKET, bucket):
+                kumulatif += n
+                baris.append(f'{prefix}_tahap_detik_bucket{{tahap="{nama}",le="{batas:g}"}} {kumulatif}')
+            baris.append(f'{prefix}_tahap_detik_bucket{{tahap="{nama}",le="+Inf"}} {jumlah}')
+            baris.append(f'{prefix}_tahap_detik_sum{{tahap="{nama}"}} {total:.9g}')
+            baris.append(f'{prefix}_tahap_detik_count{{tahap="{nama}"}} {jumlah}')
+
+        baris += [f"# HELP {prefix}_kejadian_total Counter kejadian", f"# TYPE {prefix}_kejadian_total counter"]
+        for nama, n in sorted(counter.items()):
+            baris.append(f'{prefix}_kejadian_total{{nama="{nama}"}} {n}')
+        return "\n".join(baris) + "\n"
+
+    def tulis(self, path):
+        """Menulis metrik ke file: .json berisi ringkasan + counter, selain itu teks Prometheus"""
+        path = str(path)
+        if path.endswith('.json'):
+            isi = json.dumps({'tahap': self.ringkasan(), 'counter': self.salinan_counter()}, indent=2)
+        else:
+            isi = self.ke_prometheus()
+
+        # Tulis ke file sementara unik lalu rename, agar pembaca tidak melihat file setengah jadi
+        # dan beberapa proses yang mengekspor ke path yang sama tidak saling menimpa
+        folder, nama = os.path.split(os.path.abspath(path))
+        fd, sementara = tempfile.mkstemp(prefix=nama + '.', suffix='.tmp', dir=folder)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(isi)
+            os.chmod(sementara, 0o644)
+            os.replace(sementara, path)
+        except BaseException:
+            os.unlink(sementara)
+            raise
+
+    def mulai_ekspor(self, path, interval=15.0):
+        """Menulis metrik ke path setiap interval detik di thread latar belakang"""
+        def ekspor():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.tulis(path)
+                except OSError as e:
+                    # Disk penuh atau folder hilang: thread tetap hidup dan mencoba lagi di interval berikutnya
+                    self.tambah('metrik.ekspor_gagal')
+                    warnings.warn(f"Ekspor metrik ke {path} gagal: {e}", stacklevel=1)
+
+        thread = threading.Thread(target=ekspor, name="metrik-ekspor", daemon=True)
+        thread.start()
+        return thread
+
+# Registri bersama untuk seluruh proses
+REGISTRI = Registri()
+
+ukur = REGISTRI.ukur
+tambah = REGISTRI.tambah
+observasi = REGISTRI.observasi
+ringkasan = REGISTRI.ringkasan
+salinan_counter = REGISTRI.salinan_counter
+histogram = REGISTRI.histogram
+ke_prometheus = REGISTRI.ke_prometheus
+tulis = REGISTRI.tulis
+mulai_ekspor = REGISTRI.mulai_ekspor
+
+def diukur(nama):
+    """Decorator yang mencatat durasi setiap pemanggilan fungsi sebagai tahap nama"""
+    def dekorator(fungsi):
+        @functools.wraps(fungsi)
+        def pembungkus(*args, **kwargs):
+            if not REGISTRI.aktif:
+                return fungsi(*args, **kwargs)
+            with _Timer(REGISTRI, nama):
+                return fungsi(*args, **kwargs)
+        return pembungkus
+    return dekorator
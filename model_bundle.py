@@ -0,0 +1,321 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import warnings
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+from numpy_model import FoldedScaler, NumpyMLP
+
+# Format file bundle:
+#   MAGIC (8 byte) | panjang header (uint64 little-endian) | header JSON | padding | blok array float64
+# Setiap array disejajarkan ke PERATAAN byte agar bisa dibaca langsung sebagai view dari memory map
+MAGIC = b'FLHBNDL1'
+FORMAT_BUNDLE = 1
+PERATAAN = 64
+
+# Interval minimum (detik) antar pengecekan file bundle baru
+INTERVAL_CEK = 2.0
+
+def bundle_path(model_path):
+    """Lokasi bundle untuk sebuah model .h5, misalnya stok/model/stok_model.bundle"""
+    return Path(model_path).with_suffix('.bundle')
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for blok in iter(lambda: f.read(1 << 20), b''):
+            h.update(blok)
+    return h.hexdigest()
+
+def _tanda_file(paths):
+    # Identitas murah (inode, mtime, ukuran) untuk mendeteksi file yang diganti tanpa membaca isinya
+    return tuple((s.st_ino, s.st_mtime_ns, s.st_size) for s in map(os.stat, paths))
+
+def sumber_berubah(header, sumber):
+    """
+    Nama file sumber (model, scaler, metadata) yang isinya berbeda dengan saat bundle dibuat
+
+    Args:
+        header (dict): Header bundle (baca_header)
+        sumber (tuple): Path .h5, scaler.joblib dan model_metadata.json saat ini
+
+    Returns:
+        list: Nama file yang berubah; kosong jika bundle masih sesuai
+    """
+    tercatat = header.get('sumber', {})
+    return [Path(p).name for p in sumber if tercatat.get(Path(p).name) != _sha256_file(p)]
+
+def _sejajarkan(n):
+    return -(-n // PERATAAN) * PERATAAN
+
+def baca_header(path):
+    """Membaca header JSON bundle tanpa menyentuh blok bobot"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Bukan file bundle model: {path}")
+        panjang = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(panjang).decode('utf-8'))
+    if header['format'] != FORMAT_BUNDLE:
+        raise ValueError(f"Format bundle {header['format']} tidak didukung (diharapkan {FORMAT_BUNDLE})")
+    return header
+
+# Mengemas .h5 + scaler.joblib + model_metadata.json menjadi satu file
+def buat_bundle(model_path, scaler_path, metadata_path, path=None, versi=None):
+    """
+    Melipat scaler dan BatchNormalization ke lapisan Dense (lihat NumpyMLP.from_h5),
+    lalu menulis bobot, parameter scaler dan metadata ke satu file bundle
+
+    Args:
+        path (Path, optional): Lokasi bundle (default: bundle_path(model_path))
+        versi (int, optional): Nomor versi; default versi bundle lama + 1, atau 1
+
+    Returns:
+        dict: Header bundle yang ditulis
+    """
+    import joblib
+    from prediksi import artefak_aktif
+
+    path = Path(path) if path is not None else bundle_path(model_path)
+    model_path, scaler_path, metadata_path = artefak_aktif(model_path, scaler_path, metadata_path)
+    if versi is None:
+        versi = baca_header(path)['versi'] + 1 if path.exists() else 1
+
+    scaler = joblib.load(scaler_path)
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    model = NumpyMLP.from_h5(model_path, scaler=scaler)
+
+    # Susun semua array ke satu blok dengan offset yang sudah disejajarkan
+    array = {
+        'scaler_mean': np.broadcast_to(np.asarray(scaler.mean_, dtype=np.float64), (scaler.n_features_in_,)),
+        'scaler_scale': np.broadcast_to(np.asarray(scaler.scale_, dtype=np.float64), (scaler.n_features_in_,))
+    }
+    lapisan = []
+    for i, (W, b, aktivasi) in enumerate(model.lapisan):
+        array[f'W{i}'], array[f'b{i}'] = W, b
+        lapisan.append({'W': f'W{i}', 'b': f'b{i}', 'aktivasi': aktivasi})
+
+    tata_letak, posisi = {}, 0
+    for nama, nilai in array.items():
+        tata_letak[nama] = {'offset': posisi, 'shape': list(nilai.shape)}
+        posisi = _sejajarkan(posisi + nilai.nbytes)
+    blok = np.zeros(posisi, dtype=np.uint8)
+    for nama, nilai in array.items():
+        mulai = tata_letak[nama]['offset']
+        blok[mulai:mulai + nilai.nbytes] = np.ascontiguousarray(nilai, dtype='<f8').view(np.uint8).ravel()
+
+    header = {
+        'format': FORMAT_BUNDLE,
+        'versi': int(versi),
+        'dibuat': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sumber': {Path(p).name: _sha256_file(p) for p in (model_path, scaler_path, metadata_path)},
+        'checksum': hashlib.sha256(blok.tobytes()).hexdigest(),
+        'lapisan': lapisan,
+        'array': tata_letak,
+        'metadata': metadata
+    }
+
+    # Padding header agar blok bobot mulai di batas PERATAAN
+    isi_header = json.dumps(header).encode('utf-8')
+    isi_header += b' ' * (_sejajarkan(len(MAGIC) + 8 + len(isi_header)) - len(MAGIC) - 8 - len(isi_header))
+
+    # Tulis ke file sementara (nama unik per penulis) lalu rename, sehingga pembaca selalu melihat bundle utuh
+    fd, sementara = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(isi_header).to_bytes(8, 'little'))
+            f.write(isi_header)
+            f.write(blok.tobytes())
+        os.chmod(sementara, 0o644)
+        os.replace(sementara, path)
+    except BaseException:
+        os.unlink(sementara)
+        raise
+    return header
+
+# Memuat bundle sebagai NumpyMLP yang bobotnya adalah view dari memory map
+def muat_bundle(path, verifikasi=True):
+    """
+    Bobot tidak disalin: setiap proses yang memuat bundle yang sama berbagi
+    halaman page cache yang sama
+
+    Args:
+        verifikasi (bool): Mencocokkan checksum blok bobot dengan header
+
+    Returns:
+        tuple: (NumpyMLP, FoldedScaler, metadata, header)
+    """
+    header = baca_header(path)
+    with open(path, 'rb') as f:
+        f.seek(len(MAGIC))
+        awal_blok = len(MAGIC) + 8 + int.from_bytes(f.read(8), 'little')
+
+    blok = np.memmap(path, dtype=np.uint8, mode='r', offset=awal_blok)
+    if verifikasi and hashlib.sha256(blok).hexdigest() != header['checksum']:
+        raise ValueError(f"Checksum bundle tidak cocok, file rusak atau tidak lengkap: {path}")
+
+    def ambil(nama):
+        info = header['array'][nama]
+        jumlah = int(np.prod(info['shape']))
+        return blok[info['offset']:info['offset'] + 8 * jumlah].view('<f8').reshape(info['shape'])
+
+    model = NumpyMLP([(ambil(l['W']), ambil(l['b']), l['aktivasi']) for l in header['lapisan']])
+    return model, FoldedScaler(model.n_features), header['metadata'], header
+
+class MetadataBundle(Mapping):
+    """
+    Metadata read-only dari versi bundle yang sedang aktif. Setiap akses membaca
+    metadata terbaru, sehingga tetap sesuai setelah ModelBundle memuat ulang.
+
+    Args:
+        bundle (ModelBundle): Bundle pemilik metadata
+    """
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+
+    def __getitem__(self, kunci):
+        return self.bundle.metadata[kunci]
+
+    def __iter__(self):
+        return iter(self.bundle.metadata)
+
+    def __len__(self):
+        return len(self.bundle.metadata)
+
+class ModelBundle:
+    """
+    Model dari file bundle yang dimuat ulang otomatis saat file diganti
+    (misalnya dengan python model_bundle.py), tanpa restart proses.
+    Pengecekan hanya os.stat, paling sering sekali per INTERVAL_CEK detik.
+    Antarmuka predict sama dengan keras.Model.predict; dipakai bersama FoldedScaler.
+
+    Jika sumber diberikan, hash file sumber dibandingkan dengan header 'sumber' saat
+    load dan setiap kali salah satu file sumber diganti (misalnya oleh training.py).
+    Bundle yang sudah tidak sesuai dibuat ulang dari sumbernya (dengan peringatan),
+    sehingga backend bundle tidak terus memakai bobot lama.
+
+    Args:
+        path (Path): Lokasi bundle
+        interval_cek (float): Jeda minimum antar pengecekan; None mematikan hot reload
+        sumber (tuple, optional): Path .h5, scaler.joblib dan model_metadata.json
+    """
+
+    def __init__(self, path, interval_cek=INTERVAL_CEK, sumber=None):
+        self.path = Path(path)
+        self.interval_cek = interval_cek
+        self.sumber = tuple(Path(p) for p in sumber) if sumber else None
+        self.lock = threading.Lock()
+        self.cek_berikutnya = 0.0
+        self.jumlah_reload = 0
+        self.jumlah_rebuild = 0
+        self.tanda_sumber = None
+        self._cek_sumber(baca_header(self.path))
+        self._muat()
+
+    def _muat(self):
+        stat = os.stat(self.path)
+        model, _, metadata, header = muat_bundle(self.path)
+        # Satu assignment tuple, sehingga thread lain selalu melihat model dan header yang cocok
+        self.aktif = (model, metadata, header, (stat.st_ino, stat.st_mtime_ns, stat.st_size))
+
+    def _cek_sumber(self, header):
+        """Membuat ulang bundle jika file sumber berbeda dengan header; True jika dibuat ulang"""
+        if self.sumber is None:
+            return False
+        from prediksi import artefak_aktif
+
+        # Pointer versi dibaca sekali, sehingga ketiga file sumber berasal dari versi yang sama
+        sumber = artefak_aktif(*self.sumber)
+        try:
+            tanda = _tanda_file(sumber)
+        except FileNotFoundError:
+            # Deployment yang hanya membawa file bundle: tidak ada yang bisa dibandingkan
+            return False
+        if tanda == self.tanda_sumber:
+            return False
+
+        berubah = sumber_berubah(header, sumber)
+        if berubah:
+            warnings.warn(f"Bundle {self.path} dibuat dari {', '.join(berubah)} versi lama, dibuat ulang dari sumber",
+                          stacklevel=2)
+            buat_bundle(*sumber, path=self.path)
+            self.jumlah_rebuild += 1
+        self.tanda_sumber = tanda
+        return bool(berubah)
+
+    @property
+    def model(self):
+        return self.aktif[0]
+
+    @property
+    def metadata(self):
+        return self.aktif[1]
+
+    @property
+    def versi(self):
+        return self.aktif[2]['versi']
+
+    @property
+    def n_features(self):
+        return self.model.n_features
+
+    def cek_reload(self):
+        """Memuat ulang jika file bundle berubah; True jika versi baru dimuat"""
+        with self.lock:
+            self._cek_sumber(self.aktif[2])
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return False
+            if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self.aktif[3]:
+                return False
+            self._muat()
+            self.jumlah_reload += 1
+            return True
+
+    def cek_berkala(self):
+        """cek_reload, paling sering sekali per interval_cek detik"""
+        if self.interval_cek is None or time.monotonic() < self.cek_berikutnya:
+            return
+        self.cek_berikutnya = time.monotonic() + self.interval_cek
+        try:
+            self.cek_reload()
+        except Exception as e:
+            # Bundle baru belum valid atau gagal dibuat ulang; tetap memakai versi yang sedang aktif
+            warnings.warn(f"Bundle {self.path} tidak dimuat ulang: {e}", stacklevel=3)
+
+    def predict(self, X, batch_size=None, verbose=0):
+        self.cek_berkala()
+        return self.model.predict(X, batch_size=batch_size, verbose=verbose)
+
+    def stats(self):
+        return {'versi': self.versi, 'path': str(self.path), 'reload': self.jumlah_reload,
+                'rebuild': self.jumlah_rebuild}
+
+if __name__ == "__main__":
+    # Membuat bundle kedua model: python model_bundle.py
+    from prediksi import (ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, STOK_METADATA_PATH,
+                          STOK_MODEL_PATH, STOK_SCALER_PATH)
+
+    parser = argparse.ArgumentParser(description="Mengemas model, scaler dan metadata menjadi satu file bundle")
+    parser.add_argument('--model', nargs='+', default=['absensi', 'stok'], choices=['absensi', 'stok'])
+    parser.add_argument('--versi', type=int, help="nomor versi (default: versi lama + 1)")
+    args = parser.parse_args()
+
+    paths = {
+        'absensi': (ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH),
+        'stok': (STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH)
+    }
+    for nama in args.model:
+        header = buat_bundle(*paths[nama], versi=args.versi)
+        path = bundle_path(paths[nama][0])
+        print(f"{nama}: versi {header['versi']}, {path.stat().st_size} byte, checksum {header['checksum'][:12]} -> {path}")
@@ -0,0 +1,175 @@
+import json
+import sys
+
+import numpy as np
+
+# Aktivasi yang didukung oleh forward pass NumPy
+AKTIVASI = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh
+}
+
+# Toleransi default untuk cek paritas terhadap output Keras
+TOLERANSI_PARITAS = 1e-5
+
+class FoldedScaler:
+    """
+    Pengganti scaler untuk backend NumPy. Mean/scale StandardScaler sudah
+    dilipat ke lapisan pertama, sehingga transform hanya meneruskan input.
+    """
+
+    def __init__(self, n_features):
+        self.n_features_in_ = n_features
+
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float64)
+
+class NumpyMLP:
+    """
+    Forward pass MLP (Dense/BatchNormalization/Dropout) dengan NumPy.
+    Antarmuka predict sama dengan keras.Model.predict.
+
+    Args:
+        lapisan (list): Daftar (kernel, bias, aktivasi) yang sudah dilipat
+        dtype: Tipe data untuk komputasi. float64 karena setelah scaler dilipat,
+               fitur menit (~480) membuat float32 kehilangan presisi
+    """
+
+    def __init__(self, lapisan, dtype=np.float64):
+        self.dtype = dtype
+        self.lapisan = [(np.ascontiguousarray(W, dtype=dtype), np.asarray(b, dtype=dtype), aktivasi)
+                        for W, b, aktivasi in lapisan]
+
+    @property
+    def n_features(self):
+        return self.lapisan[0][0].shape[0]
+
+    @classmethod
+    def from_h5(cls, model_path, scaler=None, dtype=np.float64):
+        """
+        Membaca bobot dari file .h5 (Keras Sequential) sekali dan melipat
+        StandardScaler serta BatchNormalization ke lapisan Dense
+
+        Args:
+            model_path (str | Path): Lokasi file .h5
+            scaler (StandardScaler, optional): Scaler yang akan dilipat ke lapisan pertama
+        """
+        import h5py
+
+        with h5py.File(model_path, 'r') as f:
+            config = json.loads(f.attrs['model_config'])
+            bobot = f['model_weights'] if 'model_weights' in f else f
+
+            def baca(nama):
+                grup = bobot[nama]
+                return {
+                    n.decode() if isinstance(n, bytes) else n: np.asarray(grup[n], dtype=np.float64)
+                    for n in grup.attrs['weight_names']
+                }
+
+            lapisan = []
+            # Affine per-fitur (x * a + c) yang belum diterapkan ke lapisan Dense berikutnya
+            tertunda = None
+            if scaler is not None:
+                mean = scaler.mean_ if scaler.mean_ is not None else 0.0
+                scale = scaler.scale_ if scaler.scale_ is not None else 1.0
+                tertunda = (np.broadcast_to(1 / scale, (scaler.n_features_in_,)),
+                            np.broadcast_to(-mean / scale, (scaler.n_features_in_,)))
+
+            for layer in config['config']['layers']:
+                jenis, cfg = layer['class_name'], layer['config']
+
+                if jenis in ('InputLayer', 'Dropout'):
+                    continue
+
+                w = baca(cfg['name'])
+                ambil = lambda akhiran: next(v for k, v in w.items() if k.split('/')[-1].startswith(akhiran))
+
+                if jenis == 'Dense':
+                    if cfg['activation'] not in AKTIVASI:
+                        raise ValueError(f"Aktivasi tidak didukung: {cfg['activation']}")
+                    W = ambil('kernel')
+                    b = ambil('bias') if cfg.get('use_bias', True) else np.zeros(W.shape[1])
+                    if tertunda is not None:
+                        a, c = tertunda
+                        b = c @ W + b
+                        W = a[:, None] * W
+                        tertunda = None
+                    lapisan.append((W, b, cfg['activation']))
+
+                elif jenis == 'BatchNormalization':
+                    mean, var = ambil('moving_mean'), ambil('moving_variance')
+                    gamma = ambil('gamma') if cfg.get('scale', True) else np.ones_like(mean)
+                    beta = ambil('beta') if cfg.get('center', True) else np.zeros_like(mean)
+                    a = gamma / np.sqrt(var + cfg['epsilon'])
+                    c = beta - mean * a
+                    if tertunda is not None:
+                        a, c = tertunda[0] * a, tertunda[1] * a + c
+                    tertunda = (a, c)
+
+                else:
+                    raise ValueError(f"Layer tidak didukung oleh backend NumPy: {jenis}")
+
+            if tertunda is not None:
+                a, c = tertunda
+                lapisan.append((np.diag(a), c, 'linear'))
+
+        return cls(lapisan, dtype=dtype)
+
+    def predict(self, X, batch_size=None, verbose=0):
+        """Menghitung output model, berukuran (n, 1)"""
+        h = np.asarray(X, dtype=self.dtype)
+        with np.errstate(over='ignore'):
+            for W, b, aktivasi in self.lapisan:
+                h = AKTIVASI[aktivasi](h @ W + b)
+        return h
+
+# Cek paritas backend NumPy terhadap Keras
+def cek_paritas(model_keras, scaler, model_numpy, fitur, atol=TOLERANSI_PARITAS):
+    """
+    Membandingkan output Keras (dengan scaler) dan NumpyMLP (scaler terlipat)
+
+    Args:
+        fitur (np.ndarray): Matriks fitur mentah berukuran (n, 8)
+        atol (float): Selisih absolut maksimum yang diizinkan
+
+    Returns:
+        tuple: (lolos (bool), selisih maksimum (float))
+    """
+    fitur = np.asarray(fitur, dtype=np.float64)
+    keras_out = model_keras.predict(scaler.transform(fitur), batch_size=len(fitur), verbose=0)[:, 0]
+    numpy_out = model_numpy.predict(fitur)[:, 0]
+    selisih = float(np.max(np.abs(keras_out.astype(np.float64) - numpy_out.astype(np.float64))))
+    return selisih <= atol, selisih
+
+if __name__ == "__main__":
+    # Cek paritas kedua model pada data yang dibundel: python numpy_model.py
+    import pandas as pd
+
+    from prediksi import (ABSENSI_DATA_PATH, ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH,
+                          ABSENSI_SCALER_PATH, STOK_DATA_PATH, STOK_METADATA_PATH, STOK_MODEL_PATH,
+                          STOK_SCALER_PATH, artefak_aktif, fitur_kehadiran, fitur_stok, load_model)
+
+    with open(ABSENSI_METADATA_PATH, 'r') as f:
+        metadata_absensi = json.load(f)
+    data_absensi = pd.read_csv(ABSENSI_DATA_PATH, dtype={'jam_masuk': str, 'jam_jadwal': str})
+    data_stok = pd.read_csv(STOK_DATA_PATH)
+
+    kasus = [
+        ('absensi', ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH,
+         fitur_kehadiran(metadata_absensi, data_absensi)),
+        ('stok', STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH,
+         fitur_stok(data_stok['stok_awal'], data_stok['masuk'], data_stok['keluar'], data_stok['bulan'])),
+    ]
+
+    gagal = False
+    for nama, model_path, scaler_path, metadata_path, fitur in kasus:
+        model_keras, scaler, _ = load_model(model_path, scaler_path, metadata_path, backend='keras')
+        model_numpy = NumpyMLP.from_h5(artefak_aktif(model_path, scaler_path, metadata_path)[0], scaler=scaler)
+        lolos, selisih = cek_paritas(model_keras, scaler, model_numpy, fitur)
+        print(f"{nama}: {len(fitur)} baris, selisih maksimum {selisih:.2e} -> {'OK' if lolos else 'GAGAL'}")
+        gagal |= not lolos
+
+    sys.exit(1 if gagal else 0)
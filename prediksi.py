@@ -0,0 +1,497 @@
+import importlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import metrik
+from riwayat_stok import KUNCI_ITEM, RiwayatStok
+
+# Paths to model files
+BASE_DIR = Path(__file__).resolve().parent
+
+ABSENSI_MODEL_PATH = BASE_DIR / 'absensi' / 'model' / 'absensi_model.h5'
+ABSENSI_SCALER_PATH = BASE_DIR / 'absensi' / 'model' / 'scaler.joblib'
+ABSENSI_METADATA_PATH = BASE_DIR / 'absensi' / 'model' / 'model_metadata.json'
+
+STOK_MODEL_PATH = BASE_DIR / 'stok' / 'model' / 'stok_model.h5'
+STOK_SCALER_PATH = BASE_DIR / 'stok' / 'model' / 'scaler.joblib'
+STOK_METADATA_PATH = BASE_DIR / 'stok' / 'model' / 'model_metadata.json'
+
+# File pointer di folder model yang berisi nama versi aktif di subfolder versi/ (ditulis training.py)
+POINTER_MODEL = 'AKTIF'
+
+# Data yang dibundel bersama repo
+ABSENSI_DATA_PATH = BASE_DIR / 'absensi' / 'clean_absensi.csv'
+STOK_DATA_PATH = BASE_DIR / 'stok' / 'stok_bahan_perbulan_sorted.csv'
+
+# Backend inferensi: 'keras' (TensorFlow), 'numpy' (numpy_model.NumpyMLP dari .h5)
+# atau 'bundle' (NumpyMLP dari file bundle yang di-memory-map, lihat model_bundle.py)
+BACKEND_MODEL = ('keras', 'numpy', 'bundle')
+
+# Urutan fitur harus sama dengan saat training (lihat stok/model/model_metadata.json)
+FITUR_STOK = [
+    'stok_awal',
+    'masuk',
+    'keluar',
+    'stock_movement',
+    'keluar_ma3',
+    'masuk_ma3',
+    'depletion_rate',
+    'bulan'
+]
+
+# Nama cuaca pada log absensi (bahasa Indonesia) -> kunci weather_map di metadata
+ALIAS_CUACA = {
+    'Cerah': 'Clear',
+    'Berawan': 'Clouds',
+    'Hujan': 'Rain'
+}
+
+# Jumlah baris maksimum per pemanggilan scaler.transform + model.predict
+UKURAN_CHUNK = 65536
+
+# Lokasi artefak model dari versi yang sedang aktif
+def artefak_aktif(model_path, scaler_path, metadata_path):
+    """
+    training.py menulis model, scaler dan metadata ke folder versi/<nama> lalu mengganti
+    pointer AKTIF dengan satu rename, sehingga pembaca yang membaca pointer sekali selalu
+    mendapat ketiga file dari versi yang sama. Tanpa pointer, file di folder model dipakai.
+
+    Returns:
+        tuple: (model_path, scaler_path, metadata_path)
+    """
+    folder = Path(model_path).parent
+    try:
+        versi = (folder / POINTER_MODEL).read_text().strip()
+    except FileNotFoundError:
+        return Path(model_path), Path(scaler_path), Path(metadata_path)
+    return tuple(folder / 'versi' / versi / Path(p).name for p in (model_path, scaler_path, metadata_path))
+
+# Mengimpor modul berat milik backend (dipisah agar waktu impor bisa diukur)
+@metrik.diukur('import_backend')
+def import_backend(backend='keras'):
+    if backend not in BACKEND_MODEL:
+        raise ValueError(f"Backend tidak dikenal: {backend} (pilihan: {', '.join(BACKEND_MODEL)})")
+
+    # Modul hanya diimpor agar biayanya tercatat di sini; load_model mengimpornya lagi dari cache
+    modul = {'bundle': ('model_bundle',), 'keras': ('joblib', 'tensorflow.keras.models'),
+             'numpy': ('joblib', 'numpy_model')}[backend]
+    for nama in modul:
+        importlib.import_module(nama)
+
+# Memuat model, scaler dan metadata tanpa bergantung pada Streamlit
+@metrik.diukur('load_model')
+def load_model(model_path, scaler_path, metadata_path, backend='keras'):
+    """
+    Memuat model beserta scaler dan metadata
+
+    Args:
+        backend (str): 'keras' memakai TensorFlow; 'numpy' membaca bobot .h5 ke
+                       NumpyMLP dengan scaler yang sudah dilipat ke lapisan pertama;
+                       'bundle' memakai bundle_path(model_path) dengan hot reload
+
+    Returns:
+        tuple: (model, scaler, metadata)
+    """
+    if backend not in BACKEND_MODEL:
+        raise ValueError(f"Backend tidak dikenal: {backend} (pilihan: {', '.join(BACKEND_MODEL)})")
+
+    if backend == 'bundle':
+        from model_bundle import MetadataBundle, ModelBundle, bundle_path
+        from numpy_model import FoldedScaler
+
+        path = bundle_path(model_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Bundle {path} belum dibuat, jalankan: python model_bundle.py")
+        # Bundle yang dibuat dari .h5/scaler lama dibuat ulang dari sumbernya
+        model = ModelBundle(path, sumber=(model_path, scaler_path, metadata_path))
+        # Metadata mengikuti versi bundle yang aktif, termasuk setelah hot reload
+        return model, FoldedScaler(model.n_features), MetadataBundle(model)
+
+    import joblib
+
+    model_path, scaler_path, metadata_path = artefak_aktif(model_path, scaler_path, metadata_path)
+    scaler = joblib.load(scaler_path)
+
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    if backend == 'keras':
+        from tensorflow.keras import models
+        model = models.load_model(model_path)
+    else:
+        from numpy_model import FoldedScaler, NumpyMLP
+        model = NumpyMLP.from_h5(model_path, scaler=scaler)
+        scaler = FoldedScaler(model.n_features)
+
+    return model, scaler, metadata
+
+# Helper untuk menjalankan scaler + model pada matriks fitur
+def prediksi_probabilitas(model, scaler, fitur, chunk_size=UKURAN_CHUNK):
+    """
+    Menjalankan scaler.transform dan model.predict per chunk
+
+    Args:
+        fitur (np.ndarray): Matriks fitur mentah berukuran (n, 8)
+        chunk_size (int): Jumlah baris per pemanggilan model
+
+    Returns:
+        np.ndarray: Probabilitas berukuran (n,)
+    """
+    fitur = np.asarray(fitur, dtype=np.float64)
+    hasil = np.empty(len(fitur), dtype=np.float64)
+
+    for mulai in range(0, len(fitur), chunk_size):
+        chunk = fitur[mulai:mulai + chunk_size]
+        with metrik.ukur('scaler.transform'):
+            chunk_scaled = scaler.transform(chunk)
+        with metrik.ukur('model.predict'):
+            hasil[mulai:mulai + len(chunk)] = model.predict(chunk_scaled, batch_size=len(chunk), verbose=0)[:, 0]
+
+    metrik.tambah('baris_diprediksi', len(fitur))
+    return hasil
+
+# Menyusun fitur stok dalam bentuk vektor
+def fitur_stok(stok_awal, masuk, keluar, bulan, keluar_ma3=None, masuk_ma3=None):
+    """
+    Menyusun matriks fitur stok (n, 8) sesuai urutan FITUR_STOK
+
+    Args:
+        stok_awal, masuk, keluar, bulan (array-like): Kolom data stok
+        keluar_ma3, masuk_ma3 (array-like, optional): Rata-rata 3 bulan terakhir.
+                                                      Jika None, memakai nilai bulan ini
+    """
+    stok_awal = np.asarray(stok_awal, dtype=np.float64)
+    masuk = np.asarray(masuk, dtype=np.float64)
+    keluar = np.asarray(keluar, dtype=np.float64)
+    bulan = np.asarray(bulan, dtype=np.float64)
+
+    if keluar_ma3 is None:
+        keluar_ma3 = keluar
+    if masuk_ma3 is None:
+        masuk_ma3 = masuk
+
+    # depletion_rate (set to 1.0 if no stock)
+    depletion_rate = np.divide(keluar, stok_awal, out=np.ones_like(keluar), where=stok_awal > 0)
+
+    return np.column_stack([
+        stok_awal,
+        masuk,
+        keluar,
+        masuk - keluar,  # stock_movement
+        np.asarray(keluar_ma3, dtype=np.float64),
+        np.asarray(masuk_ma3, dtype=np.float64),
+        depletion_rate,
+        bulan
+    ])
+
+# Aturan status stok (dipakai oleh prediksi tunggal maupun batch)
+def status_stok(stok_awal, keluar, probabilitas):
+    """
+    Menentukan status dan estimasi hari habis untuk setiap baris
+
+    Returns:
+        tuple: (status (np.ndarray of str), hari_habis (np.ndarray of int, -1 jika stabil))
+    """
+    stok_awal = np.asarray(stok_awal, dtype=np.float64)
+    keluar = np.asarray(keluar, dtype=np.float64)
+    probabilitas = np.asarray(probabilitas, dtype=np.float64)
+
+    # Calculate estimated days until depletion
+    ada_keluar = keluar > 0
+    hari_habis = np.full(len(keluar), -1, dtype=np.int64)
+    rasio = np.divide(stok_awal, keluar, out=np.zeros_like(stok_awal), where=ada_keluar)
+    hari_habis[ada_keluar] = np.maximum(1, np.ceil(rasio[ada_keluar])).astype(np.int64)
+
+    # Adjusted thresholds based on domain knowledge
+    berisiko = (stok_awal == 0) | (probabilitas > 0.7)
+    stabil = (probabilitas > 0.4) | (ada_keluar & (hari_habis < 14))
+    status = np.where(berisiko, "Berisiko", np.where(stabil, "Stabil", "Aman"))
+
+    return status, hari_habis
+
+def _format_estimasi(hari_habis):
+    return np.where(hari_habis >= 0, pd.Series(hari_habis).astype(str).to_numpy() + " Hari", "Stabil")
+
+# Helper function for stok prediction
+@metrik.diukur('stok.total')
+def prediksi_stok(model, scaler, metadata, nama_barang, stok_awal, masuk, keluar, satuan, bulan, riwayat=None):
+    """
+    Memprediksi risiko kehabisan stok untuk suatu barang
+
+    Args:
+        nama_barang (str): Nama barang yang akan diprediksi
+        stok_awal (int): Jumlah stok awal
+        masuk (int): Jumlah barang masuk
+        keluar (int): Jumlah barang keluar
+        satuan (str): Satuan barang (Ekor/Sachet/Kg/dll)
+        bulan (int): Bulan (1-12)
+        riwayat (RiwayatStok, optional): Riwayat per item untuk keluar_ma3/masuk_ma3.
+                                         Jika None, memakai nilai bulan ini
+    """
+    # Clean up satuan input
+    satuan = satuan.strip().capitalize()
+
+    # Prepare features
+    with metrik.ukur('stok.fitur'):
+        if riwayat is not None:
+            keluar_ma3, masuk_ma3 = riwayat.moving_average(nama_barang, masuk, keluar)
+            features = fitur_stok([stok_awal], [masuk], [keluar], [bulan], [keluar_ma3], [masuk_ma3])
+        else:
+            features = fitur_stok([stok_awal], [masuk], [keluar], [bulan])
+
+    # Make prediction
+    prediction = float(prediksi_probabilitas(model, scaler, features)[0])
+
+    status, hari_habis = status_stok([stok_awal], [keluar], [prediction])
+
+    # Format output
+    return {
+        'nama_barang': nama_barang,
+        'stok_tersedia': int(stok_awal),
+        'satuan': satuan,
+        'estimasi_habis': str(_format_estimasi(hari_habis)[0]),
+        'probabilitas': prediction,
+        'status': str(status[0])
+    }
+
+# Prediksi stok untuk seluruh baris ledger sekaligus
+@metrik.diukur('stok_batch.total')
+def prediksi_stok_batch(model, scaler, metadata, data, chunk_size=UKURAN_CHUNK, riwayat=None, kunci=KUNCI_ITEM,
+                        berurutan=True):
+    """
+    Memprediksi risiko kehabisan stok untuk banyak barang sekaligus.
+    Hasil per baris sama dengan memanggil prediksi_stok baris demi baris
+    sambil mencatat setiap baris ke riwayat.
+
+    Args:
+        data (pd.DataFrame | dict): Kolom stok_awal, masuk, keluar, bulan
+                                    (opsional: nama_barang, satuan), urut waktu
+        chunk_size (int): Jumlah baris per pemanggilan model.predict
+        riwayat (RiwayatStok, optional): Periode sebelum baris pertama data.
+                                         Riwayat tidak diubah
+        kunci (str): Kolom item untuk moving average; jika tidak ada,
+                     keluar_ma3/masuk_ma3 memakai nilai bulan ini
+        berurutan (bool): False jika setiap baris adalah permintaan terpisah di atas
+                          riwayat (bukan periode berturut-turut), lihat RiwayatStok
+
+    Returns:
+        pd.DataFrame: Kolom nama_barang, stok_tersedia, satuan, estimasi_habis,
+                      probabilitas, status dengan index yang sama dengan input
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+    stok_awal = df['stok_awal'].to_numpy()
+    keluar = df['keluar'].to_numpy()
+
+    masuk = df['masuk'].to_numpy()
+
+    # Moving average 3 periode per item, dilanjutkan dari riwayat jika ada
+    with metrik.ukur('stok_batch.fitur'):
+        keluar_ma3 = masuk_ma3 = None
+        if kunci in df:
+            riwayat = riwayat if riwayat is not None else RiwayatStok()
+            keluar_ma3, masuk_ma3 = riwayat.moving_average_batch(df[kunci].to_numpy(), masuk, keluar, berurutan)
+
+        fitur = fitur_stok(stok_awal, masuk, keluar, df['bulan'].to_numpy(), keluar_ma3, masuk_ma3)
+    probabilitas = prediksi_probabilitas(model, scaler, fitur, chunk_size=chunk_size)
+    status, hari_habis = status_stok(stok_awal, keluar, probabilitas)
+
+    hasil = pd.DataFrame(index=df.index)
+    if 'nama_barang' in df:
+        hasil['nama_barang'] = df['nama_barang']
+    hasil['stok_tersedia'] = stok_awal.astype(np.int64)
+    if 'satuan' in df:
+        hasil['satuan'] = df['satuan'].astype(str).str.strip().str.capitalize()
+    hasil['estimasi_habis'] = _format_estimasi(hari_habis)
+    hasil['probabilitas'] = probabilitas
+    hasil['status'] = status
+
+    return hasil
+
+# Helper function for absensi prediction
+@metrik.diukur('absensi.total')
+def prediksi_kehadiran(model, scaler, metadata, hari_string, jam_jadwal, kondisi_cuaca, jam_masuk=None):
+    """
+    Memprediksi kehadiran menggunakan data cuaca dari database
+
+    Args:
+        hari_string (str): Nama hari dalam bahasa Inggris (e.g., 'Monday', 'Tuesday', etc.)
+        jam_jadwal (str): Waktu jadwal dalam format "HH:MM"
+        kondisi_cuaca (str): Kondisi cuaca ('Clear', 'Clouds', 'Rain', 'Thunderstorm')
+        jam_masuk (str, optional): Waktu kedatangan dalam format "HH:MM". 
+                                 Jika None, akan menggunakan jam_jadwal untuk simulasi
+    """
+    with metrik.ukur('absensi.fitur'):
+        # Konversi nama hari ke angka (0-6)
+        day_map = metadata['day_map']
+        hari = day_map.get(hari_string, 0)  # Default ke Senin jika tidak dikenal
+
+        # Konversi waktu jadwal dari string "HH:MM" ke menit
+        if ":" in jam_jadwal:
+            parts = jam_jadwal.split(":")
+            if len(parts) >= 2:
+                jam, menit = int(parts[0]), int(parts[1])
+                waktu_jadwal = jam * 60 + menit
+            else:
+                waktu_jadwal = 0
+        else:
+            waktu_jadwal = 0
+
+        # Konversi waktu kedatangan
+        if jam_masuk and ":" in jam_masuk:
+            parts = jam_masuk.split(":")
+            if len(parts) >= 2:
+                jam, menit = int(parts[0]), int(parts[1])
+                waktu_kedatangan = jam * 60 + menit
+            else:
+                waktu_kedatangan = waktu_jadwal
+        else:
+            # Jika tidak ada jam_masuk yang valid, gunakan jam_jadwal untuk simulasi
+            waktu_kedatangan = waktu_jadwal
+
+        # Menghitung selisih waktu (dalam menit)
+        selisih_waktu = waktu_kedatangan - waktu_jadwal
+
+        # Memetakan kondisi cuaca ke kategori yang digunakan saat training
+        kondisi_cuaca = ALIAS_CUACA.get(kondisi_cuaca, kondisi_cuaca)
+        weather_map = metadata['weather_map']
+        cuaca_vector = weather_map.get(kondisi_cuaca, [1, 0, 0])  # Default to Clear if unknown
+
+        # Menyiapkan fitur-fitur dalam urutan yang sama dengan training
+        fitur = [
+            waktu_jadwal,                    # scheduled_time
+            waktu_kedatangan,                # arrival_time 
+            hari,                            # day_of_week
+            1 if hari == 0 else 0,           # is_monday
+            1 if hari == 4 else 0,           # is_friday
+            cuaca_vector[0],                 # weather_0
+            cuaca_vector[1],                 # weather_1
+            cuaca_vector[2]                  # weather_2
+        ]
+
+    # Mendapatkan probabilitas prediksi menggunakan scaler + model
+    prediksi = float(prediksi_probabilitas(model, scaler, np.array([fitur]))[0])
+
+    # Menentukan toleransi berdasarkan cuaca
+    toleransi = metadata['tolerances'].get(kondisi_cuaca, 1)
+
+    # Menentukan keterlambatan berdasarkan selisih waktu dan toleransi
+    is_terlambat = selisih_waktu > toleransi  # Terlambat jika selisih waktu lebih dari toleransi
+
+    return {
+        'probabilitas_prediksi': prediksi,
+        'kondisi_cuaca': kondisi_cuaca,
+        'toleransi_menit': toleransi,
+        'kemungkinan_terlambat': is_terlambat,
+        'waktu_jadwal': jam_jadwal,
+        'waktu_kedatangan': jam_masuk if jam_masuk else f"{(waktu_kedatangan // 60):02d}:{(waktu_kedatangan % 60):02d}",
+        'selisih_menit': selisih_waktu
+    }
+
+# Mengubah kolom waktu "HH:MM" / "HH:MM:SS" menjadi menit sejak tengah malam
+def parse_menit(waktu):
+    """
+    Parsing waktu secara vektor
+
+    Args:
+        waktu (array-like of str): Waktu dalam format "HH:MM" atau "HH:MM:SS"
+
+    Returns:
+        np.ndarray: Menit sejak tengah malam (float, NaN jika format tidak valid)
+    """
+    bagian = pd.Series(waktu, dtype=object).astype(str).str.extract(r'^\s*(\d+)\s*:\s*(\d+)')
+    return (bagian[0].astype(float) * 60 + bagian[1].astype(float)).to_numpy()
+
+def _format_menit(menit):
+    menit = pd.Series(menit, dtype=np.int64)
+    return ((menit // 60).astype(str).str.zfill(2) + ":" + (menit % 60).astype(str).str.zfill(2)).to_numpy()
+
+# Menyusun fitur absensi dan tabel lookup untuk banyak baris
+def _siapkan_kehadiran(metadata, df):
+    n = len(df)
+
+    # Konversi nama hari ke angka (0-6), default ke Senin jika tidak dikenal
+    hari = df['hari'].map(metadata['day_map']).fillna(0).to_numpy(dtype=np.float64)
+
+    # Konversi waktu jadwal dan kedatangan ke menit
+    waktu_jadwal = parse_menit(df['jam_jadwal'])
+    waktu_jadwal = np.where(np.isnan(waktu_jadwal), 0, waktu_jadwal)
+    if 'jam_masuk' in df:
+        jam_masuk = df['jam_masuk']
+        waktu_kedatangan = parse_menit(jam_masuk)
+        ada_jam_masuk = jam_masuk.notna().to_numpy() & (jam_masuk.astype(str).to_numpy() != "")
+    else:
+        waktu_kedatangan = np.full(n, np.nan)
+        ada_jam_masuk = np.zeros(n, dtype=bool)
+    waktu_kedatangan = np.where(np.isnan(waktu_kedatangan), waktu_jadwal, waktu_kedatangan)
+
+    # Lookup cuaca dan toleransi dengan indeks array; baris terakhir = default untuk cuaca tidak dikenal
+    kondisi_cuaca = df['cuaca'].map(lambda c: ALIAS_CUACA.get(c, c))
+    kategori = list(metadata['weather_map'].keys())
+    tabel_cuaca = np.array([metadata['weather_map'][c] for c in kategori] + [[1, 0, 0]], dtype=np.float64)
+    tabel_toleransi = np.array([metadata['tolerances'].get(c, 1) for c in kategori] + [1])
+    kode_cuaca = pd.Categorical(kondisi_cuaca, categories=kategori).codes.astype(np.int64)
+    kode_cuaca[kode_cuaca < 0] = len(kategori)
+    cuaca_vector = tabel_cuaca[kode_cuaca]
+
+    # Menyiapkan fitur-fitur dalam urutan yang sama dengan training
+    fitur = np.column_stack([
+        waktu_jadwal,                    # scheduled_time
+        waktu_kedatangan,                # arrival_time
+        hari,                            # day_of_week
+        hari == 0,                       # is_monday
+        hari == 4,                       # is_friday
+        cuaca_vector                     # weather_0, weather_1, weather_2
+    ]).astype(np.float64)
+
+    return fitur, kondisi_cuaca, kode_cuaca, tabel_toleransi, ada_jam_masuk
+
+def fitur_kehadiran(metadata, data):
+    """
+    Menyusun matriks fitur absensi (n, 8) dari roster/log absensi
+
+    Args:
+        data (pd.DataFrame | dict): Kolom hari, jam_jadwal, cuaca dan (opsional) jam_masuk
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    return _siapkan_kehadiran(metadata, df)[0]
+
+# Prediksi kehadiran untuk banyak baris sekaligus (roster harian / log absensi)
+@metrik.diukur('absensi_batch.total')
+def prediksi_kehadiran_batch(model, scaler, metadata, data, chunk_size=UKURAN_CHUNK):
+    """
+    Memprediksi kehadiran untuk banyak karyawan sekaligus.
+    Hasil per baris sama dengan prediksi_kehadiran.
+
+    Args:
+        data (pd.DataFrame | dict): Kolom hari, jam_jadwal, cuaca dan (opsional) jam_masuk,
+                                    sesuai format log absensi (clean_absensi.csv)
+        chunk_size (int): Jumlah baris per pemanggilan model.predict
+
+    Returns:
+        pd.DataFrame: Kolom yang sama dengan hasil prediksi_kehadiran,
+                      dengan index yang sama dengan input
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    with metrik.ukur('absensi_batch.fitur'):
+        fitur, kondisi_cuaca, kode_cuaca, tabel_toleransi, ada_jam_masuk = _siapkan_kehadiran(metadata, df)
+    waktu_jadwal, waktu_kedatangan = fitur[:, 0], fitur[:, 1]
+
+    probabilitas = prediksi_probabilitas(model, scaler, fitur, chunk_size=chunk_size)
+
+    selisih_waktu = (waktu_kedatangan - waktu_jadwal).astype(np.int64)
+    toleransi = tabel_toleransi[kode_cuaca]
+
+    return pd.DataFrame({
+        'probabilitas_prediksi': probabilitas,
+        'kondisi_cuaca': kondisi_cuaca.to_numpy(),
+        'toleransi_menit': toleransi,
+        'kemungkinan_terlambat': selisih_waktu > toleransi,
+        'waktu_jadwal': df['jam_jadwal'].to_numpy(),
+        'waktu_kedatangan': np.where(ada_jam_masuk, df['jam_masuk'].to_numpy() if 'jam_masuk' in df else None,
+                                     _format_menit(waktu_kedatangan)),
+        'selisih_menit': selisih_waktu
+    }, index=df.index)
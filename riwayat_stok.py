@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+# Notebook training menghitung keluar_ma3/masuk_ma3 dengan groupby('nama_barang'),
+# karena kode barang di ledger unik per baris
+KUNCI_ITEM = 'nama_barang'
+
+# Panjang jendela moving average (baris saat ini + 2 periode sebelumnya)
+JENDELA_MA = 3
+
+def jendela_per_baris(kunci, nilai, jendela=JENDELA_MA, awal=None):
+    """
+    Menyusun jendela rolling per item untuk setiap baris secara vektor
+
+    Args:
+        kunci (array-like): Kunci item per baris (urutan baris = urutan waktu)
+        nilai (array-like): Nilai per baris
+        awal (np.ndarray, optional): Riwayat sebelum baris pertama, berukuran (n, jendela - 1)
+                                     per baris dengan kolom terakhir = periode terbaru (NaN jika kosong)
+
+    Returns:
+        np.ndarray: Matriks (n, jendela); kolom 0 = baris ini, kolom k = k periode sebelumnya,
+                    NaN jika tidak ada
+    """
+    kunci = pd.Series(np.asarray(kunci))
+    nilai = pd.Series(np.asarray(nilai, dtype=np.float64))
+    grup = nilai.groupby(kunci.to_numpy(), sort=False)
+    posisi = grup.cumcount().to_numpy()
+
+    hasil = np.full((len(nilai), jendela), np.nan)
+    hasil[:, 0] = nilai.to_numpy()
+    for k in range(1, jendela):
+        hasil[:, k] = grup.shift(k).to_numpy()
+        if awal is not None:
+            # Baris ke-p dalam grup mengambil lag k > p dari riwayat sebelumnya
+            dari_awal = posisi < k
+            kolom = awal.shape[1] - (k - posisi[dari_awal])
+            hasil[dari_awal, k] = awal[dari_awal, kolom]
+    return hasil
+
+def rata_rata_jendela(matriks):
+    """Rata-rata jendela dengan min_periods=1 (sama dengan rolling(3, min_periods=1).mean())"""
+    terisi = ~np.isnan(matriks)
+    return np.where(terisi, matriks, 0).sum(axis=1) / np.maximum(terisi.sum(axis=1), 1)
+
+class RiwayatStok:
+    """
+    Menyimpan masuk/keluar beberapa periode terakhir per item dalam array
+    berukuran (n_item, JENDELA_MA - 1), kolom terakhir = periode terbaru.
+    Update satu periode baru adalah O(1).
+    """
+
+    def __init__(self, kapasitas=64, jendela=JENDELA_MA):
+        self.jendela = jendela
+        self.indeks = {}
+        self.masuk = np.full((kapasitas, jendela - 1), np.nan)
+        self.keluar = np.full((kapasitas, jendela - 1), np.nan)
+
+    def __len__(self):
+        return len(self.indeks)
+
+    def __contains__(self, item):
+        return item in self.indeks
+
+    @classmethod
+    def from_frame(cls, df, kunci=KUNCI_ITEM, jendela=JENDELA_MA):
+        """Mengisi riwayat dari ledger (baris urut waktu), misalnya stok_bahan_perbulan_sorted.csv"""
+        riwayat = cls(kapasitas=max(64, df[kunci].nunique()), jendela=jendela)
+        riwayat.update_batch(df[kunci].to_numpy(), df['masuk'].to_numpy(), df['keluar'].to_numpy())
+        return riwayat
+
+    @classmethod
+    def from_csv(cls, path, kunci=KUNCI_ITEM, jendela=JENDELA_MA):
+        return cls.from_frame(pd.read_csv(path, usecols=[kunci, 'masuk', 'keluar']), kunci=kunci, jendela=jendela)
+
+    def _baris(self, item):
+        # Menambah baris untuk item baru, kapasitas digandakan jika penuh
+        if item not in self.indeks:
+            if len(self.indeks) == len(self.masuk):
+                kosong = np.full_like(self.masuk, np.nan)
+                self.masuk = np.vstack([self.masuk, kosong])
+                self.keluar = np.vstack([self.keluar, kosong.copy()])
+            self.indeks[item] = len(self.indeks)
+        return self.indeks[item]
+
+    def update(self, item, masuk, keluar):
+        """Mencatat satu periode baru untuk item"""
+        i = self._baris(item)
+        self.masuk[i, :-1] = self.masuk[i, 1:]
+        self.keluar[i, :-1] = self.keluar[i, 1:]
+        self.masuk[i, -1] = masuk
+        self.keluar[i, -1] = keluar
+
+    def update_batch(self, items, masuk, keluar):
+        """Mencatat banyak periode sekaligus (baris urut waktu, item boleh berulang)"""
+        items = np.asarray(items)
+        if len(items) == 0:
+            return
+
+        awal = self.riwayat_awal(items)
+        jendela_masuk = jendela_per_baris(items, masuk, self.jendela, awal[0])
+        jendela_keluar = jendela_per_baris(items, keluar, self.jendela, awal[1])
+
+        # Baris terakhir tiap item menyimpan jendela terbaru; urutan kolom dibalik (terbaru di kanan)
+        terakhir = ~pd.Series(items).duplicated(keep='last').to_numpy()
+        baris = np.array([self._baris(item) for item in items[terakhir]])
+        self.masuk[baris] = jendela_masuk[terakhir, :self.jendela - 1][:, ::-1]
+        self.keluar[baris] = jendela_keluar[terakhir, :self.jendela - 1][:, ::-1]
+
+    def riwayat_awal(self, items):
+        """Riwayat tersimpan per baris items, berukuran (n, JENDELA_MA - 1) untuk masuk dan keluar"""
+        baris = pd.Series(items).map(self.indeks).fillna(-1).to_numpy(dtype=np.int64)
+        ada = baris >= 0
+        masuk = np.full((len(baris), self.jendela - 1), np.nan)
+        keluar = np.full((len(baris), self.jendela - 1), np.nan)
+        masuk[ada] = self.masuk[baris[ada]]
+        keluar[ada] = self.keluar[baris[ada]]
+        return masuk, keluar
+
+    def jumlah_periode(self, item):
+        """Jumlah periode tersimpan untuk item (maksimum JENDELA_MA - 1)"""
+        if item not in self.indeks:
+            return 0
+        return int(np.count_nonzero(~np.isnan(self.masuk[self.indeks[item]])))
+
+    def moving_average(self, item, masuk, keluar):
+        """
+        Menghitung keluar_ma3 dan masuk_ma3 untuk periode baru (belum dicatat)
+
+        Returns:
+            tuple: (keluar_ma3, masuk_ma3)
+        """
+        if item not in self.indeks:
+            return float(keluar), float(masuk)
+
+        i = self.indeks[item]
+        terisi = ~np.isnan(self.keluar[i])
+        jumlah = np.count_nonzero(terisi) + 1
+        keluar_ma3 = (self.keluar[i][terisi].sum() + keluar) / jumlah
+        masuk_ma3 = (self.masuk[i][terisi].sum() + masuk) / jumlah
+        return float(keluar_ma3), float(masuk_ma3)
+
+    def moving_average_batch(self, items, masuk, keluar, berurutan=True):
+        """
+        Menghitung keluar_ma3 dan masuk_ma3 untuk baris-baris baru,
+        dengan riwayat tersimpan sebagai periode sebelum baris pertama
+
+        Args:
+            berurutan (bool): True jika baris urut waktu (baris item yang sama adalah
+                              periode berturut-turut). False jika setiap baris berdiri
+                              sendiri di atas riwayat, seperti memanggil moving_average per baris
+
+        Returns:
+            tuple: (keluar_ma3 (np.ndarray), masuk_ma3 (np.ndarray))
+        """
+        items = np.asarray(items)
+        awal_masuk, awal_keluar = self.riwayat_awal(items)
+
+        if not berurutan:
+            jendela_keluar = np.column_stack([np.asarray(keluar, dtype=np.float64), awal_keluar[:, ::-1]])
+            jendela_masuk = np.column_stack([np.asarray(masuk, dtype=np.float64), awal_masuk[:, ::-1]])
+            return rata_rata_jendela(jendela_keluar), rata_rata_jendela(jendela_masuk)
+
+        keluar_ma3 = rata_rata_jendela(jendela_per_baris(items, keluar, self.jendela, awal_keluar))
+        masuk_ma3 = rata_rata_jendela(jendela_per_baris(items, masuk, self.jendela, awal_masuk))
+        return keluar_ma3, masuk_ma3
@@ -0,0 +1,337 @@
+import argparse
+import json
+import math
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import metrik
+from prediksi import (ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, BACKEND_MODEL,
+                      STOK_DATA_PATH, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, load_model,
+                      prediksi_kehadiran_batch, prediksi_stok_batch)
+from stok_store import StokStore
+
+# Default micro-batching
+MAX_BATCH = 256
+MAX_WAIT_MS = 5.0
+
+# Field wajib per endpoint (format input sama dengan README absensi/stok)
+FIELD_ABSENSI = ('hari', 'jam_jadwal', 'kondisi_cuaca')
+FIELD_STOK = ('nama_barang', 'stok_awal', 'masuk', 'keluar', 'bulan')
+
+POLA_JAM = re.compile(r'^\s*([01]?\d|2[0-3])\s*:\s*([0-5]\d)(:[0-5]\d)?\s*$')
+
+class MicroBatcher:
+    """
+    Menggabungkan permintaan yang datang bersamaan menjadi satu pemanggilan batch.
+    Satu thread worker menunggu permintaan pertama, lalu mengumpulkan permintaan
+    berikutnya sampai max_batch tercapai atau max_wait_ms habis.
+
+    Args:
+        fungsi_batch (callable): Menerima list payload, mengembalikan list hasil dengan urutan sama
+        max_batch (int): Ukuran batch maksimum
+        max_wait_ms (float): Waktu tunggu maksimum setelah permintaan pertama
+    """
+
+    def __init__(self, fungsi_batch, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, nama="batcher"):
+        self.fungsi_batch = fungsi_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.antrian = queue.Queue()
+        self.lock = threading.Lock()
+        self.jumlah_permintaan = 0
+        self.jumlah_batch = 0
+        self.ukuran_batch = Counter()
+        self.waktu_batch = 0.0
+        self.thread = threading.Thread(target=self._loop, name=nama, daemon=True)
+        self.thread.start()
+
+    def submit(self, payload):
+        """Mengantrikan satu payload, mengembalikan Future berisi hasilnya"""
+        future = Future()
+        self.antrian.put((payload, future))
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self.antrian.get()]
+            batas = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                sisa = batas - time.perf_counter()
+                try:
+                    batch.append(self.antrian.get(timeout=sisa) if sisa > 0 else self.antrian.get_nowait())
+                except queue.Empty:
+                    break
+
+            mulai = time.perf_counter()
+            metrik.tambah(f"{self.thread.name}.permintaan", len(batch))
+            try:
+                hasil = self.fungsi_batch([payload for payload, _ in batch])
+                for (_, future), item in zip(batch, hasil):
+                    future.set_result(item)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    # Satu payload yang gagal tidak boleh menggagalkan permintaan klien lain di batch yang sama
+                    metrik.tambah(f"{self.thread.name}.batch_gagal")
+                    self._satu_per_satu(batch)
+
+            with self.lock:
+                self.jumlah_permintaan += len(batch)
+                self.jumlah_batch += 1
+                self.ukuran_batch[len(batch)] += 1
+                self.waktu_batch += time.perf_counter() - mulai
+
+    def _satu_per_satu(self, batch):
+        for payload, future in batch:
+            try:
+                future.set_result(self.fungsi_batch([payload])[0])
+            except Exception as e:
+                future.set_exception(e)
+
+    def stats(self):
+        """Statistik antrian dan ukuran batch"""
+        with self.lock:
+            # Histogram ukuran batch dengan bucket pangkat dua (1, 2, 4, ...)
+            histogram = Counter()
+            for ukuran, jumlah in self.ukuran_batch.items():
+                histogram[1 << (ukuran - 1).bit_length()] += jumlah
+            return {
+                'queue_depth': self.antrian.qsize(),
+                'requests': self.jumlah_permintaan,
+                'batches': self.jumlah_batch,
+                'mean_batch_size': self.jumlah_permintaan / self.jumlah_batch if self.jumlah_batch else 0.0,
+                'max_batch_size': max(self.ukuran_batch, default=0),
+                'batch_size_histogram': {f"<={k}": v for k, v in sorted(histogram.items())},
+                'mean_batch_ms': 1000 * self.waktu_batch / self.jumlah_batch if self.jumlah_batch else 0.0
+            }
+
+def _angka(payload, field, wajib=True):
+    # Angka JSON (atau string angka) yang berhingga; bool tidak diterima
+    nilai = payload.get(field)
+    if nilai is None and not wajib:
+        return None
+    if isinstance(nilai, bool) or not isinstance(nilai, (int, float, str)):
+        raise ValueError(f"{field} harus berupa angka")
+    try:
+        nilai = float(nilai)
+    except ValueError:
+        raise ValueError(f"{field} harus berupa angka") from None
+    if not math.isfinite(nilai):
+        raise ValueError(f"{field} harus berupa angka berhingga")
+    return nilai
+
+def _teks(payload, field, wajib=True):
+    nilai = payload.get(field)
+    if nilai is None and not wajib:
+        return None
+    if not isinstance(nilai, str):
+        raise ValueError(f"{field} harus berupa teks")
+    return nilai
+
+def _jam(payload, field, wajib=True):
+    # Format "HH:MM" (atau "HH:MM:SS"); jam_masuk kosong berarti tepat waktu seperti di prediksi_kehadiran
+    nilai = _teks(payload, field, wajib)
+    if not wajib and not nilai:
+        return None
+    if not POLA_JAM.match(nilai):
+        raise ValueError(f"{field} harus berformat HH:MM")
+    return nilai
+
+# Memvalidasi dan menormalkan satu payload sebelum masuk antrian batch
+def validasi_absensi(payload):
+    """
+    Returns:
+        dict: hari, jam_jadwal, kondisi_cuaca, jam_masuk (None jika tidak diisi)
+
+    Raises:
+        ValueError: Jika field tidak ada atau formatnya salah
+    """
+    return {
+        'hari': _teks(payload, 'hari'),
+        'jam_jadwal': _jam(payload, 'jam_jadwal'),
+        'kondisi_cuaca': _teks(payload, 'kondisi_cuaca'),
+        'jam_masuk': _jam(payload, 'jam_masuk', wajib=False)
+    }
+
+def validasi_stok(payload):
+    """
+    Returns:
+        dict: nama_barang, stok_awal, masuk, keluar (float), bulan (int 1-12), satuan
+
+    Raises:
+        ValueError: Jika field tidak ada, bukan angka berhingga, atau bulan di luar 1-12
+    """
+    bulan = _angka(payload, 'bulan')
+    if bulan != int(bulan) or not 1 <= bulan <= 12:
+        raise ValueError("bulan harus bilangan bulat 1-12")
+    return {
+        'nama_barang': _teks(payload, 'nama_barang'),
+        'stok_awal': _angka(payload, 'stok_awal'),
+        'masuk': _angka(payload, 'masuk'),
+        'keluar': _angka(payload, 'keluar'),
+        'bulan': int(bulan),
+        'satuan': _teks(payload, 'satuan', wajib=False) or ''
+    }
+
+def _ke_json(hasil):
+    # Mengubah tipe NumPy di hasil DataFrame menjadi tipe Python
+    return [{k: (v.item() if hasattr(v, 'item') else v) for k, v in baris.items()}
+            for baris in hasil.to_dict('records')]
+
+class LayananPrediksi:
+    """Model absensi dan stok beserta micro-batcher masing-masing"""
+
+    def __init__(self, backend='keras', max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, lut=False, presisi=None,
+                 batas_flip=None):
+        if presisi:
+            # Kalibrasi menolak (ValueError) jika terlalu banyak label berubah; server tidak dijalankan
+            from kuantisasi import BATAS_FLIP, muat_kuantisasi
+            batas_flip = BATAS_FLIP if batas_flip is None else batas_flip
+            self.absensi = muat_kuantisasi('absensi', presisi, batas_flip)[:3]
+            self.stok = muat_kuantisasi('stok', presisi, batas_flip)[:3]
+        else:
+            self.absensi = load_model(ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH, backend=backend)
+            self.stok = load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, backend=backend)
+        if lut:
+            from absensi_lut import pasang_tabel
+            model, scaler, metadata = self.absensi
+            self.absensi = (*pasang_tabel(model, scaler), metadata)
+        self.riwayat = StokStore.buka(csv_path=STOK_DATA_PATH).riwayat()
+
+        self.batcher = {
+            'absensi': MicroBatcher(self.batch_absensi, max_batch, max_wait_ms, nama="batcher-absensi"),
+            'stok': MicroBatcher(self.batch_stok, max_batch, max_wait_ms, nama="batcher-stok")
+        }
+
+    def batch_absensi(self, payloads):
+        data = pd.DataFrame({
+            'hari': [p['hari'] for p in payloads],
+            'jam_jadwal': [p['jam_jadwal'] for p in payloads],
+            'cuaca': [p['kondisi_cuaca'] for p in payloads],
+            'jam_masuk': [p['jam_masuk'] for p in payloads]
+        })
+        return _ke_json(prediksi_kehadiran_batch(*self.absensi, data))
+
+    def batch_stok(self, payloads):
+        data = pd.DataFrame({
+            'nama_barang': [p['nama_barang'] for p in payloads],
+            'stok_awal': [p['stok_awal'] for p in payloads],
+            'masuk': [p['masuk'] for p in payloads],
+            'keluar': [p['keluar'] for p in payloads],
+            'satuan': [p['satuan'] for p in payloads],
+            'bulan': [p['bulan'] for p in payloads]
+        })
+        # Setiap permintaan dinilai sendiri-sendiri di atas riwayat, sama dengan prediksi_stok
+        return _ke_json(prediksi_stok_batch(*self.stok, data, riwayat=self.riwayat, berurutan=False))
+
+    def stats(self):
+        stats = {nama: batcher.stats() for nama, batcher in self.batcher.items()}
+        if hasattr(self.absensi[0], 'stats'):
+            stats['absensi']['lut' if hasattr(self.absensi[0], 'lut_hits') else 'bundle'] = self.absensi[0].stats()
+        if hasattr(self.stok[0], 'stats'):
+            stats['stok']['bundle'] = self.stok[0].stats()
+        return stats
+
+def buat_handler(layanan):
+    field_wajib = {'absensi': FIELD_ABSENSI, 'stok': FIELD_STOK}
+    validasi = {'absensi': validasi_absensi, 'stok': validasi_stok}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _kirim(self, kode, isi):
+            body = json.dumps(isi).encode('utf-8')
+            self.send_response(kode)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._kirim(200, {'status': 'ok'})
+            elif self.path == '/stats':
+                self._kirim(200, layanan.stats())
+            elif self.path == '/metrics':
+                body = metrik.ke_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._kirim(404, {'status': 'error', 'message': f"Path tidak ditemukan: {self.path}"})
+
+        def do_POST(self):
+            nama = self.path.rstrip('/').rsplit('/', 1)[-1]
+            if not self.path.startswith('/predict/') or nama not in field_wajib:
+                self._kirim(404, {'status': 'error', 'message': f"Path tidak ditemukan: {self.path}"})
+                return
+
+            try:
+                panjang = int(self.headers.get('Content-Length', 0))
+                isi = json.loads(self.rfile.read(panjang) or b'null')
+                payloads = isi if isinstance(isi, list) else [isi]
+                for i, payload in enumerate(payloads):
+                    kurang = [f for f in field_wajib[nama] if not isinstance(payload, dict) or f not in payload]
+                    if kurang:
+                        raise ValueError(f"Field tidak ditemukan: {', '.join(kurang)}")
+                    payloads[i] = validasi[nama](payload)
+            except ValueError as e:
+                self._kirim(400, {'status': 'error', 'message': str(e)})
+                return
+
+            try:
+                futures = [layanan.batcher[nama].submit(payload) for payload in payloads]
+                hasil = [future.result() for future in futures]
+            except Exception as e:
+                self._kirim(500, {'status': 'error', 'message': str(e)})
+                return
+
+            self._kirim(200, {'prediction': hasil if isinstance(isi, list) else hasil[0], 'status': 'success'})
+
+        def log_message(self, format, *args):
+            # Log per permintaan dimatikan agar tidak membebani throughput
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Server HTTP/JSON untuk model absensi dan stok")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--backend', default='keras', choices=BACKEND_MODEL)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help="ukuran batch maksimum (1 = tanpa batching)")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS, help="waktu tunggu maksimum pengumpulan batch")
+    parser.add_argument('--lut', action='store_true', help="pakai lookup table + LRU cache untuk absensi")
+    parser.add_argument('--presisi', choices=('float16', 'int8'), help="bobot presisi rendah (lihat kuantisasi.py)")
+    parser.add_argument('--batas-flip', type=float, help="flip rate maksimum kalibrasi (default 0.005)")
+    parser.add_argument('--metrik-file', help="tulis metrik per tahap ke file ini setiap 15 detik")
+    args = parser.parse_args()
+
+    if args.metrik_file:
+        metrik.mulai_ekspor(args.metrik_file)
+
+    layanan = LayananPrediksi(args.backend, args.max_batch, args.max_wait_ms, lut=args.lut, presisi=args.presisi,
+                              batas_flip=args.batas_flip)
+    server = ThreadingHTTPServer((args.host, args.port), buat_handler(layanan))
+    server.daemon_threads = True
+    print(f"Server prediksi berjalan di http://{args.host}:{args.port} "
+          f"(backend={args.backend}, presisi={args.presisi or 'penuh'}, max_batch={args.max_batch}, max_wait_ms={args.max_wait_ms})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediksi import UKURAN_CHUNK, fitur_stok, prediksi_probabilitas, prediksi_stok_batch, status_stok
+from riwayat_stok import KUNCI_ITEM, jendela_per_baris, rata_rata_jendela
+from stok_whatif import tingkat_status
+
+# Status yang dihitung sebagai prediksi "akan habis" untuk confusion matrix biner
+POSITIF = ('Berisiko',)
+
+STATUS = ("Aman", "Stabil", "Berisiko")
+
+# Arti angka setiap mode, dicetak di awal keluaran CLI
+MODE = {
+    'maju': "Backtest ke depan: periode t+1 setiap item dinilai hanya dari keadaan akhir periode t "
+            "(stok_akhir, masuk/keluar terakhir, moving average sampai t) lalu dibandingkan dengan kejadian "
+            "nyata periode t+1.",
+    'ulang': "Reproduksi label in-sample: setiap baris dinilai dengan stok awal/masuk/keluar baris itu sendiri, "
+             "padahal kejadian habis dihitung dari baris yang sama. Ini bukan kinerja prediksi ke depan."
+}
+
+def _urut_waktu(ledger):
+    # Urut menurut tanggal (urutan ledger dipertahankan untuk tanggal yang sama) + posisi asal setiap baris
+    tanggal = pd.to_datetime(ledger['tanggal'])
+    urut = np.argsort(tanggal.to_numpy(), kind='stable')
+    df = ledger.iloc[urut].reset_index(drop=True)
+
+    # Hanya bulan unik yang diformat menjadi teks (strftime per baris mendominasi waktu pada jutaan baris)
+    bulan, kode_bulan = np.unique(tanggal.to_numpy()[urut].astype('datetime64[M]'), return_inverse=True)
+    periode = pd.Categorical.from_codes(kode_bulan, np.datetime_as_string(bulan))
+    return df, periode, urut
+
+# Menilai ulang seluruh ledger dengan logika keputusan aplikasi (in-sample)
+def skor_ledger(model, scaler, metadata, ledger, kunci=KUNCI_ITEM, chunk_size=UKURAN_CHUNK):
+    """
+    Memutar ulang ledger secara kronologis: baris diurutkan menurut tanggal (urutan
+    ledger dipertahankan untuk tanggal yang sama) dan setiap baris dinilai dengan
+    prediksi_stok_batch, yaitu model + status_stok yang sama dengan halaman Stok.
+    Moving average hanya memakai baris itu dan periode sebelumnya, jadi satu
+    pemanggilan batch sama dengan menilai bulan demi bulan sambil mencatat riwayat.
+    Kejadian nyata = stok_akhir < 0.2 x stok_awal (sama dengan target will_deplete).
+    Karena fitur dan kejadian berasal dari baris yang sama, hasilnya adalah reproduksi
+    label in-sample, bukan backtest ke depan (lihat skor_maju).
+
+    Args:
+        ledger (pd.DataFrame): Kolom tanggal, kunci, stok_awal, masuk, keluar, stok_akhir, bulan
+        kunci (str): Kolom item (misalnya gabungan outlet + barang untuk banyak outlet)
+
+    Returns:
+        pd.DataFrame: Kolom kunci, periode (YYYY-MM), probabilitas, status, habis (bool),
+                      baris (posisi di ledger input), urut kronologis
+    """
+    df, periode, urut = _urut_waktu(ledger)
+    hasil = prediksi_stok_batch(model, scaler, metadata, df, chunk_size=chunk_size, kunci=kunci)
+    return pd.DataFrame({
+        kunci: df[kunci].to_numpy(),
+        'periode': periode,
+        'probabilitas': hasil['probabilitas'].to_numpy(),
+        'status': hasil['status'].to_numpy(),
+        'habis': (df['stok_akhir'] < df['stok_awal'] * 0.2).to_numpy(),
+        'baris': urut
+    })
+
+# Backtest ke depan: periode t+1 dinilai dari keadaan yang sudah diketahui di periode t
+def skor_maju(model, scaler, metadata, ledger, kunci=KUNCI_ITEM, chunk_size=UKURAN_CHUNK):
+    """
+    Setiap periode t+1 sebuah item dinilai dengan asumsi yang sama seperti periode_berikutnya
+    (What-If): stok_awal = stok_akhir periode t, masuk/keluar = nilai periode t, moving average
+    dari riwayat sampai periode t ditambah asumsi itu. Bulan periode t+1 sudah diketahui saat
+    menilai, jadi bulan baris t+1 yang dipakai. Status dibandingkan dengan kejadian nyata
+    periode t+1. Periode pertama setiap item tidak dinilai karena belum ada keadaan sebelumnya.
+
+    Args:
+        ledger (pd.DataFrame): Kolom tanggal, kunci, stok_awal, masuk, keluar, stok_akhir, bulan
+        kunci (str): Kolom item
+
+    Returns:
+        pd.DataFrame: Kolom sama dengan skor_ledger; satu baris per periode t+1, baris = posisi
+                      periode t+1 di ledger input
+    """
+    df, periode, urut = _urut_waktu(ledger)
+    kode = pd.factorize(df[kunci].to_numpy())[0]
+
+    # Baris periode t untuk setiap baris t+1 dari item yang sama
+    posisi = pd.Series(np.arange(len(df))).groupby(kode).shift(1).to_numpy()
+    target = np.flatnonzero(~np.isnan(posisi))
+    sebelum = posisi[target].astype(np.int64)
+
+    # Moving average seperti RiwayatStok dengan berurutan=False: dua periode terakhir + nilai asumsi (= periode t)
+    rata_rata = {}
+    for kolom in ('masuk', 'keluar'):
+        jendela = jendela_per_baris(kode, df[kolom].to_numpy())[sebelum]
+        rata_rata[kolom] = rata_rata_jendela(np.column_stack([jendela[:, 0], jendela[:, 0], jendela[:, 1]]))
+
+    stok_awal = df['stok_akhir'].to_numpy()[sebelum]
+    masuk = df['masuk'].to_numpy()[sebelum]
+    keluar = df['keluar'].to_numpy()[sebelum]
+    fitur = fitur_stok(stok_awal, masuk, keluar, df['bulan'].to_numpy()[target], rata_rata['keluar'],
+                       rata_rata['masuk'])
+    probabilitas = prediksi_probabilitas(model, scaler, fitur, chunk_size=chunk_size)
+    status, _ = status_stok(stok_awal, keluar, probabilitas)
+
+    nyata = df.iloc[target]
+    return pd.DataFrame({
+        kunci: nyata[kunci].to_numpy(),
+        'periode': periode[target],
+        'probabilitas': probabilitas,
+        'status': status,
+        'habis': (nyata['stok_akhir'] < nyata['stok_awal'] * 0.2).to_numpy(),
+        'baris': urut[target]
+    })
+
+# Confusion matrix per kelompok (bulan, item, atau keseluruhan)
+def matriks_konfusi(hasil, per=None, positif=POSITIF):
+    """
+    Args:
+        hasil (pd.DataFrame): Output skor_ledger
+        per (str, optional): Kolom pengelompokan ('periode' atau kolom item); None = seluruh data
+        positif (tuple): Status yang dihitung sebagai prediksi habis
+
+    Returns:
+        pd.DataFrame: Satu baris per kelompok: jumlah setiap status x kejadian ({status}_habis,
+                      {status}_tidak), tp, fp, fn, tn untuk status positif, presisi, recall,
+                      akurasi (NaN jika pembaginya 0)
+    """
+    if per is None:
+        kode, kelompok = np.zeros(len(hasil), dtype=np.int64), pd.Index(['semua'])
+    else:
+        kode, kelompok = pd.factorize(hasil[per], sort=True)
+        kelompok = pd.Index(kelompok, name=per)
+
+    # Sel = tingkat status (0..2) x habis (0/1), dihitung sekaligus untuk semua kelompok
+    sel = tingkat_status(hasil['status'].to_numpy()).astype(np.int64) * 2 + hasil['habis'].to_numpy()
+    jumlah = np.bincount(kode * 6 + sel, minlength=len(kelompok) * 6).reshape(len(kelompok), 6)
+
+    tabel = pd.DataFrame(index=kelompok)
+    for t, status in enumerate(STATUS):
+        tabel[f'{status}_habis'] = jumlah[:, t * 2 + 1]
+        tabel[f'{status}_tidak'] = jumlah[:, t * 2]
+
+    prediksi_positif = np.isin(STATUS, positif)
+    tabel['tp'] = jumlah[:, 1::2][:, prediksi_positif].sum(axis=1)
+    tabel['fp'] = jumlah[:, 0::2][:, prediksi_positif].sum(axis=1)
+    tabel['fn'] = jumlah[:, 1::2][:, ~prediksi_positif].sum(axis=1)
+    tabel['tn'] = jumlah[:, 0::2][:, ~prediksi_positif].sum(axis=1)
+    tabel['presisi'] = _rasio(tabel['tp'], tabel['tp'] + tabel['fp'])
+    tabel['recall'] = _rasio(tabel['tp'], tabel['tp'] + tabel['fn'])
+    tabel['akurasi'] = _rasio(tabel['tp'] + tabel['tn'], jumlah.sum(axis=1))
+    return tabel
+
+def _rasio(pembilang, penyebut):
+    pembilang = np.asarray(pembilang, dtype=np.float64)
+    penyebut = np.asarray(penyebut, dtype=np.float64)
+    return np.divide(pembilang, penyebut, out=np.full(len(penyebut), np.nan), where=penyebut > 0)
+
+def ledger_sintetis(ledger, outlet=1, tahun=1, kunci=KUNCI_ITEM):
+    """
+    Menggandakan ledger menjadi beberapa outlet (item '{outlet}/{barang}') dan beberapa
+    tahun berturut-turut (tanggal digeser per tahun), untuk uji skala
+    """
+    bagian = []
+    tanggal = pd.to_datetime(ledger['tanggal'])
+    for t in range(tahun):
+        geser = tanggal + pd.DateOffset(years=t)
+        for o in range(outlet):
+            salinan = ledger.assign(tanggal=geser)
+            if outlet > 1:
+                salinan[kunci] = f"O{o + 1}/" + ledger[kunci].astype(str)
+            bagian.append(salinan)
+    return pd.concat(bagian, ignore_index=True)
+
+if __name__ == "__main__":
+    # Backtest ke depan:            python stok_backtest.py
+    # Hanya baris uji training:      python stok_backtest.py --hanya-uji
+    # Reproduksi label in-sample:    python stok_backtest.py --mode ulang
+    # Skala sintetis:                python stok_backtest.py --outlet 50 --tahun 5
+    from prediksi import BACKEND_MODEL, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, load_model
+    from stok_store import StokStore
+    from training import bagi_data
+
+    parser = argparse.ArgumentParser(description="Backtest status stok bulan demi bulan terhadap kejadian nyata")
+    parser.add_argument('--backend', default='numpy', choices=BACKEND_MODEL)
+    parser.add_argument('--mode', default='maju', choices=sorted(MODE),
+                        help="maju: periode t+1 dari keadaan periode t; ulang: reproduksi label in-sample")
+    parser.add_argument('--hanya-uji', action='store_true',
+                        help="hanya baris uji bagi_data (20%% yang tidak dipakai training)")
+    parser.add_argument('--positif', nargs='+', default=list(POSITIF), choices=STATUS,
+                        help="status yang dihitung sebagai prediksi habis")
+    parser.add_argument('--outlet', type=int, default=1, help="gandakan ledger menjadi N outlet sintetis")
+    parser.add_argument('--tahun', type=int, default=1, help="gandakan ledger menjadi N tahun berturut-turut")
+    parser.add_argument('--simpan', type=Path, help="folder untuk per_bulan.csv dan per_item.csv")
+    args = parser.parse_args()
+    if args.hanya_uji and (args.outlet > 1 or args.tahun > 1):
+        parser.error("--hanya-uji hanya berlaku untuk ledger asli (baris training), bukan ledger sintetis")
+
+    model, scaler, metadata = load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, backend=args.backend)
+    ledger = StokStore.buka().ke_frame()
+    if args.outlet > 1 or args.tahun > 1:
+        ledger = ledger_sintetis(ledger, args.outlet, args.tahun)
+
+    mulai = time.perf_counter()
+    hasil = (skor_maju if args.mode == 'maju' else skor_ledger)(model, scaler, metadata, ledger)
+    waktu_skor = time.perf_counter() - mulai
+    # Baris ledger = baris fitur training (urutan store), jadi indeks uji bagi_data berlaku langsung
+    if args.hanya_uji:
+        _, indeks_uji = bagi_data(len(ledger))
+        hasil = hasil[np.isin(hasil['baris'], indeks_uji)].reset_index(drop=True)
+    per_bulan = matriks_konfusi(hasil, 'periode', args.positif)
+    per_item = matriks_konfusi(hasil, KUNCI_ITEM, args.positif)
+    total = matriks_konfusi(hasil, None, args.positif)
+    waktu = time.perf_counter() - mulai
+
+    kolom = ['tp', 'fp', 'fn', 'tn', 'presisi', 'recall', 'akurasi']
+    print(MODE[args.mode])
+    print("Hanya baris uji bagi_data (tidak dipakai training)." if args.hanya_uji else
+          "Termasuk baris yang dipakai training model; --hanya-uji untuk baris uji saja.")
+    print()
+    with pd.option_context('display.width', 200, 'display.max_rows', 60):
+        print(per_bulan.round(3).to_string())
+        print()
+        print(per_item[kolom].sort_values(['fn', 'fp'], ascending=False).head(15).round(3).to_string())
+        print()
+        print(total.round(3).to_string())
+
+    # Pembanding: label model saja (probabilitas > threshold) seperti akurasi di metadata
+    threshold = metadata.get('threshold', 0.5)
+    akurasi_model = float(((hasil['probabilitas'] > threshold) == hasil['habis']).mean())
+    akurasi_metadata = metadata.get('metrics', {})
+    print(f"\nAkurasi model saja (probabilitas > {threshold}): {akurasi_model:.3f} "
+          f"(metadata: train {akurasi_metadata.get('train_accuracy', float('nan')):.3f}, "
+          f"test {akurasi_metadata.get('test_accuracy', float('nan')):.3f})")
+    print(f"{len(hasil)} baris, {hasil['periode'].nunique()} bulan, {hasil[KUNCI_ITEM].nunique()} item "
+          f"dalam {waktu:.3f} s (skor {waktu_skor:.3f} s)")
+
+    if args.simpan:
+        args.simpan.mkdir(parents=True, exist_ok=True)
+        per_bulan.to_csv(args.simpan / 'per_bulan.csv')
+        per_item.to_csv(args.simpan / 'per_item.csv')
+        print(f"Disimpan ke {args.simpan}")
@@ -0,0 +1,268 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediksi import (BACKEND_MODEL, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, UKURAN_CHUNK,
+                      load_model, prediksi_stok_batch)
+from riwayat_stok import KUNCI_ITEM, RiwayatStok
+
+# Kolom ledger yang ikut disalin ke hasil agar baris bisa dicocokkan kembali
+KOLOM_IKUT = ('tanggal', 'kode')
+
+class PenulisCSV:
+    """Menulis hasil per chunk ke CSV; header hanya ditulis sekali"""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def tulis(self, df):
+        df.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def tutup(self):
+        pass
+
+class PenulisParquet:
+    """Menulis hasil per chunk sebagai row group Parquet (butuh pyarrow)"""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Output Parquet membutuhkan pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.writer = None
+
+    def tulis(self, df):
+        if self.writer is None:
+            tabel = self.pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = self.pq.ParquetWriter(self.path, tabel.schema)
+        else:
+            # Skema mengikuti chunk pertama agar tipe kolom konsisten antar row group
+            tabel = self.pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(tabel)
+
+    def tutup(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def buat_penulis(path, format=None):
+    """Memilih penulis dari format ('csv'/'parquet') atau ekstensi path"""
+    format = format or ('parquet' if Path(path).suffix.lower() in ('.parquet', '.pq') else 'csv')
+    if format == 'parquet':
+        return PenulisParquet(path)
+    if format == 'csv':
+        return PenulisCSV(path)
+    raise ValueError(f"Format output tidak dikenal: {format}")
+
+# Menilai ledger stok chunk demi chunk dengan memori konstan
+def skor_stream(model, scaler, metadata, input_path, output_path, chunksize=UKURAN_CHUNK, kunci=KUNCI_ITEM,
+                format=None, riwayat=None, kolom_ikut=KOLOM_IKUT):
+    """
+    Membaca ledger (baris urut waktu) per chunk, menghitung fitur dan probabilitas,
+    lalu menulis hasil secara bertahap. Riwayat moving average per item dibawa
+    antar chunk, sehingga hasil identik dengan prediksi_stok_batch atas seluruh file.
+    Memori hanya bergantung pada chunksize dan jumlah item unik.
+
+    Args:
+        input_path: CSV dengan kolom stok_awal, masuk, keluar, bulan, kunci
+                    (opsional: satuan, tanggal, kode)
+        output_path: Lokasi hasil (.csv atau .parquet)
+        chunksize (int): Jumlah baris per chunk
+        riwayat (RiwayatStok, optional): Periode sebelum baris pertama; ikut diperbarui
+        kolom_ikut (tuple): Kolom input yang disalin ke hasil jika ada
+
+    Returns:
+        dict: Jumlah baris, jumlah chunk, jumlah item dan lama proses (detik)
+    """
+    riwayat = riwayat if riwayat is not None else RiwayatStok()
+    penulis = buat_penulis(output_path, format)
+    jumlah_baris = jumlah_chunk = 0
+    mulai = time.perf_counter()
+
+    try:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            hasil = prediksi_stok_batch(model, scaler, metadata, chunk, chunk_size=chunksize, riwayat=riwayat,
+                                        kunci=kunci)
+            riwayat.update_batch(chunk[kunci].to_numpy(), chunk['masuk'].to_numpy(), chunk['keluar'].to_numpy())
+
+            ikut = [kolom for kolom in kolom_ikut if kolom in chunk and kolom not in hasil]
+            penulis.tulis(pd.concat([chunk[ikut], hasil], axis=1) if ikut else hasil)
+            jumlah_baris += len(chunk)
+            jumlah_chunk += 1
+    finally:
+        penulis.tutup()
+
+    return {
+        'baris': jumlah_baris,
+        'chunk': jumlah_chunk,
+        'item': len(riwayat),
+        'detik': time.perf_counter() - mulai
+    }
+
+# Model milik proses worker, dimuat sekali oleh _init_worker
+_MODEL_WORKER = None
+
+def _init_worker(backend):
+    global _MODEL_WORKER
+    _MODEL_WORKER = load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, backend=backend)
+
+def _skor_shard(argumen):
+    shard, chunksize, kunci = argumen
+    return prediksi_stok_batch(*_MODEL_WORKER, shard, chunk_size=chunksize, kunci=kunci)
+
+def bagi_shard(kunci_item, jumlah_shard):
+    """
+    Membagi item ke shard dengan jumlah baris seimbang (item terbesar lebih dulu).
+    Semua baris satu item selalu masuk shard yang sama.
+
+    Returns:
+        np.ndarray: Nomor shard per baris
+    """
+    kode, _ = pd.factorize(np.asarray(kunci_item))
+    jumlah = np.bincount(kode)
+    beban = np.zeros(jumlah_shard, dtype=np.int64)
+    shard_item = np.empty(len(jumlah), dtype=np.int64)
+    for i in np.argsort(-jumlah, kind='stable'):
+        s = int(np.argmin(beban))
+        shard_item[i] = s
+        beban[s] += jumlah[i]
+    return shard_item[kode]
+
+# Menilai ledger di beberapa proses, di-shard per item
+def skor_paralel(data, workers=None, chunksize=UKURAN_CHUNK, backend='numpy', kunci=KUNCI_ITEM,
+                 shard_per_worker=4, pool=None):
+    """
+    Menilai ledger (baris urut waktu) secara paralel. Ledger dibagi per item
+    sehingga riwayat moving average setiap item tetap di satu worker; hasil
+    digabung kembali dengan urutan baris asli dan identik dengan prediksi_stok_batch.
+
+    Args:
+        data (pd.DataFrame): Kolom stok_awal, masuk, keluar, bulan, kunci (opsional: nama_barang, satuan)
+        workers (int, optional): Jumlah proses (default: os.cpu_count())
+        chunksize (int): Jumlah baris per pemanggilan model.predict di worker
+        shard_per_worker (int): Jumlah shard per worker, agar beban tetap rata
+        pool (ProcessPoolExecutor, optional): Pool yang sudah dibuat dengan buat_pool
+
+    Returns:
+        pd.DataFrame: Sama dengan prediksi_stok_batch, index sama dengan input
+    """
+    workers = workers or os.cpu_count()
+    kolom = [k for k in (kunci, 'nama_barang', 'stok_awal', 'masuk', 'keluar', 'satuan', 'bulan') if k in data]
+    df = data[list(dict.fromkeys(kolom))].reset_index(drop=True)
+
+    # Urutan stabil menjaga urutan waktu di dalam setiap shard
+    shard = bagi_shard(df[kunci].to_numpy(), workers * shard_per_worker)
+    urutan = np.argsort(shard, kind='stable')
+    batas = np.flatnonzero(np.diff(shard[urutan])) + 1
+    tugas = [(df.iloc[posisi], chunksize, kunci) for posisi in np.split(urutan, batas) if len(posisi)]
+
+    pool_sendiri = pool is None
+    pool = pool or buat_pool(workers, backend)
+    try:
+        hasil = pd.concat(list(pool.map(_skor_shard, tugas))).sort_index()
+    finally:
+        if pool_sendiri:
+            pool.shutdown()
+
+    hasil.index = data.index
+    return hasil
+
+def rss_puncak_mb():
+    """Puncak RSS proses ini (MB), None jika platform tidak menyediakan getrusage (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def buat_pool(workers=None, backend='numpy'):
+    """Pool proses yang setiap worker-nya memuat model stok sekali"""
+    # spawn, karena TensorFlow yang sudah dimuat di proses induk tidak aman di-fork
+    return ProcessPoolExecutor(workers or os.cpu_count(), mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker, initargs=(backend,))
+
+def laporan_skala(data, daftar_workers, chunksize=UKURAN_CHUNK, backend='numpy', ulang=3):
+    """
+    Mengukur waktu skor_paralel untuk beberapa jumlah worker (pool sudah hangat)
+
+    Returns:
+        list: (workers, detik, speedup terhadap baris pertama)
+    """
+    laporan = []
+    for workers in daftar_workers:
+        with buat_pool(workers, backend) as pool:
+            skor_paralel(data, workers, chunksize, backend, pool=pool)
+            waktu = []
+            for _ in range(ulang):
+                mulai = time.perf_counter()
+                skor_paralel(data, workers, chunksize, backend, pool=pool)
+                waktu.append(time.perf_counter() - mulai)
+        dasar = laporan[0][1] if laporan else min(waktu)
+        laporan.append((workers, min(waktu), dasar / min(waktu)))
+    return laporan
+
+if __name__ == "__main__":
+    # Streaming: python stok_pipeline.py ledger.csv hasil.parquet --backend numpy --chunksize 100000
+    # Paralel:   python stok_pipeline.py ledger.csv hasil.parquet --workers 16
+    # Skala:     python stok_pipeline.py ledger.csv --skala 1 2 4 8 16
+    parser = argparse.ArgumentParser(description="Menilai ledger stok besar secara streaming")
+    parser.add_argument('input', type=Path)
+    parser.add_argument('output', type=Path, nargs='?')
+    parser.add_argument('--backend', default='numpy', choices=BACKEND_MODEL)
+    parser.add_argument('--chunksize', type=int, default=UKURAN_CHUNK)
+    parser.add_argument('--format', choices=['csv', 'parquet'], help="default: dari ekstensi output")
+    parser.add_argument('--workers', type=int, help="menilai di beberapa proses (file dimuat utuh)")
+    parser.add_argument('--presisi', choices=('float16', 'int8'), help="bobot presisi rendah (lihat kuantisasi.py)")
+    parser.add_argument('--skala', type=int, nargs='+', metavar='N', help="laporan speedup untuk jumlah worker N")
+    args = parser.parse_args()
+
+    if args.skala:
+        data = pd.read_csv(args.input)
+        print(f"{'workers':>8} {'detik':>10} {'baris/s':>14} {'speedup':>8}")
+        for workers, detik, speedup in laporan_skala(data, args.skala, args.chunksize, args.backend):
+            print(f"{workers:>8} {detik:>10.3f} {len(data) / detik:>14,.0f} {speedup:>7.2f}x")
+        raise SystemExit
+
+    if args.output is None:
+        parser.error("output wajib diisi kecuali dengan --skala")
+
+    if args.presisi and args.workers:
+        parser.error("--presisi hanya untuk mode streaming (tanpa --workers)")
+
+    if args.workers:
+        mulai = time.perf_counter()
+        data = pd.read_csv(args.input)
+        hasil = skor_paralel(data, args.workers, args.chunksize, args.backend)
+        ikut = [kolom for kolom in KOLOM_IKUT if kolom in data and kolom not in hasil]
+        penulis = buat_penulis(args.output, args.format)
+        penulis.tulis(pd.concat([data[ikut], hasil], axis=1) if ikut else hasil)
+        penulis.tutup()
+        print(f"{len(data)} baris dengan {args.workers} worker dalam {time.perf_counter() - mulai:.1f} s -> {args.output}")
+        raise SystemExit
+
+    if args.presisi:
+        from kuantisasi import muat_kuantisasi
+        try:
+            model, scaler, metadata, kalibrasi = muat_kuantisasi('stok', args.presisi)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        print(f"presisi {args.presisi}: {kalibrasi['label_berubah']}/{kalibrasi['baris']} label berubah pada kalibrasi")
+    else:
+        model, scaler, metadata = load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH,
+                                             backend=args.backend)
+    laporan = skor_stream(model, scaler, metadata, args.input, args.output, args.chunksize, format=args.format)
+    rss = rss_puncak_mb()
+    print(f"{laporan['baris']} baris ({laporan['chunk']} chunk, {laporan['item']} item) dalam "
+          f"{laporan['detik']:.1f} s ({laporan['baris'] / max(laporan['detik'], 1e-9):,.0f} baris/s), "
+          f"puncak RSS {'-' if rss is None else f'{rss:.0f}'} MB -> {args.output}")
@@ -0,0 +1,142 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from prediksi import fitur_stok, prediksi_probabilitas, status_stok
+from riwayat_stok import KUNCI_ITEM, rata_rata_jendela
+
+# Horizon default proyeksi (bulan)
+HORIZON = 12
+
+# Memproyeksikan stok semua barang beberapa bulan ke depan
+def proyeksi_stok(model, scaler, metadata, data, riwayat=None, horizon=HORIZON, kunci=KUNCI_ITEM):
+    """
+    Menggulirkan stok semua barang bulan demi bulan: stok_akhir sebuah bulan menjadi
+    stok_awal bulan berikutnya. Masuk dan keluar setiap bulan diasumsikan sama dengan
+    rata-rata jendela moving average (periode sebelumnya, termasuk hasil proyeksi);
+    keluar dibatasi stok yang tersedia. Setiap bulan adalah satu pemanggilan model
+    untuk semua barang.
+
+    Args:
+        data (pd.DataFrame): Satu baris per barang untuk bulan pertama: stok_awal, masuk,
+                             keluar, bulan (opsional: kunci). masuk/keluar dipakai sebagai
+                             asumsi jika barang belum punya riwayat
+        riwayat (RiwayatStok, optional): Periode sebelum bulan pertama, tidak diubah
+        horizon (int): Jumlah bulan
+
+    Returns:
+        pd.DataFrame: Satu baris per (barang, bulan_ke) dengan kolom kunci, bulan_ke, bulan,
+                      stok_awal, masuk, keluar, stok_akhir, probabilitas, status, urut per barang
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    n = len(df)
+    items = df[kunci].to_numpy() if kunci in df else np.arange(n)
+
+    # Jendela (n, JENDELA_MA - 1): kolom terakhir = periode terbaru, NaN jika kosong
+    if riwayat is not None and kunci in df:
+        jendela_masuk, jendela_keluar = riwayat.riwayat_awal(items)
+    else:
+        jendela_masuk = jendela_keluar = np.full((n, 0), np.nan)
+    ada_riwayat = (~np.isnan(jendela_keluar)).any(axis=1)
+
+    stok = df['stok_awal'].to_numpy(dtype=np.float64)
+    masuk_tanpa_riwayat = df['masuk'].to_numpy(dtype=np.float64)
+    keluar_tanpa_riwayat = df['keluar'].to_numpy(dtype=np.float64)
+    bulan = df['bulan'].to_numpy(dtype=np.int64)
+
+    kolom = {nama: np.empty((horizon, n)) for nama in ('stok_awal', 'masuk', 'keluar', 'stok_akhir', 'probabilitas')}
+    kolom['bulan'] = np.empty((horizon, n), dtype=np.int64)
+    kolom['status'] = np.empty((horizon, n), dtype=object)
+
+    for t in range(horizon):
+        masuk = np.where(ada_riwayat, rata_rata_jendela(jendela_masuk), masuk_tanpa_riwayat)
+        keluar = np.minimum(np.where(ada_riwayat, rata_rata_jendela(jendela_keluar), keluar_tanpa_riwayat),
+                            stok + masuk)
+
+        # keluar_ma3/masuk_ma3 = jendela sebelumnya + bulan ini, sama dengan moving_average_batch
+        keluar_ma3 = rata_rata_jendela(np.column_stack([keluar, jendela_keluar]))
+        masuk_ma3 = rata_rata_jendela(np.column_stack([masuk, jendela_masuk]))
+        probabilitas = prediksi_probabilitas(model, scaler, fitur_stok(stok, masuk, keluar, bulan, keluar_ma3,
+                                                                       masuk_ma3))
+        status, _ = status_stok(stok, keluar, probabilitas)
+
+        stok_akhir = stok + masuk - keluar
+        for nama, nilai in (('stok_awal', stok), ('masuk', masuk), ('keluar', keluar), ('stok_akhir', stok_akhir),
+                            ('probabilitas', probabilitas), ('bulan', bulan), ('status', status)):
+            kolom[nama][t] = nilai
+
+        # Geser jendela: periode proyeksi ini menjadi periode terbaru
+        if jendela_masuk.shape[1]:
+            jendela_masuk = np.column_stack([jendela_masuk[:, 1:], masuk])
+            jendela_keluar = np.column_stack([jendela_keluar[:, 1:], keluar])
+        stok = stok_akhir
+        bulan = bulan % 12 + 1
+
+    # (horizon, n) -> baris per barang, bulan_ke berurutan
+    hasil = pd.DataFrame({kunci: np.repeat(items, horizon), 'bulan_ke': np.tile(np.arange(1, horizon + 1), n)})
+    for nama in ('bulan', 'stok_awal', 'masuk', 'keluar', 'stok_akhir', 'probabilitas', 'status'):
+        hasil[nama] = kolom[nama].T.ravel()
+    return hasil
+
+def ringkasan_proyeksi(hasil, kunci=KUNCI_ITEM):
+    """
+    Satu baris per barang: status bulan pertama, bulan_ke pertama Berisiko, bulan_ke pertama
+    stok habis (stok_akhir <= 0) dan stok akhir di ujung horizon (<NA> jika tidak terjadi)
+    """
+    grup = hasil.groupby(kunci, sort=False)
+
+    def bulan_pertama(syarat):
+        return hasil['bulan_ke'].where(syarat).groupby(hasil[kunci], sort=False).min().astype('Int64')
+
+    return pd.DataFrame({
+        'status_bulan_1': grup['status'].first(),
+        'bulan_berisiko_pertama': bulan_pertama(hasil['status'] == "Berisiko"),
+        'bulan_habis': bulan_pertama(hasil['stok_akhir'] <= 0),
+        'stok_akhir': grup['stok_akhir'].last()
+    }).reset_index()
+
+if __name__ == "__main__":
+    # Proyeksi 12 bulan semua barang: python stok_proyeksi.py --horizon 12
+    # Skala sintetis:                  python stok_proyeksi.py --barang 5000
+    from prediksi import BACKEND_MODEL, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, load_model
+    from riwayat_stok import RiwayatStok
+    from stok_store import StokStore
+    from stok_whatif import periode_berikutnya
+
+    import metrik
+
+    parser = argparse.ArgumentParser(description="Proyeksi stok semua barang beberapa bulan ke depan")
+    parser.add_argument('--backend', default='numpy', choices=BACKEND_MODEL)
+    parser.add_argument('--horizon', type=int, default=HORIZON)
+    parser.add_argument('--barang', type=int, help="gandakan barang ledger menjadi N barang sintetis")
+    args = parser.parse_args()
+
+    model, scaler, metadata = load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, backend=args.backend)
+    store = StokStore.buka()
+    data, riwayat = periode_berikutnya(store), store.riwayat()
+
+    if args.barang:
+        # Barang sintetis: salinan barang ledger dengan nama berbeda dan riwayat yang sama
+        salinan = np.arange(args.barang) % len(data)
+        asal = data[KUNCI_ITEM].to_numpy()[salinan]
+        data = data.iloc[salinan].reset_index(drop=True)
+        data[KUNCI_ITEM] = [f"{nama} #{i}" for i, nama in enumerate(asal)]
+        masuk, keluar = riwayat.riwayat_awal(asal)
+        riwayat_sintetis = RiwayatStok(kapasitas=len(data))
+        for k in range(masuk.shape[1]):
+            ada = ~np.isnan(keluar[:, k])
+            riwayat_sintetis.update_batch(data[KUNCI_ITEM].to_numpy()[ada], masuk[ada, k], keluar[ada, k])
+        riwayat = riwayat_sintetis
+
+    metrik.REGISTRI.reset()
+    mulai = time.perf_counter()
+    hasil = proyeksi_stok(model, scaler, metadata, data, riwayat, args.horizon)
+    total = time.perf_counter() - mulai
+    waktu_model = metrik.ringkasan().get('model.predict', {}).get('total_s', float('nan'))
+
+    if not args.barang:
+        with pd.option_context('display.width', 200, 'display.max_rows', None):
+            print(ringkasan_proyeksi(hasil).to_string(index=False))
+    print(f"{len(data)} barang x {args.horizon} bulan dalam {total:.3f} s (model.predict {waktu_model:.3f} s)")
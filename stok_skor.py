@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediksi import (BASE_DIR, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, artefak_aktif, fitur_stok,
+                      prediksi_probabilitas, status_stok)
+from riwayat_stok import KUNCI_ITEM, jendela_per_baris, rata_rata_jendela
+from stok_whatif import tingkat_status
+
+# Tabel skor ledger yang disimpan (dibuat ulang otomatis jika tidak ada)
+STOK_SKOR_PATH = BASE_DIR / 'stok' / 'skor' / 'skor.npz'
+
+FORMAT_SKOR = 1
+
+# Status per tingkat_status (Aman = 0, Stabil = 1, Berisiko = 2), disimpan sebagai int8
+STATUS = np.array(["Aman", "Stabil", "Berisiko"])
+
+def versi_model_default(model_path=STOK_MODEL_PATH, scaler_path=STOK_SCALER_PATH):
+    """sha256 (16 hex) dari file model dan scaler versi aktif; skor lama tidak dipakai jika berbeda"""
+    h = hashlib.sha256()
+    for path in artefak_aktif(model_path, scaler_path, STOK_METADATA_PATH)[:2]:
+        with open(path, 'rb') as f:
+            for blok in iter(lambda: f.read(1 << 20), b''):
+                h.update(blok)
+    return h.hexdigest()[:16]
+
+def _hash_kolom(matriks):
+    """Satu hash uint64 per baris dari matriks numerik"""
+    return pd.util.hash_pandas_object(pd.DataFrame(matriks), index=False).to_numpy()
+
+def siapkan_baris(df):
+    """
+    Kunci, hash isi input dan fitur setiap baris ledger (urut waktu).
+
+    Kunci baris = (item, tanggal, urutan kemunculan pada tanggal itu), karena ledger bisa
+    berisi beberapa baris per item per bulan dan bahkan per tanggal. Hash isi mencakup
+    stok_awal, bulan dan jendela masuk/keluar (baris ini + 2 periode sebelumnya),
+    sehingga baris yang tetangga jendelanya berubah juga mendapat hash baru.
+
+    Returns:
+        tuple: (kunci (np.ndarray uint64), hash (np.ndarray uint64), matriks fitur (n, 8))
+    """
+    # Nama item di-hash sekali per item unik, selanjutnya semua kolom numerik
+    kode, unik = pd.factorize(df[KUNCI_ITEM].to_numpy(dtype=object))
+    hash_item = pd.util.hash_array(np.asarray(unik, dtype=object))[kode]
+    hari = pd.to_datetime(df['tanggal']).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+    # Urutan kemunculan (item, tanggal) tanpa groupby pada string
+    gabungan = kode.astype(np.int64) * (1 << 32) + hari
+    urut = np.argsort(gabungan, kind='stable')
+    terurut = gabungan[urut]
+    awal_run = np.flatnonzero(np.r_[True, terurut[1:] != terurut[:-1]])
+    posisi = np.arange(len(urut))
+    ke = np.empty(len(urut), dtype=np.int64)
+    ke[urut] = posisi - np.repeat(awal_run, np.diff(np.r_[awal_run, len(urut)]))
+
+    kunci = _hash_kolom(np.column_stack([hash_item.view(np.int64), hari, ke]))
+
+    jendela_masuk = jendela_per_baris(kode, df['masuk'].to_numpy())
+    jendela_keluar = jendela_per_baris(kode, df['keluar'].to_numpy())
+    isi_hash = _hash_kolom(np.column_stack([df['stok_awal'].to_numpy(dtype=np.float64),
+                                            df['bulan'].to_numpy(dtype=np.float64), jendela_masuk, jendela_keluar]))
+
+    fitur = fitur_stok(df['stok_awal'], df['masuk'], df['keluar'], df['bulan'],
+                       rata_rata_jendela(jendela_keluar), rata_rata_jendela(jendela_masuk))
+    return kunci, isi_hash, fitur
+
+def _cocokkan(kunci_lama, kunci):
+    """
+    Posisi setiap kunci di tabel lama. Ledger biasanya hanya bertambah di akhir atau
+    berubah isinya, jadi kunci dicocokkan per posisi dulu; sisanya dicari lewat sorting.
+
+    Returns:
+        tuple: (indeks di tabel lama, ditemukan (bool)) per kunci
+    """
+    n, m = len(kunci), len(kunci_lama)
+    asal = np.arange(n)
+    ditemukan = np.zeros(n, dtype=bool)
+    k = min(n, m)
+    ditemukan[:k] = kunci_lama[:k] == kunci[:k]
+
+    sisa = np.flatnonzero(~ditemukan)
+    if len(sisa) and m:
+        urut = np.argsort(kunci_lama)
+        posisi = urut[np.minimum(np.searchsorted(kunci_lama, kunci[sisa], sorter=urut), m - 1)]
+        asal[sisa] = posisi
+        ditemukan[sisa] = kunci_lama[posisi] == kunci[sisa]
+    return asal, ditemukan
+
+class TabelSkor:
+    """
+    Skor (probabilitas, status, hari habis) setiap baris ledger stok yang disimpan
+    ke file .npz bersama kunci dan hash input per baris. perbarui() hanya menilai ulang
+    baris yang hash-nya berubah atau baru; baris lain diambil dari tabel tersimpan.
+    Semua skor dihitung ulang jika versi model berbeda.
+
+    Args:
+        path (Path): Lokasi file tabel skor
+    """
+
+    KOLOM = ('kunci', 'hash', 'probabilitas', 'status', 'hari_habis')
+
+    def __init__(self, path=STOK_SKOR_PATH):
+        self.path = Path(path)
+
+    def muat(self):
+        """
+        Returns:
+            tuple: (dict kolom -> np.ndarray atau None, meta (dict))
+        """
+        if not self.path.exists():
+            return None, {}
+        with np.load(self.path, allow_pickle=False) as isi:
+            meta = json.loads(str(isi['meta']))
+            if meta.get('format') != FORMAT_SKOR:
+                return None, {}
+            return {k: isi[k] for k in self.KOLOM}, meta
+
+    def simpan(self, kolom, meta):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Tulis ke file sementara unik lalu rename: pembaca tidak pernah melihat tabel setengah jadi
+        # dan beberapa sesi yang menyimpan bersamaan tidak saling menimpa file sementara
+        fd, sementara = tempfile.mkstemp(prefix=self.path.name + '.', suffix='.tmp', dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), **kolom)
+            os.chmod(sementara, 0o644)
+            os.replace(sementara, self.path)
+        except BaseException:
+            os.unlink(sementara)
+            raise
+
+    # Menyelaraskan tabel skor dengan ledger saat ini
+    def perbarui(self, model, scaler, metadata, df, versi_model=None):
+        """
+        Args:
+            df (pd.DataFrame): Ledger urut waktu (kolom tanggal, nama_barang, stok_awal, masuk, keluar, bulan)
+            versi_model (str, optional): Identitas model (default: hash file model + scaler)
+
+        Returns:
+            tuple: (DataFrame probabilitas, status, hari_habis dengan index df,
+                    statistik (dict): baris, dipakai_ulang, dihitung, baru, dihapus, detik)
+        """
+        mulai = time.perf_counter()
+        versi_model = versi_model or versi_model_default()
+        kunci, isi_hash, fitur = siapkan_baris(df)
+        n = len(kunci)
+
+        probabilitas = np.empty(n)
+        status = np.empty(n, dtype=np.int8)
+        hari_habis = np.empty(n, dtype=np.int64)
+        dihitung = np.ones(n, dtype=bool)
+        baru, dihapus = n, 0
+
+        lama, meta = self.muat()
+        if lama is not None:
+            asal, ditemukan = _cocokkan(lama['kunci'], kunci)
+            baru = int((~ditemukan).sum())
+            dihapus = len(lama['kunci']) - (n - baru)
+            if meta.get('versi_model') == versi_model:
+                # Kunci sama dan hash isi sama -> skor tersimpan masih berlaku
+                dihitung = ~ditemukan
+                dihitung[ditemukan] = lama['hash'][asal[ditemukan]] != isi_hash[ditemukan]
+                dipakai = np.flatnonzero(~dihitung)
+                for nama, tujuan in (('probabilitas', probabilitas), ('status', status), ('hari_habis', hari_habis)):
+                    tujuan[dipakai] = lama[nama][asal[dipakai]]
+
+        if dihitung.any():
+            probabilitas[dihitung] = prediksi_probabilitas(model, scaler, fitur[dihitung])
+            teks, hari_habis[dihitung] = status_stok(fitur[dihitung, 0], fitur[dihitung, 2], probabilitas[dihitung])
+            status[dihitung] = tingkat_status(teks)
+
+        if dihitung.any() or dihapus:
+            self.simpan({'kunci': kunci, 'hash': isi_hash, 'probabilitas': probabilitas, 'status': status,
+                         'hari_habis': hari_habis},
+                        {'format': FORMAT_SKOR, 'versi_model': versi_model, 'baris': n,
+                         'diperbarui': time.strftime('%Y-%m-%dT%H:%M:%S')})
+
+        statistik = {
+            'baris': n,
+            'dipakai_ulang': int((~dihitung).sum()),
+            'dihitung': int(dihitung.sum()),
+            'baru': baru,
+            'dihapus': dihapus,
+            'detik': round(time.perf_counter() - mulai, 4)
+        }
+        skor = pd.DataFrame({'probabilitas': probabilitas, 'status': STATUS[status], 'hari_habis': hari_habis},
+                            index=df.index)
+        return skor, statistik
+
+# Ringkasan dashboard dari ledger + skor
+def dashboard(df, skor):
+    """
+    Returns:
+        tuple: (status terkini per item (baris ledger terakhir), pivot status item x bulan
+                (baris terakhir setiap item dalam bulan itu))
+    """
+    data = pd.concat([df[[KUNCI_ITEM, 'tanggal', 'stok_awal', 'masuk', 'keluar', 'stok_akhir', 'satuan']], skor],
+                     axis=1)
+    data['periode'] = pd.to_datetime(data['tanggal']).dt.strftime('%Y-%m')
+
+    # Barang paling berisiko di atas
+    terkini = data.groupby(KUNCI_ITEM, sort=False).tail(1)
+    terkini = terkini.assign(tingkat=tingkat_status(terkini['status'])).sort_values(
+        ['tingkat', 'probabilitas'], ascending=False, ignore_index=True).drop(columns='tingkat')
+    per_bulan = data.groupby([KUNCI_ITEM, 'periode'], sort=True)['status'].last().unstack('periode')
+    return terkini, per_bulan
+
+if __name__ == "__main__":
+    # Memperbarui tabel skor dari store: python stok_skor.py
+    # Menilai ulang semua baris:         python stok_skor.py --ulang
+    from prediksi import BACKEND_MODEL, load_model
+    from stok_store import StokStore
+
+    parser = argparse.ArgumentParser(description="Tabel skor ledger stok dengan penilaian ulang inkremental")
+    parser.add_argument('--backend', default='numpy', choices=BACKEND_MODEL)
+    parser.add_argument('--ulang', action='store_true', help="hapus tabel tersimpan dan nilai ulang semua baris")
+    args = parser.parse_args()
+
+    tabel = TabelSkor()
+    if args.ulang and tabel.path.exists():
+        tabel.path.unlink()
+
+    model, scaler, metadata = load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, backend=args.backend)
+    ledger = StokStore.buka().ke_frame()
+    skor, statistik = tabel.perbarui(model, scaler, metadata, ledger)
+    terkini, _ = dashboard(ledger, skor)
+    print(terkini['status'].value_counts().to_string())
+    print(f"{statistik['baris']} baris ({statistik['baru']} baru, {statistik['dihapus']} dihapus): "
+          f"{statistik['dipakai_ulang']} dipakai ulang, {statistik['dihitung']} dihitung dalam {statistik['detik']} s "
+          f"-> {tabel.path}")
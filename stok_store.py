@@ -0,0 +1,391 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediksi import BASE_DIR, FITUR_STOK, STOK_DATA_PATH, fitur_stok
+from riwayat_stok import JENDELA_MA, KUNCI_ITEM, RiwayatStok, jendela_per_baris, rata_rata_jendela
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: tanpa kunci antar proses
+    fcntl = None
+
+STOK_STORE_PATH = BASE_DIR / 'stok' / 'store'
+
+FORMAT_STORE = 1
+
+# Kolom ledger dan tipe penyimpanannya; 'kategori' disimpan sebagai kode int32 + daftar kategori
+KOLOM = {
+    'tanggal': 'datetime64[s]',
+    'kode': 'str',
+    KUNCI_ITEM: 'kategori',
+    'stok_awal': 'int64',
+    'masuk': 'int64',
+    'keluar': 'int64',
+    'stok_akhir': 'int64',
+    'satuan': 'kategori',
+    'nilai (Rp)': 'int64',
+    'bulan': 'int64'
+}
+
+# Nomor baris di ledger asli, untuk mengembalikan urutan ledger dan memecah tanggal yang sama
+KOLOM_URUTAN = 'urutan'
+
+# Delta dipadatkan ke segmen utama jika melebihi bagian ini dari jumlah baris utama
+RASIO_PADAT = 0.1
+
+def _waktu(nilai):
+    return np.datetime64(pd.Timestamp(nilai), 's')
+
+def _nama_file(kolom):
+    return re.sub(r'\W+', '_', kolom).strip('_') + '.npy'
+
+@contextmanager
+def _kunci(path):
+    """Kunci file antar proses (stok/store.lock) selama store dibangun atau diubah"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + '.lock'), 'w') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class _Segmen:
+    """Satu segmen kolom terurut (item, tanggal, urutan) dengan indptr per item"""
+
+    def __init__(self, path):
+        self.path = path
+        self.indptr = np.load(path / 'indptr.npy', mmap_mode='r')
+        self.kolom = {k: np.load(path / _nama_file(k), mmap_mode='r') for k in (*KOLOM, KOLOM_URUTAN)}
+
+    def __len__(self):
+        return len(self.kolom[KOLOM_URUTAN])
+
+    def rentang_item(self, kode):
+        if kode + 1 >= len(self.indptr):
+            return 0, 0
+        return int(self.indptr[kode]), int(self.indptr[kode + 1])
+
+    @staticmethod
+    def tulis(path, kolom, jumlah_item):
+        """Mengurutkan kolom (dict array) lalu menyimpannya sebagai segmen baru"""
+        urutan = np.lexsort((kolom[KOLOM_URUTAN], kolom['tanggal'], kolom[KUNCI_ITEM]))
+        path.mkdir(parents=True)
+        for k, nilai in kolom.items():
+            np.save(path / _nama_file(k), np.asarray(nilai)[urutan])
+        jumlah = np.bincount(kolom[KUNCI_ITEM], minlength=jumlah_item)
+        np.save(path / 'indptr.npy', np.concatenate([[0], np.cumsum(jumlah)]).astype(np.int64))
+
+class StokStore:
+    """
+    Penyimpanan kolumnar untuk riwayat stok. Setiap kolom adalah file .npy
+    yang di-memory-map, diurutkan menurut (item, tanggal). Irisan satu item
+    untuk rentang tanggal memakai indptr per item + searchsorted, sehingga
+    biayanya O(log n) + ukuran irisan.
+
+    Baris baru masuk ke segmen delta kecil (juga terurut) dan dipadatkan ke
+    segmen utama saat delta melebihi RASIO_PADAT. Kunci item memakai KUNCI_ITEM
+    (nama_barang), karena kode di ledger unik per baris.
+
+    Args:
+        path (Path): Direktori store yang sudah dibuat dengan StokStore.buat
+    """
+
+    def __init__(self, path=STOK_STORE_PATH):
+        self.path = Path(path)
+        for percobaan in range(3):
+            with open(self.path / 'meta.json', 'r') as f:
+                self.meta = json.load(f)
+            if self.meta['format'] != FORMAT_STORE:
+                raise ValueError(f"Format store {self.meta['format']} tidak didukung (diharapkan {FORMAT_STORE})")
+            try:
+                self.segmen = [_Segmen(self.path / nama) for nama in self.meta['segmen']]
+                break
+            except FileNotFoundError:
+                # Proses lain baru saja mengganti segmen setelah meta dibaca; baca ulang meta
+                if percobaan == 2:
+                    raise
+
+        self.kategori = self.meta['kategori']
+        self.kode_item = {item: i for i, item in enumerate(self.kategori[KUNCI_ITEM])}
+
+    def __len__(self):
+        return sum(len(s) for s in self.segmen)
+
+    @property
+    def items(self):
+        return list(self.kategori[KUNCI_ITEM])
+
+    @classmethod
+    def buat(cls, df, path=STOK_STORE_PATH, sumber=None):
+        """
+        Membuat store dari ledger (baris urut waktu). Isi store lama di path diganti,
+        termasuk baris yang ditambahkan dengan tambah().
+
+        Store baru dibangun di folder sementara lalu di-rename; jika store sudah ada,
+        segmen baru ditulis di sampingnya dan meta.json diganti secara atomik (seperti
+        tambah), sehingga pembaca tidak pernah melihat store setengah jadi. Proses lain
+        yang membangun atau menambah store pada saat yang sama menunggu kunci file.
+
+        Args:
+            sumber (Path, optional): CSV asal ledger, dicatat di meta untuk peringatan di buka()
+        """
+        with _kunci(Path(path)):
+            return cls._tulis_baru(df, Path(path), sumber)
+
+    @classmethod
+    def _tulis_baru(cls, df, path, sumber):
+        # Isi buat() tanpa mengambil kunci (pemanggil sudah memegangnya)
+        kategori = {k: [] for k, tipe in KOLOM.items() if tipe == 'kategori'}
+        kolom = cls._encode(df, kategori, 0)
+        meta = {'format': FORMAT_STORE, 'kategori': kategori, 'jumlah_baris': len(df)}
+        if sumber is not None:
+            meta['sumber'] = {'csv': str(sumber), 'mtime': os.path.getmtime(sumber)}
+
+        if (path / 'meta.json').exists():
+            lama = cls(path)
+            versi = lama.meta['versi'] + 1
+            meta = {**meta, 'versi': versi, 'segmen': [f'utama_{versi}']}
+            _Segmen.tulis(path / f'utama_{versi}', kolom, len(kategori[KUNCI_ITEM]))
+            cls._tulis_meta(path, meta)
+            for nama in lama.meta['segmen']:
+                shutil.rmtree(path / nama)
+        else:
+            sementara = Path(tempfile.mkdtemp(prefix=f'.{path.name}.', dir=path.parent))
+            _Segmen.tulis(sementara / 'utama_0', kolom, len(kategori[KUNCI_ITEM]))
+            cls._tulis_meta(sementara, {**meta, 'versi': 0, 'segmen': ['utama_0']})
+            if path.exists():
+                # Folder kosong atau sisa store rusak tanpa meta.json
+                shutil.rmtree(path)
+            os.rename(sementara, path)
+        return cls(path)
+
+    @classmethod
+    def from_csv(cls, csv_path=STOK_DATA_PATH, path=STOK_STORE_PATH):
+        return cls.buat(pd.read_csv(csv_path), path, sumber=csv_path)
+
+    @classmethod
+    def buka(cls, path=STOK_STORE_PATH, csv_path=STOK_DATA_PATH, bangun_ulang=False):
+        """
+        Membuka store; dibuat dari csv_path hanya jika belum ada atau bangun_ulang=True.
+        CSV yang lebih baru dari store tidak membangun ulang store secara otomatis, karena
+        itu akan membuang baris dari tambah(); hanya diberi peringatan.
+        """
+        path = Path(path)
+        if bangun_ulang:
+            return cls.from_csv(csv_path, path)
+        if not (path / 'meta.json').exists():
+            with _kunci(path):
+                # Proses lain mungkin sudah membangunnya selama menunggu kunci
+                if not (path / 'meta.json').exists():
+                    return cls._tulis_baru(pd.read_csv(csv_path), path, csv_path)
+
+        store = cls(path)
+        sumber = store.meta.get('sumber')
+        if sumber and Path(sumber['csv']) == Path(csv_path) and os.path.getmtime(csv_path) > sumber['mtime']:
+            warnings.warn(f"{csv_path} lebih baru dari store {path}; bangun ulang dengan "
+                          f"python stok_store.py --bangun-ulang (baris dari --tambah akan hilang)", stacklevel=2)
+        return store
+
+    @staticmethod
+    def _encode(df, kategori, urutan_awal):
+        # DataFrame ledger -> dict array bertipe; kategori baru ditambahkan di akhir daftar
+        kolom = {}
+        for k, tipe in KOLOM.items():
+            if tipe == 'kategori':
+                nilai = df[k].astype(str).to_numpy()
+                for baru in pd.unique(nilai):
+                    if baru not in kategori[k]:
+                        kategori[k].append(baru)
+                kolom[k] = pd.Categorical(nilai, categories=kategori[k]).codes.astype(np.int32)
+            elif tipe == 'str':
+                kolom[k] = df[k].astype(str).to_numpy().astype(np.str_)
+            elif tipe.startswith('datetime64'):
+                kolom[k] = pd.to_datetime(df[k]).to_numpy().astype(tipe)
+            else:
+                kolom[k] = df[k].to_numpy().astype(tipe)
+        kolom[KOLOM_URUTAN] = np.arange(urutan_awal, urutan_awal + len(df), dtype=np.int64)
+        return kolom
+
+    @staticmethod
+    def _tulis_meta(path, meta):
+        sementara = path / 'meta.json.tmp'
+        with open(sementara, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(sementara, path / 'meta.json')
+
+    def _decode(self, kolom):
+        df = pd.DataFrame({k: kolom[k] for k in kolom})
+        for k in df.columns:
+            if KOLOM.get(k) == 'kategori':
+                df[k] = np.asarray(self.kategori[k], dtype=object)[df[k].to_numpy()]
+        return df
+
+    # Irisan satu item untuk rentang tanggal
+    def irisan(self, item, mulai=None, akhir=None, kolom=None, sebagai_frame=True):
+        """
+        Baris item dengan mulai <= tanggal <= akhir, urut waktu
+
+        Args:
+            item (str): Nama barang
+            mulai, akhir (str | datetime, optional): Batas tanggal (inklusif)
+            kolom (list, optional): Kolom yang diambil (default: semua)
+            sebagai_frame (bool): False mengembalikan dict array mentah (kategori masih berupa kode)
+
+        Returns:
+            pd.DataFrame | dict: Kolom ledger beserta kolom urutan
+        """
+        kolom = list(dict.fromkeys([*(kolom or KOLOM), 'tanggal', KOLOM_URUTAN]))
+        if item not in self.kode_item:
+            kosong = {k: self.segmen[0].kolom[k][:0] for k in kolom}
+            return self._decode(kosong) if sebagai_frame else kosong
+
+        kode = self.kode_item[item]
+        bagian = []
+        for segmen in self.segmen:
+            a, b = segmen.rentang_item(kode)
+            tanggal = segmen.kolom['tanggal'][a:b]
+            i = a + (np.searchsorted(tanggal, _waktu(mulai), 'left') if mulai is not None else 0)
+            j = a + (np.searchsorted(tanggal, _waktu(akhir), 'right') if akhir is not None else b - a)
+            bagian.append({k: segmen.kolom[k][i:j] for k in kolom})
+
+        hasil = {k: np.concatenate([b[k] for b in bagian]) for k in kolom}
+        if len(bagian) > 1:
+            # Delta bisa berisi tanggal yang lebih awal (koreksi), urutkan ulang irisan kecil ini
+            urutan = np.lexsort((hasil[KOLOM_URUTAN], hasil['tanggal']))
+            hasil = {k: v[urutan] for k, v in hasil.items()}
+        return self._decode(hasil) if sebagai_frame else hasil
+
+    def terakhir(self, item, n=JENDELA_MA, kolom=None):
+        """n periode terakhir item, urut waktu"""
+        return self.irisan(item, kolom=kolom).tail(n).reset_index(drop=True)
+
+    def terakhir_per_item(self, n=JENDELA_MA - 1, kolom=(KUNCI_ITEM, 'tanggal', 'masuk', 'keluar')):
+        """n baris terakhir setiap item (urut ledger), diambil dari ujung setiap rentang item"""
+        kolom = list(dict.fromkeys([*kolom, KUNCI_ITEM, 'tanggal', KOLOM_URUTAN]))
+        bagian = []
+        for segmen in self.segmen:
+            akhir = np.asarray(segmen.indptr[1:])
+            awal = np.maximum(np.asarray(segmen.indptr[:-1]), akhir - n)
+            indeks = np.concatenate([np.arange(a, b) for a, b in zip(awal, akhir)]).astype(np.int64)
+            bagian.append({k: segmen.kolom[k][indeks] for k in kolom})
+
+        gabung = {k: np.concatenate([b[k] for b in bagian]) for k in kolom}
+        urutan = np.lexsort((gabung[KOLOM_URUTAN], gabung['tanggal'], gabung[KUNCI_ITEM]))
+        df = self._decode({k: v[urutan] for k, v in gabung.items()})
+        return df.groupby(KUNCI_ITEM, sort=False).tail(n).sort_values(KOLOM_URUTAN).reset_index(drop=True)
+
+    def riwayat(self, jendela=JENDELA_MA):
+        """RiwayatStok berisi jendela - 1 periode terakhir setiap item"""
+        df = self.terakhir_per_item(jendela - 1)
+        riwayat = RiwayatStok(kapasitas=max(64, len(self.kode_item)), jendela=jendela)
+        riwayat.update_batch(df[KUNCI_ITEM].to_numpy(), df['masuk'].to_numpy(), df['keluar'].to_numpy())
+        return riwayat
+
+    def ke_frame(self, kolom=None):
+        """Seluruh ledger dalam urutan baris asli"""
+        kolom = list(dict.fromkeys([*(kolom or KOLOM), KOLOM_URUTAN]))
+        gabung = {k: np.concatenate([s.kolom[k] for s in self.segmen]) for k in kolom}
+        urutan = np.argsort(gabung[KOLOM_URUTAN], kind='stable')
+        return self._decode({k: v[urutan] for k, v in gabung.items()})
+
+    # Menambah baris ledger baru (misalnya rekap bulan berikutnya)
+    def tambah(self, df):
+        """
+        Baris baru ditulis ke segmen delta; delta dipadatkan ke segmen utama
+        jika sudah melebihi RASIO_PADAT dari segmen utama
+
+        Args:
+            df (pd.DataFrame): Baris ledger dengan kolom yang sama dengan KOLOM
+        """
+        if len(df) == 0:
+            return
+        with _kunci(self.path):
+            # Store mungkin sudah diubah proses lain sejak dibuka
+            self.__init__(self.path)
+            kategori = {k: list(v) for k, v in self.kategori.items()}
+            self._gabung(self._encode(df, kategori, self.meta['jumlah_baris']), kategori, padat=False)
+
+    def padatkan(self):
+        """Menggabungkan delta ke segmen utama"""
+        with _kunci(self.path):
+            self.__init__(self.path)
+            if len(self.segmen) > 1:
+                kosong = {k: v[:0] for k, v in self.segmen[0].kolom.items()}
+                self._gabung(kosong, self.kategori, padat=True)
+
+    def _gabung(self, baru, kategori, padat):
+        utama, delta = self.segmen[0], self.segmen[1:]
+        if delta:
+            baru = {k: np.concatenate([np.asarray(delta[0].kolom[k]), v]) for k, v in baru.items()}
+
+        versi = self.meta['versi'] + 1
+        if padat or len(baru[KOLOM_URUTAN]) > RASIO_PADAT * len(utama):
+            baru = {k: np.concatenate([np.asarray(utama.kolom[k]), v]) for k, v in baru.items()}
+            segmen = [f'utama_{versi}']
+        else:
+            segmen = [self.meta['segmen'][0], f'delta_{versi}']
+        _Segmen.tulis(self.path / segmen[-1], baru, len(kategori[KUNCI_ITEM]))
+
+        lama = [nama for nama in self.meta['segmen'] if nama not in segmen]
+        self.meta = {**self.meta, 'versi': versi, 'kategori': kategori, 'segmen': segmen,
+                     'jumlah_baris': int(max(self.meta['jumlah_baris'], baru[KOLOM_URUTAN].max(initial=-1) + 1))}
+        self._tulis_meta(self.path, self.meta)
+        for nama in lama:
+            # File yang sudah di-memory-map pembaca lain tetap valid sampai ditutup
+            shutil.rmtree(self.path / nama)
+        self.__init__(self.path)
+
+# Fitur training stok (sama dengan prepare_features di notebook stok)
+def prepare_features(store=None, df=None):
+    """
+    Menyusun fitur FITUR_STOK dan target will_deplete untuk setiap baris ledger
+
+    Args:
+        store (StokStore, optional): Sumber ledger (default: StokStore.buka())
+        df (pd.DataFrame, optional): Ledger urut waktu, dipakai jika store tidak diberikan
+
+    Returns:
+        pd.DataFrame: Kolom FITUR_STOK + will_deplete, urutan baris ledger
+    """
+    if df is None:
+        store = store if store is not None else StokStore.buka()
+        df = store.ke_frame([KUNCI_ITEM, 'stok_awal', 'masuk', 'keluar', 'stok_akhir', 'bulan'])
+
+    items = df[KUNCI_ITEM].to_numpy()
+    keluar_ma3 = rata_rata_jendela(jendela_per_baris(items, df['keluar'].to_numpy()))
+    masuk_ma3 = rata_rata_jendela(jendela_per_baris(items, df['masuk'].to_numpy()))
+    fitur = fitur_stok(df['stok_awal'], df['masuk'], df['keluar'], df['bulan'], keluar_ma3, masuk_ma3)
+
+    hasil = pd.DataFrame(fitur, columns=FITUR_STOK, index=df.index)
+    hasil['will_deplete'] = (df['stok_akhir'] < df['stok_awal'] * 0.2).astype(int).to_numpy()
+    return hasil
+
+if __name__ == "__main__":
+    # Membuka (atau membangun jika belum ada) store: python stok_store.py
+    # Menambah rekap baru:                         python stok_store.py --tambah rekap_bulan_baru.csv
+    # Membangun ulang dari ledger CSV:             python stok_store.py --bangun-ulang
+    parser = argparse.ArgumentParser(description="Penyimpanan kolumnar riwayat stok")
+    parser.add_argument('--csv', type=Path, default=STOK_DATA_PATH, help="ledger sumber")
+    parser.add_argument('--tambah', type=Path, help="CSV berisi baris baru untuk ditambahkan")
+    parser.add_argument('--bangun-ulang', action='store_true',
+                        help="bangun ulang dari --csv; baris yang pernah ditambahkan dengan --tambah hilang")
+    args = parser.parse_args()
+
+    store = StokStore.buka(csv_path=args.csv, bangun_ulang=args.bangun_ulang)
+    if args.tambah:
+        store.tambah(pd.read_csv(args.tambah))
+    print(f"{len(store)} baris, {len(store.items)} item, segmen {store.meta['segmen']} -> {store.path}")
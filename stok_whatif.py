@@ -0,0 +1,177 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from prediksi import fitur_stok, prediksi_probabilitas, prediksi_stok_batch, status_stok
+from riwayat_stok import KUNCI_ITEM
+
+# Jumlah titik grid awal per item dan per ambang sebelum bisection
+TITIK_GRID = 32
+
+# Variabel yang bisa dicari ambangnya dan kolom hasilnya, dari ambang terendah
+KOLOM_AMBANG = {
+    'keluar': ('keluar_maks_aman', 'keluar_maks_stabil'),
+    'masuk': ('masuk_min_stabil', 'masuk_min_aman')
+}
+
+def tingkat_status(status):
+    """Aman = 0, Stabil = 1, Berisiko = 2"""
+    status = np.asarray(status)
+    return (status != "Aman").astype(np.int8) + (status == "Berisiko")
+
+# Tingkat status untuk banyak baris kandidat dalam satu pemanggilan model
+def _evaluasi(model, scaler, riwayat, items, stok_awal, masuk, keluar, bulan):
+    keluar_ma3 = masuk_ma3 = None
+    if riwayat is not None:
+        # Setiap kandidat adalah permintaan terpisah di atas riwayat, bukan periode berturut-turut
+        keluar_ma3, masuk_ma3 = riwayat.moving_average_batch(items, masuk, keluar, berurutan=False)
+    probabilitas = prediksi_probabilitas(model, scaler, fitur_stok(stok_awal, masuk, keluar, bulan, keluar_ma3,
+                                                                   masuk_ma3))
+    return tingkat_status(status_stok(stok_awal, keluar, probabilitas)[0])
+
+def _ambang_pertama(evaluasi, maks, syarat, titik_grid):
+    """
+    Nilai bulat terkecil x di [0, maks] per tugas yang memenuhi syarat(tingkat(x), tugas),
+    dicari dengan grid lalu bisection di celah grid pertama yang memenuhi syarat.
+    Setiap langkah adalah satu pemanggilan evaluasi untuk semua tugas yang masih aktif.
+
+    Returns:
+        np.ndarray: x per tugas, -1 jika tidak ada di [0, maks]
+    """
+    n = len(maks)
+    grid = np.rint(np.linspace(0, 1, titik_grid)[None, :] * maks[:, None]).astype(np.int64)
+    baris = np.repeat(np.arange(n), titik_grid)
+    terpenuhi = syarat(evaluasi(baris, grid.ravel()), baris).reshape(n, titik_grid)
+
+    ada = terpenuhi.any(axis=1)
+    pertama = terpenuhi.argmax(axis=1)
+    hi = grid[np.arange(n), pertama]
+    lo = np.where(pertama > 0, grid[np.arange(n), np.maximum(pertama - 1, 0)], -1)
+
+    # lo tidak memenuhi syarat, hi memenuhi; persempit sampai berdampingan
+    aktif = np.flatnonzero(ada & (hi - lo > 1))
+    while len(aktif):
+        tengah = (lo[aktif] + hi[aktif]) // 2
+        ok = syarat(evaluasi(aktif, tengah), aktif)
+        hi[aktif[ok]] = tengah[ok]
+        lo[aktif[~ok]] = tengah[~ok]
+        aktif = aktif[hi[aktif] - lo[aktif] > 1]
+
+    return np.where(ada, hi, -1)
+
+# Mencari ambang perubahan status untuk banyak barang sekaligus
+def ambang_status(model, scaler, metadata, data, variabel='keluar', riwayat=None, maks=None, titik_grid=TITIK_GRID,
+                  kunci=KUNCI_ITEM):
+    """
+    Untuk setiap baris data, mencari ambang variabel (keluar atau masuk) tempat status
+    prediksi_stok berubah, dengan kolom lain tetap. Kedua ambang semua baris dievaluasi
+    bersama: satu pemanggilan model untuk grid, lalu satu per langkah bisection.
+    Jika status tidak monoton terhadap variabel, yang dilaporkan adalah perubahan pertama dari 0.
+
+    Args:
+        data (pd.DataFrame): Kolom stok_awal, masuk, keluar, bulan (opsional: kunci)
+        variabel (str): 'keluar' -> keluar_maks_aman / keluar_maks_stabil (keluar terbesar yang
+                        masih Aman / belum Berisiko); 'masuk' -> masuk_min_stabil / masuk_min_aman
+                        (masuk terkecil agar tidak Berisiko / Aman)
+        riwayat (RiwayatStok, optional): Riwayat untuk keluar_ma3/masuk_ma3, tidak diubah
+        maks (array-like, optional): Batas atas pencarian per baris. Default keluar: stok_awal + masuk
+                                     (seluruh stok keluar); masuk: 2 x (stok_awal + keluar)
+
+    Returns:
+        pd.DataFrame: Dua kolom ambang (Int64, <NA> jika tidak ada di [0, maks]) dengan index data
+    """
+    if variabel not in KOLOM_AMBANG:
+        raise ValueError(f"Variabel tidak dikenal: {variabel} (pilihan: {', '.join(KOLOM_AMBANG)})")
+
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    kolom = {k: df[k].to_numpy(dtype=np.float64) for k in ('stok_awal', 'masuk', 'keluar', 'bulan')}
+    items = df[kunci].to_numpy() if kunci in df else np.full(len(df), None)
+    riwayat = riwayat if kunci in df else None
+
+    if maks is None:
+        maks = (kolom['stok_awal'] + kolom['masuk'] if variabel == 'keluar'
+                else 2 * (kolom['stok_awal'] + kolom['keluar']))
+    maks = np.maximum(np.asarray(maks, dtype=np.float64), 0).astype(np.int64)
+
+    # Satu tugas per (baris, ambang); tugas dan baris disusun sebagai (ambang, baris)
+    n = len(df)
+    baris_tugas = np.tile(np.arange(n), 2)
+    level_tugas = np.repeat([1, 2] if variabel == 'keluar' else [1, 0], n)
+
+    def evaluasi(tugas, x):
+        i = baris_tugas[tugas]
+        nilai = {k: v[i] for k, v in kolom.items()}
+        nilai[variabel] = x.astype(np.float64)
+        return _evaluasi(model, scaler, riwayat, items[i], nilai['stok_awal'], nilai['masuk'], nilai['keluar'],
+                         nilai['bulan'])
+
+    def syarat(tingkat, tugas):
+        # keluar: pertama kali mencapai Stabil / Berisiko; masuk: pertama kali turun ke Stabil / Aman
+        if variabel == 'keluar':
+            return tingkat >= level_tugas[tugas]
+        return tingkat <= level_tugas[tugas]
+
+    x = _ambang_pertama(evaluasi, np.tile(maks, 2), syarat, titik_grid)
+    hasil = pd.DataFrame(index=df.index)
+    for j, nama in enumerate(KOLOM_AMBANG[variabel]):
+        ambang = x[j * n:(j + 1) * n]
+        if variabel == 'keluar':
+            # Keluar terbesar sebelum status berubah; maks jika tidak berubah, <NA> jika sudah berubah di 0
+            nilai = np.where(ambang < 0, maks, ambang - 1)
+            hasil[nama] = pd.array(np.where(nilai >= 0, nilai, 0), dtype='Int64')
+            hasil.loc[nilai < 0, nama] = pd.NA
+        else:
+            hasil[nama] = pd.array(np.maximum(ambang, 0), dtype='Int64')
+            hasil.loc[ambang < 0, nama] = pd.NA
+    return hasil
+
+def periode_berikutnya(store):
+    """
+    Satu baris per item untuk bulan setelah periode terakhir di store: stok_awal = stok_akhir
+    terakhir, masuk/keluar = nilai periode terakhir sebagai titik awal what-if
+    """
+    terakhir = store.terakhir_per_item(1, kolom=(KUNCI_ITEM, 'stok_akhir', 'masuk', 'keluar', 'bulan', 'satuan'))
+    return pd.DataFrame({
+        KUNCI_ITEM: terakhir[KUNCI_ITEM].astype(str),
+        'satuan': terakhir['satuan'].astype(str),
+        'stok_awal': terakhir['stok_akhir'].to_numpy(),
+        'masuk': terakhir['masuk'].to_numpy(),
+        'keluar': terakhir['keluar'].to_numpy(),
+        'bulan': terakhir['bulan'].to_numpy() % 12 + 1
+    }).sort_values(KUNCI_ITEM, ignore_index=True)
+
+# Tabel what-if semua barang: status saat ini dan ambang keluar (opsional masuk)
+def tabel_whatif(model, scaler, metadata, data, riwayat=None, dengan_masuk=False, titik_grid=TITIK_GRID):
+    """
+    Returns:
+        pd.DataFrame: data + probabilitas, status, keluar_maks_aman, keluar_maks_stabil
+                      (dan masuk_min_stabil, masuk_min_aman jika dengan_masuk)
+    """
+    sekarang = prediksi_stok_batch(model, scaler, metadata, data, riwayat=riwayat, berurutan=False)
+    bagian = [data, sekarang[['probabilitas', 'status']],
+              ambang_status(model, scaler, metadata, data, 'keluar', riwayat, titik_grid=titik_grid)]
+    if dengan_masuk:
+        bagian.append(ambang_status(model, scaler, metadata, data, 'masuk', riwayat, titik_grid=titik_grid))
+    return pd.concat(bagian, axis=1)
+
+if __name__ == "__main__":
+    # Ambang semua barang untuk bulan berikutnya: python stok_whatif.py --masuk
+    from prediksi import BACKEND_MODEL, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, load_model
+    from stok_store import StokStore
+
+    parser = argparse.ArgumentParser(description="Ambang keluar/masuk tempat status stok berubah, semua barang")
+    parser.add_argument('--backend', default='numpy', choices=BACKEND_MODEL)
+    parser.add_argument('--masuk', action='store_true', help="juga cari ambang masuk")
+    parser.add_argument('--titik-grid', type=int, default=TITIK_GRID)
+    args = parser.parse_args()
+
+    model, scaler, metadata = load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, backend=args.backend)
+    store = StokStore.buka()
+    mulai = time.perf_counter()
+    tabel = tabel_whatif(model, scaler, metadata, periode_berikutnya(store), store.riwayat(), args.masuk,
+                         args.titik_grid)
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', None):
+        print(tabel.drop(columns='probabilitas').to_string(index=False))
+    print(f"{len(tabel)} barang dalam {time.perf_counter() - mulai:.3f} s")
@@ -0,0 +1,47 @@
+import json
+import shutil
+
+import numpy as np
+
+import absensi_lut
+from absensi_lut import ABSENSI_LUT_INFO_PATH, ABSENSI_LUT_PATH, ModelTabelAbsensi
+from model_bundle import MetadataBundle, ModelBundle, buat_bundle
+from numpy_model import FoldedScaler
+from prediksi import ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH
+
+def test_metadata_dan_tabel_mengikuti_versi_bundle(tmp_path, monkeypatch):
+    model_path, scaler_path, metadata_path = (tmp_path / p.name for p in
+                                              (ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH))
+    for asal, tujuan in zip((ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH),
+                            (model_path, scaler_path, metadata_path)):
+        shutil.copy(asal, tujuan)
+    path = tmp_path / 'absensi_model.bundle'
+    buat_bundle(model_path, scaler_path, metadata_path, path=path)
+
+    bundle = ModelBundle(path, interval_cek=0)
+    metadata = MetadataBundle(bundle)
+    model = ModelTabelAbsensi(bundle, FoldedScaler(bundle.n_features), path=ABSENSI_LUT_PATH,
+                              info_path=ABSENSI_LUT_INFO_PATH)
+    assert model.tabel is not None
+
+    # Baris di luar grid (jadwal negatif) masuk ke LRU cache
+    X = np.zeros((1, bundle.n_features))
+    X[0, 0] = -60
+    model.predict(X)
+    assert model.stats()['cache_size'] == 1
+
+    with open(metadata_path, 'r') as f:
+        isi = json.load(f)
+    isi['catatan_uji'] = 'versi 2'
+    with open(metadata_path, 'w') as f:
+        json.dump(isi, f)
+    buat_bundle(model_path, scaler_path, metadata_path, path=path)
+    # Tabel di disk dianggap dibuat dari model lain
+    monkeypatch.setattr(absensi_lut, '_checksum_model', lambda: 'lain')
+
+    model.predict(X)
+    assert bundle.versi == 2 and model.versi == 2
+    assert metadata['catatan_uji'] == 'versi 2'
+    assert model.tabel is None
+    # Cache versi lama dibuang; baris yang sama dihitung ulang oleh model baru
+    assert model.stats()['cache_size'] == 1 and model.stats()['misses'] == 2
@@ -0,0 +1,84 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from server import LayananPrediksi, MicroBatcher, buat_handler, validasi_absensi, validasi_stok
+
+STOK_VALID = {'nama_barang': 'Beras', 'stok_awal': 100, 'masuk': 20, 'keluar': 30, 'bulan': 5, 'satuan': 'kg'}
+
+def _batch_gagal_jika_ada_yang_buruk(payloads):
+    # Seperti prediksi_stok_batch: satu nilai yang tidak bisa dikonversi menggagalkan seluruh batch
+    return [float(p['stok_awal']) * 2 for p in payloads]
+
+def test_batch_campuran_tidak_menggagalkan_payload_valid():
+    # max_wait panjang supaya semua permintaan digabung menjadi satu batch
+    batcher = MicroBatcher(_batch_gagal_jika_ada_yang_buruk, max_batch=8, max_wait_ms=200, nama="batcher-uji")
+    futures = [batcher.submit({'stok_awal': nilai}) for nilai in (1, 'abc', 3, 4)]
+
+    assert futures[0].result(timeout=5) == 2.0
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) == 6.0
+    assert futures[3].result(timeout=5) == 8.0
+    assert batcher.stats()['max_batch_size'] == 4
+
+@pytest.mark.parametrize('ubah', [
+    {'stok_awal': 'abc'}, {'masuk': float('nan')}, {'keluar': True}, {'bulan': 13}, {'bulan': 2.5},
+    {'nama_barang': 5}
+])
+def test_validasi_stok_menolak_input_salah(ubah):
+    with pytest.raises(ValueError):
+        validasi_stok({**STOK_VALID, **ubah})
+
+def test_validasi_stok_mengonversi_angka():
+    hasil = validasi_stok({**STOK_VALID, 'stok_awal': '100.5', 'bulan': 5.0})
+    assert hasil['stok_awal'] == 100.5 and hasil['bulan'] == 5
+
+@pytest.mark.parametrize('ubah', [{'jam_jadwal': '8 pagi'}, {'jam_jadwal': '25:00'}, {'jam_masuk': 800}])
+def test_validasi_absensi_menolak_jam_salah(ubah):
+    payload = {'hari': 'Monday', 'jam_jadwal': '08:00', 'kondisi_cuaca': 'Clear', 'jam_masuk': '08:03', **ubah}
+    with pytest.raises(ValueError):
+        validasi_absensi(payload)
+
+@pytest.fixture(scope='module')
+def server_uji():
+    layanan = LayananPrediksi(backend='numpy', max_batch=64, max_wait_ms=50)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), buat_handler(layanan))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def _post(url, isi):
+    permintaan = urllib.request.Request(url, json.dumps(isi).encode('utf-8'),
+                                        headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(permintaan, timeout=30) as respons:
+            return respons.status, json.loads(respons.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_server_permintaan_buruk_bersamaan_dengan_yang_valid(server_uji):
+    isi = [dict(STOK_VALID, stok_awal='abc') if i % 4 == 0 else dict(STOK_VALID, keluar=10 + i) for i in range(16)]
+    hasil = [None] * len(isi)
+
+    def kirim(i):
+        hasil[i] = _post(f"{server_uji}/predict/stok", isi[i])
+
+    threads = [threading.Thread(target=kirim, args=(i,)) for i in range(len(isi))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i, (kode, respons) in enumerate(hasil):
+        if i % 4 == 0:
+            assert kode == 400 and 'stok_awal' in respons['message']
+        else:
+            assert kode == 200 and respons['status'] == 'success'
+            assert respons['prediction']['status'] in ('Aman', 'Stabil', 'Berisiko')
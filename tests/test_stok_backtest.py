@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediksi import STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, load_model
+from riwayat_stok import KUNCI_ITEM
+from stok_backtest import skor_ledger, skor_maju
+
+@pytest.fixture(scope='module')
+def model_stok():
+    return load_model(STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH, backend='numpy')
+
+def _ledger():
+    rng = np.random.default_rng(0)
+    tanggal = pd.date_range('2024-01-01', periods=6, freq='MS')
+    baris = []
+    for barang in ('Beras', 'Garam', 'Kol'):
+        for t in tanggal:
+            stok_awal, masuk, keluar = rng.integers(20, 200, 3)
+            baris.append({'tanggal': t, KUNCI_ITEM: barang, 'stok_awal': stok_awal, 'masuk': masuk,
+                          'keluar': keluar, 'stok_akhir': max(stok_awal + masuk - keluar, 0), 'bulan': t.month})
+    return pd.DataFrame(baris)
+
+def test_skor_maju_tidak_melihat_periode_yang_dinilai(model_stok):
+    ledger = _ledger()
+    hasil = skor_maju(*model_stok, ledger)
+    # Periode pertama setiap item tidak dinilai
+    assert len(hasil) == len(ledger) - ledger[KUNCI_ITEM].nunique()
+
+    # Mengubah angka periode terakhir setiap item hanya boleh mengubah kejadiannya, bukan skornya
+    terakhir = ledger.groupby(KUNCI_ITEM).tail(1).index
+    diubah = ledger.copy()
+    diubah.loc[terakhir, ['stok_awal', 'masuk', 'keluar']] = [500, 0, 490]
+    diubah.loc[terakhir, 'stok_akhir'] = 10
+    hasil_diubah = skor_maju(*model_stok, diubah)
+    np.testing.assert_array_equal(hasil['probabilitas'], hasil_diubah['probabilitas'])
+    np.testing.assert_array_equal(hasil['status'], hasil_diubah['status'])
+    assert hasil_diubah.loc[np.isin(hasil_diubah['baris'], terakhir), 'habis'].all()
+
+def test_skor_ledger_memakai_angka_baris_itu_sendiri(model_stok):
+    ledger = _ledger()
+    hasil = skor_ledger(*model_stok, ledger)
+    assert len(hasil) == len(ledger)
+    np.testing.assert_array_equal(np.sort(hasil['baris']), np.arange(len(ledger)))
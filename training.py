@@ -0,0 +1,347 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediksi import (ABSENSI_DATA_PATH, ABSENSI_METADATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, BASE_DIR,
+                      FITUR_STOK, POINTER_MODEL, STOK_DATA_PATH, STOK_METADATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH,
+                      artefak_aktif, fitur_kehadiran)
+
+# Cache matriks fitur per hash data sumber
+CACHE_DIR = BASE_DIR / '.cache' / 'fitur'
+
+# Naikkan jika cara menyusun fitur berubah, agar cache lama tidak dipakai
+VERSI_FITUR = 1
+
+# Bagian metadata yang dipakai saat menyusun fitur; metrik dan info training yang ditulis
+# ulang setiap training tidak ikut kunci cache
+KUNCI_METADATA_FITUR = ('features', 'day_map', 'weather_map')
+
+# Jumlah folder versi model yang disimpan (termasuk yang aktif)
+SIMPAN_VERSI = 3
+
+# Pengaturan training dari notebook
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+BATCH_SIZE = 32
+LEARNING_RATE = 0.001
+
+# Epoch maksimum: training dari awal seperti notebook, warm start cukup beberapa epoch
+EPOCH_DARI_AWAL = 100
+EPOCH_WARM_START = 10
+
+# Jumlah baris per potongan yang dibaca generator tf.data dari cache
+UKURAN_POTONGAN = 4096
+
+PATHS = {
+    'absensi': (ABSENSI_DATA_PATH, ABSENSI_MODEL_PATH, ABSENSI_SCALER_PATH, ABSENSI_METADATA_PATH),
+    'stok': (STOK_DATA_PATH, STOK_MODEL_PATH, STOK_SCALER_PATH, STOK_METADATA_PATH)
+}
+
+def hash_sumber(data_path, metadata, store=None):
+    """
+    sha256 dari data sumber, bagian metadata untuk fitur dan VERSI_FITUR. Jika ledger
+    dibaca lewat store, kolom store yang di-hash (bukan CSV), sehingga baris dari
+    StokStore.tambah ikut mengubah kunci
+    """
+    h = hashlib.sha256(f"fitur-v{VERSI_FITUR}".encode())
+    h.update(json.dumps({k: metadata.get(k) for k in KUNCI_METADATA_FITUR}, sort_keys=True).encode())
+    if store is not None:
+        for segmen in store.segmen:
+            for nama in sorted(segmen.kolom):
+                h.update(nama.encode())
+                h.update(np.ascontiguousarray(segmen.kolom[nama]).tobytes())
+        return h.hexdigest()
+
+    with open(data_path, 'rb') as f:
+        for blok in iter(lambda: f.read(1 << 20), b''):
+            h.update(blok)
+    return h.hexdigest()
+
+# Menyusun fitur dan target dengan fungsi yang sama dengan saat prediksi
+def siapkan_fitur(nama, data_path, metadata, store=None):
+    """
+    Args:
+        store (StokStore, optional): Sumber ledger stok; jika None ledger dibaca dari data_path
+
+    Returns:
+        tuple: (X (n, 8) float64, y (n,) float32)
+    """
+    if nama == 'stok':
+        from stok_store import prepare_features
+
+        fitur = prepare_features(store) if store is not None else prepare_features(df=pd.read_csv(data_path))
+        return fitur[FITUR_STOK].to_numpy(dtype=np.float64), fitur['will_deplete'].to_numpy(dtype=np.float32)
+
+    df = pd.read_csv(data_path, dtype={'jam_masuk': str, 'jam_jadwal': str})
+    return fitur_kehadiran(metadata, df), df['terlambat'].to_numpy(dtype=np.float32)
+
+def muat_fitur(nama, data_path, metadata_path, cache_dir=CACHE_DIR):
+    """
+    Matriks fitur dari cache jika hash data sumber sama, selain itu disusun lalu disimpan.
+    Ledger stok bawaan dibaca lewat StokStore (termasuk baris tambahan); ledger lain dari CSV.
+
+    Returns:
+        tuple: (X, y, hash, dari_cache); X dan y di-memory-map dari file .npy cache
+    """
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    store = None
+    if nama == 'stok' and Path(data_path).resolve() == STOK_DATA_PATH:
+        from stok_store import StokStore
+
+        store = StokStore.buka()
+
+    kunci = hash_sumber(data_path, metadata, store)
+    folder = Path(cache_dir) / f"{nama}_{kunci[:16]}"
+    dari_cache = (folder / 'X.npy').exists() and (folder / 'y.npy').exists()
+
+    if not dari_cache:
+        X, y = siapkan_fitur(nama, data_path, metadata, store)
+        folder.mkdir(parents=True, exist_ok=True)
+        for nama_file, nilai in (('X.npy', X), ('y.npy', y)):
+            np.save(folder / f"{nama_file}.tmp.npy", nilai)
+            os.replace(folder / f"{nama_file}.tmp.npy", folder / nama_file)
+
+    return np.load(folder / 'X.npy', mmap_mode='r'), np.load(folder / 'y.npy', mmap_mode='r'), kunci, dari_cache
+
+def bagi_data(n, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """Indeks train/test, sama dengan train_test_split di notebook"""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(np.arange(n), test_size=test_size, random_state=random_state)
+
+def buat_dataset(X, y, indeks, scaler, batch_size=BATCH_SIZE, acak=True, seed=RANDOM_STATE):
+    """
+    tf.data pipeline yang membaca cache per potongan, menerapkan scaler di graph,
+    lalu mengacak dan membentuk batch dengan prefetch
+
+    Args:
+        X, y (np.ndarray): Fitur mentah dan target (boleh memmap)
+        indeks (np.ndarray): Baris yang dipakai
+    """
+    import tensorflow as tf
+
+    n_fitur = X.shape[1]
+
+    def generator():
+        urutan = np.random.default_rng(seed).permutation(indeks) if acak else indeks
+        for mulai in range(0, len(urutan), UKURAN_POTONGAN):
+            bagian = urutan[mulai:mulai + UKURAN_POTONGAN]
+            # Baca memmap dengan indeks terurut (akses berurutan), lalu kembalikan ke urutan acak
+            urut = np.argsort(bagian, kind='stable')
+            kembali = np.argsort(urut, kind='stable')
+            X_bagian = np.asarray(X[bagian[urut]], dtype=np.float32)[kembali]
+            y_bagian = np.asarray(y[bagian[urut]], dtype=np.float32)[kembali]
+            yield X_bagian, y_bagian
+
+    mean = tf.constant(scaler.mean_, dtype=tf.float32)
+    scale = tf.constant(scaler.scale_, dtype=tf.float32)
+    dataset = tf.data.Dataset.from_generator(generator, output_signature=(
+        tf.TensorSpec(shape=(None, n_fitur), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32)
+    )).map(lambda x, t: ((x - mean) / scale, t), num_parallel_calls=tf.data.AUTOTUNE).unbatch()
+
+    if acak:
+        dataset = dataset.shuffle(UKURAN_POTONGAN, seed=seed)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def buat_model(n_fitur):
+    """Arsitektur yang sama dengan notebook absensi dan stok"""
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([tf.keras.Input(shape=(n_fitur,))])
+    for unit in (64, 32, 16):
+        model.add(tf.keras.layers.Dense(unit, activation='relu'))
+        model.add(tf.keras.layers.BatchNormalization())
+        model.add(tf.keras.layers.Dropout(0.3))
+    model.add(tf.keras.layers.Dense(1, activation='sigmoid'))
+    return model
+
+# Menulis model, scaler dan metadata sebagai satu versi lalu mengaktifkannya dengan satu rename
+def terbitkan(output_dir, tulis):
+    """
+    Artefak ditulis ke folder baru output_dir/versi/<waktu>-<acak>, lalu pointer
+    output_dir/AKTIF diganti secara atomik (lihat prediksi.artefak_aktif). Pembaca
+    tidak pernah melihat model dan scaler dari versi berbeda. Hanya SIMPAN_VERSI
+    versi terbaru yang disimpan.
+
+    Args:
+        tulis (dict): Nama file -> fungsi yang menulis file itu ke path yang diberikan
+
+    Returns:
+        Path: Folder versi baru
+    """
+    folder_versi = Path(output_dir) / 'versi'
+    folder_versi.mkdir(parents=True, exist_ok=True)
+    folder = Path(tempfile.mkdtemp(prefix=time.strftime('%Y%m%d-%H%M%S-'), dir=folder_versi))
+    for nama_file, fungsi in tulis.items():
+        fungsi(folder / nama_file)
+    os.chmod(folder, 0o755)
+
+    pointer = Path(output_dir) / POINTER_MODEL
+    sementara = pointer.with_name(f"{POINTER_MODEL}.{folder.name}.tmp")
+    sementara.write_text(folder.name + '\n')
+    os.replace(sementara, pointer)
+
+    # Versi lama dihapus; file yang sedang dibuka pembaca tetap valid sampai ditutup
+    for lama in sorted(p for p in folder_versi.iterdir() if p.is_dir())[:-SIMPAN_VERSI]:
+        if lama != folder:
+            shutil.rmtree(lama, ignore_errors=True)
+    return folder
+
+# Membuat ulang bundle dan lookup table yang sudah ada agar cocok dengan versi model baru
+def perbarui_turunan(nama):
+    """
+    Returns:
+        list: Artefak turunan yang dibuat ulang
+    """
+    from model_bundle import buat_bundle, bundle_path
+
+    _, model_path, scaler_path, metadata_path = PATHS[nama]
+    diperbarui = []
+    if bundle_path(model_path).exists():
+        buat_bundle(model_path, scaler_path, metadata_path)
+        diperbarui.append(bundle_path(model_path).name)
+
+    if nama == 'absensi':
+        from absensi_lut import ABSENSI_LUT_INFO_PATH, ABSENSI_LUT_PATH, bangun_tabel, simpan_tabel
+        from prediksi import load_model
+
+        if ABSENSI_LUT_PATH.exists():
+            # Tanpa dibangun ulang pun tabel lama diabaikan karena checksum model berbeda
+            with open(ABSENSI_LUT_INFO_PATH, 'r') as f:
+                info = json.load(f)
+            model, scaler, metadata = load_model(model_path, scaler_path, metadata_path, backend='numpy')
+            tabel, vektor_cuaca = bangun_tabel(model, scaler, metadata, tuple(info['jadwal']), tuple(info['offset']),
+                                               dtype=np.load(ABSENSI_LUT_PATH, mmap_mode='r').dtype)
+            simpan_tabel(tabel, vektor_cuaca, tuple(info['jadwal']), tuple(info['offset']))
+            diperbarui.append(ABSENSI_LUT_PATH.name)
+    return diperbarui
+
+# Training satu model dari data sumber sampai artefak tersimpan
+def latih(nama, data_path=None, output_dir=None, epochs=None, dari_awal=False, batch_size=BATCH_SIZE,
+          cache_dir=CACHE_DIR, verbose=1):
+    """
+    Melatih model absensi/stok. Default warm start dari .h5 yang ada (scaler lama
+    dipertahankan agar bobot tetap cocok); dari_awal=True melatih dari inisialisasi acak
+    dengan scaler baru seperti notebook.
+
+    Args:
+        nama (str): 'absensi' atau 'stok'
+        data_path (Path, optional): CSV sumber (default: data yang dibundel)
+        output_dir (Path, optional): Folder artefak (default: folder model yang sedang dipakai)
+        epochs (int, optional): Epoch maksimum (default EPOCH_WARM_START / EPOCH_DARI_AWAL)
+
+    Returns:
+        dict: Ringkasan training (akurasi, epoch, waktu per tahap, cache)
+    """
+    import joblib
+    import tensorflow as tf
+
+    data_default, model_path, scaler_path, metadata_path = PATHS[nama]
+    data_path = Path(data_path or data_default)
+    output_dir = Path(output_dir or model_path.parent)
+    folder_aktif = output_dir.resolve() == model_path.parent.resolve()
+    # Warm start dari versi yang sedang aktif (pointer dibaca sekali)
+    model_path, scaler_path, metadata_path = artefak_aktif(model_path, scaler_path, metadata_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    X, y, kunci, dari_cache = muat_fitur(nama, data_path, metadata_path, cache_dir)
+    t1 = time.perf_counter()
+
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    indeks_train, indeks_test = bagi_data(len(X))
+
+    warm_start = not dari_awal and model_path.exists()
+    if warm_start:
+        model = tf.keras.models.load_model(model_path)
+        scaler = joblib.load(scaler_path)
+    else:
+        from sklearn.preprocessing import StandardScaler
+
+        model = buat_model(X.shape[1])
+        scaler = StandardScaler().fit(np.asarray(X[np.sort(indeks_train)]))
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=LEARNING_RATE),
+                  loss='binary_crossentropy', metrics=['accuracy'])
+
+    # Validasi 20% dari data train, seperti validation_split di notebook
+    n_val = int(len(indeks_train) * 0.2)
+    indeks_fit, indeks_val = indeks_train[:-n_val], indeks_train[-n_val:]
+    epochs = epochs or (EPOCH_WARM_START if warm_start else EPOCH_DARI_AWAL)
+    history = model.fit(
+        buat_dataset(X, y, indeks_fit, scaler, batch_size),
+        validation_data=buat_dataset(X, y, indeks_val, scaler, batch_size, acak=False),
+        epochs=epochs,
+        callbacks=[tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)],
+        verbose=verbose
+    )
+    t2 = time.perf_counter()
+
+    _, train_accuracy = model.evaluate(buat_dataset(X, y, indeks_train, scaler, acak=False), verbose=0)
+    _, test_accuracy = model.evaluate(buat_dataset(X, y, indeks_test, scaler, acak=False), verbose=0)
+
+    # Format metrik mengikuti metadata masing-masing notebook
+    if nama == 'stok':
+        metadata['metrics'] = {'train_accuracy': float(train_accuracy), 'test_accuracy': float(test_accuracy)}
+    else:
+        metadata['training_accuracy'] = float(train_accuracy)
+        metadata['test_accuracy'] = float(test_accuracy)
+    metadata['training'] = {
+        'data': data_path.name,
+        'hash_data': kunci,
+        'warm_start': warm_start,
+        'epochs': len(history.history['loss']),
+        'waktu': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+    def tulis_metadata(path):
+        with open(path, 'w') as f:
+            json.dump(metadata, f, indent=4)
+
+    folder = terbitkan(output_dir, {
+        model_path.name: model.save,
+        scaler_path.name: lambda path: joblib.dump(scaler, path),
+        metadata_path.name: tulis_metadata
+    })
+    turunan = perbarui_turunan(nama) if folder_aktif else []
+    t3 = time.perf_counter()
+
+    return {
+        'model': nama,
+        'baris': len(X),
+        'cache_fitur': 'hit' if dari_cache else 'miss',
+        'warm_start': warm_start,
+        'epochs': len(history.history['loss']),
+        'train_accuracy': float(train_accuracy),
+        'test_accuracy': float(test_accuracy),
+        'fitur (s)': round(t1 - t0, 3),
+        'training (s)': round(t2 - t1, 3),
+        'simpan (s)': round(t3 - t2, 3),
+        'output': str(folder),
+        'dibuat_ulang': turunan
+    }
+
+if __name__ == "__main__":
+    # Warm start dari model yang ada:  python training.py stok
+    # Dari awal seperti notebook:      python training.py absensi --dari-awal
+    parser = argparse.ArgumentParser(description="Training model absensi dan stok")
+    parser.add_argument('model', choices=sorted(PATHS))
+    parser.add_argument('--data', type=Path, help="CSV sumber (default: data yang dibundel)")
+    parser.add_argument('--output-dir', type=Path, help="folder artefak (default: folder model)")
+    parser.add_argument('--epochs', type=int)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--dari-awal', action='store_true', help="tanpa warm start, scaler dihitung ulang")
+    args = parser.parse_args()
+
+    hasil = latih(args.model, args.data, args.output_dir, args.epochs, args.dari_awal, args.batch_size, verbose=2)
+    print(json.dumps(hasil, indent=2))